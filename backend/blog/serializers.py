@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from core.serializers import SparseFieldsMixin
 from .models import BlogPost, Comment
 
 User = get_user_model()
@@ -9,14 +10,14 @@ class CommentUserSerializer(serializers.ModelSerializer):
         model = User
         fields = ['id', 'first_name', 'last_name', 'email', 'profile_picture']
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user = CommentUserSerializer(read_only=True)
     
     class Meta:
         model = Comment
         fields = ['id', 'user', 'post', 'text', 'created_at']
 
-class BlogPostSerializer(serializers.ModelSerializer):
+class BlogPostSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     author = serializers.StringRelatedField(read_only=True)
     # author_name is now handled by ModelSerializer default (writable)
     
@@ -33,3 +34,4 @@ class BlogPostSerializer(serializers.ModelSerializer):
     class Meta:
         model = BlogPost
         fields = ['id', 'title', 'content', 'author', 'author_name', 'display_author', 'image', 'read_count', 'created_at', 'comments']
+        sparse_requires = {'display_author': ['author_name', 'author']}
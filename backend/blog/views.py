@@ -1,3 +1,4 @@
+from django.db.models import F
 from rest_framework import viewsets, permissions, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -5,32 +6,35 @@ from .models import BlogPost, Comment
 from .serializers import BlogPostSerializer, CommentSerializer
 from users.permissions import IsAdminOrStaffOrReadOnly
 from core.pagination import StandardPagination
+from core.mixins import ConditionalGetMixin, NDJSONExportMixin, SparseFieldsetMixin, StatementTimeoutMixin
 
-class BlogPostViewSet(viewsets.ModelViewSet):
+class BlogPostViewSet(StatementTimeoutMixin, ConditionalGetMixin, SparseFieldsetMixin, NDJSONExportMixin, viewsets.ModelViewSet):
     queryset = BlogPost.objects.all().order_by('-created_at')
     serializer_class = BlogPostSerializer
+    conditional_dependencies = ('blog.Comment',)
     permission_classes = [IsAdminOrStaffOrReadOnly]
     pagination_class = StandardPagination
+    pagination_mode = 'nocount'
     filter_backends = [filters.SearchFilter]
     search_fields = ['title', 'author__email', 'author__first_name', 'author__last_name', 'author_name']
-
-    def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+    statement_timeouts = {'list': 2000}
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.AllowAny])
     def increment_read(self, request, pk=None):
         instance = self.get_object()
-        instance.read_count += 1
-        instance.save()
-        return Response({'status': 'read count incremented', 'read_count': instance.read_count})
+        # update() leaves updated_at, the ETag and the change signals alone;
+        # a read is not an edit.
+        BlogPost.objects.filter(pk=instance.pk).update(read_count=F('read_count') + 1)
+        from core.rollups import record_event
+        record_event('blog_reads')
+        return Response({'status': 'read count incremented', 'read_count': instance.read_count + 1})
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     serializer_class = CommentSerializer
+    conditional_timestamp_field = None
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
     def get_queryset(self):
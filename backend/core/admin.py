@@ -1,6 +1,9 @@
 from django.contrib import admin
-from django.utils.html import format_html
-from .models import Notice, Member, CarouselItem, ContactMessage
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html, format_html_join
+from .models import Notice, Member, CarouselItem, ContactMessage, PendingDeletion, RequestProfile, SlowRequest
 
 @admin.register(Notice)
 class NoticeAdmin(admin.ModelAdmin):
@@ -55,3 +58,91 @@ class ContactMessageAdmin(admin.ModelAdmin):
     
     def has_add_permission(self, request):
         return False
+
+@admin.register(PendingDeletion)
+class PendingDeletionAdmin(admin.ModelAdmin):
+    list_display = ('name', 'attempts', 'created_at')
+    list_filter = ('attempts',)
+    search_fields = ('name', 'last_error')
+    readonly_fields = ('name', 'attempts', 'last_error', 'created_at')
+    ordering = ('id',)
+
+    def has_add_permission(self, request):
+        return False
+
+
+def format_queries(queries):
+    if not queries:
+        return "-"
+    return format_html(
+        '<table>{}</table>',
+        format_html_join('', '<tr><td>{}</td><td><code>{}</code></td></tr>', (
+            (f"{query.get('count', '')}x" if 'count' in query else f"{query['ms']} ms", query['sql'])
+            for query in queries
+        )),
+    )
+
+@admin.register(SlowRequest)
+class SlowRequestAdmin(admin.ModelAdmin):
+    list_display = ('route', 'method', 'duration_ms', 'db_ms', 'query_count', 'status', 'created_at')
+    list_filter = ('route', 'method', 'status')
+    search_fields = ('route', 'path')
+    ordering = ('route', '-duration_ms')
+    exclude = ('repeated_queries',)
+    readonly_fields = (
+        'route', 'method', 'path', 'status', 'duration_ms', 'db_ms', 'query_count',
+        'serialize_ms', 'render_ms', 'repeated_query_list', 'created_at',
+    )
+
+    def repeated_query_list(self, obj):
+        return format_queries(obj.repeated_queries)
+    repeated_query_list.short_description = 'Repeated queries (likely N+1)'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ('path', 'method', 'duration_ms', 'samples', 'query_count', 'user', 'created_at', 'download')
+    list_filter = ('route', 'method')
+    list_select_related = ('user',)
+    search_fields = ('path', 'route')
+    ordering = ('-created_at',)
+    exclude = ('folded', 'queries')
+    readonly_fields = (
+        'route', 'method', 'path', 'status', 'duration_ms', 'user', 'samples',
+        'download', 'query_list', 'created_at',
+    )
+
+    def get_urls(self):
+        return [
+            path('<int:pk>/folded/', self.admin_site.admin_view(self.folded_view), name='core_requestprofile_folded'),
+        ] + super().get_urls()
+
+    def folded_view(self, request, pk):
+        profile = get_object_or_404(RequestProfile, pk=pk)
+        response = HttpResponse(profile.folded, content_type='text/plain; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="profile-{pk}.folded"'
+        return response
+
+    def download(self, obj):
+        url = reverse('admin:core_requestprofile_folded', args=[obj.pk])
+        return format_html('<a href="{}">Flame graph stacks</a>', url)
+    download.short_description = 'Profile'
+
+    def query_count(self, obj):
+        return len(obj.queries)
+    query_count.short_description = 'Queries'
+
+    def query_list(self, obj):
+        return format_queries(obj.queries)
+    query_list.short_description = 'SQL'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -1,5 +1,23 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from .versions import connect_versions
+        connect_versions()
+
+        from .sync import connect_change_log
+        connect_change_log()
+
+        from .events import connect_events
+        connect_events()
+
+        from .rollups import connect_rollups
+        connect_rollups()
+
+        if settings.DASHBOARD_STATS_MODE == 'counters':
+            from .stats import connect_counters
+            connect_counters()
@@ -0,0 +1,26 @@
+from django.urls import path
+from django.views.decorators.csrf import csrf_exempt
+
+from .async_views import AsyncContactView, AsyncLoginView, _public_read_views
+
+# Async (ASGI) variants of the hot public endpoints, mounted under /api/async/
+# with the same paths and responses as the sync API.
+READ_PREFIXES = {
+    'notices': 'core/notices',
+    'members': 'core/members',
+    'books': 'library/books',
+    'camps': 'health/camps',
+    'posts': 'blog/posts',
+}
+
+urlpatterns = [
+    path('auth/login/', csrf_exempt(AsyncLoginView.as_view()), name='async-login'),
+    path('core/contact/', csrf_exempt(AsyncContactView.as_view()), name='async-contact'),
+]
+
+for key, view_class in _public_read_views().items():
+    prefix = READ_PREFIXES[key]
+    urlpatterns += [
+        path(f'{prefix}/', view_class.as_view(), name=f'async-{key}-list'),
+        path(f'{prefix}/<int:pk>/', view_class.as_view(), name=f'async-{key}-detail'),
+    ]
@@ -0,0 +1,278 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.mail import send_mail
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound
+
+from .mixins import ConditionalGetMixin
+from .pagination import estimated_count
+from .renderers import dumps
+from .timing import phase
+
+# Fire-and-forget tasks (notification emails) are referenced here until they
+# finish, otherwise the event loop may garbage collect them.
+_background_tasks = set()
+
+
+def json_response(data, status=status.HTTP_200_OK, headers=None):
+    with phase('render'):
+        content = dumps(data)
+    return HttpResponse(content, status=status, content_type='application/json', headers=headers)
+
+
+def error_response(exc):
+    """The response DRF's exception handler would build for ``exc``."""
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+    headers = {}
+    if getattr(exc, 'wait', None):
+        headers['Retry-After'] = '%d' % exc.wait
+    return json_response(data, status=exc.status_code, headers=headers)
+
+
+def run_in_background(func, *args, **kwargs):
+    """Run blocking ``func`` (e.g. SMTP) in a thread without making the client wait for it."""
+    task = asyncio.get_running_loop().create_task(
+        sync_to_async(func, thread_sensitive=False)(*args, **kwargs)
+    )
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+async def prepare_view(view_class, request, action=None, **kwargs):
+    """
+    Instantiate the sync DRF view ``view_class`` for ``request`` and run its
+    policies (authentication, permissions, throttles, content negotiation)
+    in a thread, so async variants enforce exactly the same rules.
+
+    Returns:
+        tuple: (view, drf_request)
+
+    Raises:
+        APIException: a policy rejected the request
+    """
+    view = view_class(format_kwarg=None, args=(), kwargs=kwargs)
+    if action is not None:
+        view.action_map = {request.method.lower(): action}
+    drf_request = view.initialize_request(request, **kwargs)
+    view.request = drf_request
+    view.headers = {}
+    await sync_to_async(view.initial)(drf_request, **kwargs)
+    return view, drf_request
+
+
+class AsyncReadView(View):
+    """
+    Async GET variant of a public read viewset (list and detail).
+
+    Filtering, sparse fieldsets, permissions, throttles and the ETag check
+    come from ``viewset_class``. Rows are read with the async ORM, and the
+    response matches the sync endpoint. Keyset pagination and the NDJSON
+    export are served by the sync viewset (in a thread).
+    """
+    viewset_class = None
+    select_related = ()
+    prefetch_related = ()
+
+    def use_sync_view(self, request):
+        params = request.GET
+        return (
+            'format' in params
+            or 'cursor' in params
+            or params.get('pagination') == 'keyset'
+            or not params.get('page', '1').isdigit()
+        )
+
+    async def get(self, request, pk=None):
+        action = 'list' if pk is None else 'retrieve'
+        kwargs = {} if pk is None else {'pk': pk}
+
+        if self.use_sync_view(request):
+            view = self.viewset_class.as_view({'get': action})
+            return await sync_to_async(view)(request, **kwargs)
+
+        try:
+            view, drf_request = await prepare_view(self.viewset_class, request, action, **kwargs)
+        except APIException as exc:
+            return error_response(exc)
+
+        # Relations the serializer reads must be loaded up front; lazy loads
+        # are not allowed in async code. Added before filter_queryset so the
+        # sparse fieldset mixin keeps the columns they need.
+        queryset = view.get_queryset()
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        queryset = view.filter_queryset(queryset)
+        if pk is not None:
+            queryset = queryset.filter(pk=pk)
+
+        etag = last_modified = None
+        if isinstance(view, ConditionalGetMixin):
+            etag, last_modified = await sync_to_async(view.get_validators)(queryset, detail=pk is not None)
+            if etag is not None:
+                response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+                if response is not None:
+                    return self.add_validators(response, etag, last_modified)
+
+        if pk is not None:
+            items = await self.fetch(view, queryset, 0, 1)
+            if not items:
+                return json_response({'detail': 'No %s matches the given query.' % queryset.model._meta.object_name},
+                                     status=status.HTTP_404_NOT_FOUND)
+            response = json_response(items[0])
+        else:
+            response = await self.paginate(view, drf_request, queryset)
+        return self.add_validators(response, etag, last_modified)
+
+    def add_validators(self, response, etag, last_modified):
+        if etag is not None and response.status_code in (200, 304):
+            response.headers['ETag'] = etag
+            if last_modified is not None:
+                response.headers['Last-Modified'] = http_date(last_modified)
+        return response
+
+    async def fetch(self, view, queryset, start, stop):
+        fast_class = getattr(view, 'fast_serializer_class', None)
+        if fast_class is not None and settings.FAST_READ_SERIALIZERS:
+            fast = fast_class(context=view.get_serializer_context())
+            rows = [row async for row in fast.values(queryset)[start:stop]]
+            return await fast.aserialize(rows)
+
+        instances = [instance async for instance in queryset[start:stop]]
+        return view.get_serializer(instances, many=True).data
+
+    async def paginate(self, view, request, queryset):
+        """The list page, built with the helpers of the view's StandardPagination."""
+        paginator = view.paginator
+        paginator.mode = paginator.get_pagination_mode(request, view)
+        page_size = paginator.get_page_size(request)
+        try:
+            page_number = paginator.parse_page_number(request)
+            offset = (page_number - 1) * page_size
+
+            is_estimate = False
+            if paginator.mode == 'nocount':
+                count = None
+                results = await self.fetch(view, queryset, offset, offset + page_size + 1)
+                has_next = len(results) > page_size
+                results = results[:page_size]
+            else:
+                count = None
+                if paginator.mode == 'estimate':
+                    count = await sync_to_async(estimated_count)(queryset)
+                    is_estimate = count is not None
+                if count is None:
+                    count = await queryset.acount()
+                has_next = paginator.has_next_page(count, page_number, page_size)
+                results = await self.fetch(view, queryset, offset, offset + page_size)
+        except NotFound as exc:
+            return error_response(exc)
+
+        links = paginator.get_page_links(request, page_number, has_next)
+        return json_response(paginator.get_page_data(count, links, results, is_estimate))
+
+
+def _read_view(name, viewset_class, **attrs):
+    return type(name, (AsyncReadView,), {'viewset_class': viewset_class, **attrs})
+
+
+def _public_read_views():
+    from blog.views import BlogPostViewSet
+    from health.views import HealthCampViewSet
+    from library.views import BookViewSet
+    from .views import MemberViewSet, NoticeViewSet
+
+    return {
+        'notices': _read_view('AsyncNoticeView', NoticeViewSet),
+        'members': _read_view('AsyncMemberView', MemberViewSet),
+        'books': _read_view('AsyncBookView', BookViewSet),
+        'camps': _read_view('AsyncHealthCampView', HealthCampViewSet),
+        'posts': _read_view(
+            'AsyncBlogPostView', BlogPostViewSet,
+            select_related=('author',), prefetch_related=('comments__user',),
+        ),
+    }
+
+
+class AsyncLoginView(View):
+    """
+    Async variant of CustomTokenObtainPairView. The reCAPTCHA check runs on
+    the event loop; only the password check takes a thread.
+    """
+
+    async def post(self, request):
+        from users.hashers import hashing_endpoint
+        from users.views import CustomTokenObtainPairView
+        from .recaptcha import averify_recaptcha
+
+        try:
+            view, drf_request = await prepare_view(CustomTokenObtainPairView, request)
+            success, score, error = await averify_recaptcha(drf_request.data.get('recaptcha_token'), action='login')
+            if not success:
+                return json_response({'recaptcha': error or 'reCAPTCHA verification failed'},
+                                     status=status.HTTP_400_BAD_REQUEST)
+
+            serializer = view.get_serializer(data=drf_request.data)
+
+            def validate():
+                from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+                with hashing_endpoint('login'):
+                    try:
+                        serializer.is_valid(raise_exception=True)
+                    except TokenError as e:
+                        raise InvalidToken(e.args[0])
+                return serializer.validated_data
+
+            return json_response(await sync_to_async(validate)())
+        except APIException as exc:
+            return error_response(exc)
+
+
+class AsyncContactView(View):
+    """
+    Async variant of ContactMessageViewSet.create. reCAPTCHA runs on the
+    event loop and the notification email is sent in the background, so
+    the client does not wait for SMTP.
+    """
+
+    async def post(self, request):
+        from users.models import CustomUser
+        from .recaptcha import averify_recaptcha
+        from .views import ContactMessageViewSet, contact_notification
+
+        try:
+            view, drf_request = await prepare_view(ContactMessageViewSet, request, 'create')
+            success, score, error = await averify_recaptcha(drf_request.data.get('recaptcha_token'), action='contact')
+            if not success:
+                return json_response({'recaptcha': error or 'reCAPTCHA verification failed'},
+                                     status=status.HTTP_400_BAD_REQUEST)
+
+            serializer = view.get_serializer(data=drf_request.data)
+
+            def save():
+                serializer.is_valid(raise_exception=True)
+                return serializer.save()
+
+            instance = await sync_to_async(save)()
+        except APIException as exc:
+            return error_response(exc)
+
+        recipients = [
+            email async for email in CustomUser.objects.filter(
+                role__in=['ADMIN', 'STAFF'], is_verified=True
+            ).values_list('email', flat=True)
+        ]
+        if recipients:
+            subject, message = contact_notification(instance)
+            run_in_background(
+                send_mail, subject, message, settings.DEFAULT_FROM_EMAIL, recipients, fail_silently=True,
+            )
+        return json_response(serializer.data, status=status.HTTP_201_CREATED)
@@ -0,0 +1,133 @@
+import threading
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import DatabaseError, OperationalError, connections
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.views import exception_handler
+
+from .metrics import record_db_timeout
+
+try:
+    from psycopg_pool import PoolTimeout
+except ImportError:  # pragma: no cover - optional dependency
+    PoolTimeout = None
+
+# SQLSTATE of a query cancelled by statement_timeout.
+QUERY_CANCELED = '57014'
+
+_lock = threading.Lock()
+_timeouts = {}
+
+
+class DatabaseBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'The server is busy. Please try again shortly.'
+    default_code = 'database_busy'
+
+    def __init__(self, detail=None, code=None):
+        super().__init__(detail, code)
+        self.wait = settings.DB_BUSY_RETRY_AFTER
+
+
+def timeout_kind(exc):
+    """'statement' or 'pool' if ``exc`` is a database timeout, else None."""
+    if not isinstance(exc, OperationalError):
+        return None
+    cause = exc.__cause__
+    if PoolTimeout is not None and isinstance(cause, PoolTimeout):
+        return 'pool'
+    if getattr(cause, 'sqlstate', None) == QUERY_CANCELED:
+        return 'statement'
+    return None
+
+
+def record_timeout(kind, view_name):
+    with _lock:
+        counts = _timeouts.setdefault(view_name, {'statement': 0, 'pool': 0})
+        counts[kind] += 1
+
+
+def database_exception_handler(exc, context):
+    """
+    DRF's exception handler, plus a 503 with Retry-After for queries
+    cancelled by statement_timeout and requests that found the connection
+    pool exhausted.
+    """
+    kind = timeout_kind(exc)
+    if kind is not None:
+        view = context.get('view')
+        record_timeout(kind, view.__class__.__name__ if view is not None else 'unknown')
+        record_db_timeout(kind)
+        exc = DatabaseBusy()
+    return exception_handler(exc, context)
+
+
+@contextmanager
+def statement_timeout(milliseconds):
+    """
+    Cancel PostgreSQL queries that run longer than ``milliseconds`` inside the
+    block, on every database (primary and replicas). No-op for other backends
+    and when ``milliseconds`` is falsy.
+
+    The timeout is set on a connection before its first query in the block
+    and reset to the server default (DB_STATEMENT_TIMEOUT) afterwards, so
+    pooled and persistent connections do not keep it.
+    """
+    if not milliseconds:
+        yield
+        return
+
+    applied = []
+
+    def set_timeout(execute, sql, params, many, context):
+        connection = context['connection']
+        if connection.vendor == 'postgresql' and connection not in applied:
+            context['cursor'].cursor.execute('SET statement_timeout = %d' % milliseconds)
+            applied.append(connection)
+        return execute(sql, params, many, context)
+
+    try:
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(set_timeout))
+            yield
+    finally:
+        for connection in applied:
+            if connection.connection is None or connection.needs_rollback:
+                continue
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute('SET statement_timeout TO DEFAULT')
+            except DatabaseError:
+                # A broken connection is discarded instead of reused.
+                connection.close()
+
+
+def database_stats():
+    """Snapshot of the connection pools and the database timeouts for this process."""
+    pools = {}
+    for alias in connections:
+        if not settings.DATABASES[alias].get('OPTIONS', {}).get('pool'):
+            continue
+        stats = connections[alias].pool.get_stats()
+        requests = stats.get('requests_num', 0)
+        pools[alias] = {
+            'size': stats.get('pool_size', 0),
+            'available': stats.get('pool_available', 0),
+            'waiting': stats.get('requests_waiting', 0),
+            'requests': requests,
+            'queued': stats.get('requests_queued', 0),
+            'avg_wait_ms': round(stats.get('requests_wait_ms', 0) / (requests or 1), 2),
+            'timeouts': stats.get('requests_errors', 0),
+        }
+
+    with _lock:
+        timeouts = {name: dict(counts) for name, counts in _timeouts.items()}
+
+    return {
+        'pools': pools,
+        'conn_max_age': settings.DATABASES['default'].get('CONN_MAX_AGE', 0),
+        'timeouts': timeouts,
+    }
@@ -0,0 +1,123 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+# Models always read from the primary, because they are read and written in
+# the same request and a stale read would misbehave (e.g. a lagging throttle
+# bucket makes DatabaseGCRAStore retry its insert).
+PRIMARY_MODELS = {'core.throttlebucket'}
+
+# Seconds of replay lag of a PostgreSQL standby; 0 when it has replayed
+# everything it received.
+POSTGRES_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+# None (the default, also outside requests): read from the primary.
+# True: this context may read from a replica.
+_replica_reads = ContextVar('replica_reads', default=None)
+
+_lock = threading.Lock()
+_lag = {}
+_checked_at = 0.0
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias in settings.DATABASE_REPLICAS]
+
+
+def measure_lag(alias):
+    """
+    Replication lag of replica ``alias`` in seconds, or None if it cannot be
+    queried. SQLite replicas (local testing) have no lag to measure.
+    """
+    connection = connections[alias]
+    try:
+        if connection.vendor != 'postgresql':
+            connection.ensure_connection()
+            return 0.0
+        with connection.cursor() as cursor:
+            cursor.execute(POSTGRES_LAG_SQL)
+            return float(cursor.fetchone()[0])
+    except DatabaseError:
+        return None
+
+
+def replica_lags(refresh=False):
+    """
+    Lag of every configured replica ({alias: seconds or None}), measured at
+    most every REPLICA_LAG_CHECK_INTERVAL seconds per process.
+    """
+    global _checked_at
+    now = time.monotonic()
+    if refresh or now - _checked_at >= settings.REPLICA_LAG_CHECK_INTERVAL:
+        with _lock:
+            if refresh or now - _checked_at >= settings.REPLICA_LAG_CHECK_INTERVAL:
+                _lag.update({alias: measure_lag(alias) for alias in replica_aliases()})
+                _checked_at = now
+    return dict(_lag)
+
+
+def healthy_replicas():
+    """Replicas that answer and lag at most REPLICA_MAX_LAG seconds."""
+    return [
+        alias for alias, lag in replica_lags().items()
+        if lag is not None and lag <= settings.REPLICA_MAX_LAG
+    ]
+
+
+def set_replica_reads(allowed):
+    """Allow or forbid replica reads for the rest of the current context (request)."""
+    _replica_reads.set(allowed or None)
+
+
+@contextmanager
+def primary_reads():
+    """Read from the primary inside the block, even where replica reads are allowed."""
+    token = _replica_reads.set(None)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Sends reads to a healthy replica where the current context allows it
+    (see ReplicaRoutingMiddleware) and everything else to ``default``.
+
+    Related objects of an instance read from a replica come from the same
+    replica. Reads stay on the primary inside transactions, for
+    PRIMARY_MODELS and when no replica is healthy. Migrations only run on
+    the primary; the replicas get the schema through replication.
+    """
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db in settings.DATABASE_REPLICAS:
+            return instance._state.db
+        if not _replica_reads.get() or model._meta.label_lower in PRIMARY_MODELS:
+            return 'default'
+        if connections['default'].in_atomic_block:
+            return 'default'
+        replicas = healthy_replicas()
+        return random.choice(replicas) if replicas else 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
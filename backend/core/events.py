@@ -0,0 +1,180 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from rest_framework.utils.encoders import JSONEncoder
+
+# Slow clients whose queue fills up are disconnected; EventSource reconnects
+# and starts again from a fresh snapshot.
+SUBSCRIBER_QUEUE_SIZE = 100
+
+# Most new contact messages pushed per change check.
+MESSAGE_BATCH_SIZE = 50
+
+_hubs = {}
+
+
+def _stat_labels():
+    from .stats import stat_sources
+    return [model._meta.label for model, _ in stat_sources()]
+
+
+def format_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, cls=JSONEncoder, separators=(',', ':'))}\n\n"
+
+
+class DashboardEventHub:
+    """
+    Fans dashboard changes out to every event stream open in this process.
+
+    One poller task per event loop checks the sum of the ContentVersion
+    counters of the dashboard models every DASHBOARD_EVENTS_POLL_INTERVAL
+    seconds, which picks up changes made by other workers. Saves in this
+    process wake the poller immediately. Only when the check sees a change
+    are the statistics and new messages read, once for all subscribers.
+    """
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.subscribers = set()
+        self.wakeup = asyncio.Event()
+        self.lock = asyncio.Lock()
+        self.task = None
+        self.marker = None
+        self.stats = None
+        self.last_message_id = None
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.subscribers.add(queue)
+        if self.task is None:
+            self.task = self.loop.create_task(self.run())
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+
+    def notify(self):
+        """Thread-safe: check for changes now instead of at the next poll."""
+        self.loop.call_soon_threadsafe(self.wakeup.set)
+
+    async def snapshot(self):
+        if self.stats is None:
+            await self.check()
+        return self.stats
+
+    async def run(self):
+        try:
+            while self.subscribers:
+                await self.check()
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), settings.DASHBOARD_EVENTS_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                self.wakeup.clear()
+        finally:
+            self.task = None
+            if not self.subscribers and _hubs.get(self.loop) is self:
+                del _hubs[self.loop]
+
+    async def check(self):
+        async with self.lock:
+            marker = await sync_to_async(self.read_marker)()
+            if marker == self.marker and self.stats is not None:
+                return
+            self.marker = marker
+            stats, messages = await sync_to_async(self.read_changes)()
+
+            previous, self.stats = self.stats, stats
+            if previous is not None:
+                deltas = {key: value - previous.get(key, 0) for key, value in stats.items() if value != previous.get(key)}
+                if deltas:
+                    self.broadcast('stats', {'counters': {key: stats[key] for key in deltas}, 'deltas': deltas})
+            for message in messages:
+                self.broadcast('message', message)
+
+    def read_marker(self):
+        from .versions import version_total
+        return version_total(_stat_labels())
+
+    def read_changes(self):
+        from django.contrib.auth import get_user_model
+        from .models import ContactMessage
+        from .stats import get_dashboard_stats
+
+        stats = dict(get_dashboard_stats(refresh=True))
+        stats['pending_staff_applicants'] = get_user_model().objects.filter(
+            is_staff_applicant=True, is_approved_staff=False
+        ).count()
+
+        messages = []
+        if self.last_message_id is None:
+            self.last_message_id = ContactMessage.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        else:
+            messages = list(
+                ContactMessage.objects.filter(id__gt=self.last_message_id).order_by('id')
+                .values('id', 'name', 'email', 'subject', 'created_at')[:MESSAGE_BATCH_SIZE]
+            )
+            if messages:
+                self.last_message_id = messages[-1]['id']
+        return stats, messages
+
+    def broadcast(self, event, data):
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait((event, data))
+            except asyncio.QueueFull:
+                self.subscribers.discard(queue)
+                queue.get_nowait()
+                queue.put_nowait(None)
+
+
+def get_hub():
+    """The hub of the running event loop (one per ASGI worker)."""
+    loop = asyncio.get_running_loop()
+    if loop not in _hubs:
+        _hubs[loop] = DashboardEventHub(loop)
+    return _hubs[loop]
+
+
+def notify_hubs():
+    for loop, hub in list(_hubs.items()):
+        if loop.is_closed():
+            _hubs.pop(loop, None)
+        else:
+            hub.notify()
+
+
+def _changed(sender, raw=False, update_fields=None, **kwargs):
+    from .versions import is_versioned_save
+    if not raw and _hubs and is_versioned_save(sender._meta.label, update_fields):
+        transaction.on_commit(notify_hubs)
+
+
+def connect_events():
+    from .stats import stat_sources
+    for model, _ in stat_sources():
+        uid = f'dashboard_events_{model._meta.label_lower}'
+        post_save.connect(_changed, sender=model, dispatch_uid=uid)
+        post_delete.connect(_changed, sender=model, dispatch_uid=uid)
+
+
+async def event_stream(hub, queue):
+    """Server-sent events for one client: a snapshot, then changes and keepalives."""
+    try:
+        yield 'retry: 5000\n\n'
+        yield format_event('snapshot', await hub.snapshot())
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), settings.DASHBOARD_EVENTS_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            if item is None:
+                break
+            yield format_event(*item)
+    finally:
+        hub.unsubscribe(queue)
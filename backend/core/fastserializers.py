@@ -0,0 +1,179 @@
+from asgiref.sync import sync_to_async
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db import models
+from django.utils.encoding import iri_to_uri
+from django.utils.module_loading import autodiscover_modules
+from rest_framework import serializers
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.settings import api_settings
+
+from .timing import phase
+
+_registry = []
+
+
+def registered_fast_serializers():
+    """Every FastReadSerializer subclass with a serializer_class, in definition order."""
+    autodiscover_modules('serializers')
+    return list(_registry)
+
+
+class FastReadSerializer:
+    """
+    Read-only list serializer that builds responses from ``.values()`` rows.
+
+    It is compiled from an existing ModelSerializer (``serializer_class``)
+    and produces the same output: field order, formatting and media URLs.
+    Instead of building a model instance and walking the DRF fields for
+    every row, the fields are resolved once into (key, column, converter)
+    accessors and applied to plain dicts.
+
+    Supported fields are model columns, forward foreign keys shown as a
+    primary key, dotted sources through foreign keys (``book.title``) and
+    file fields. Anything else (method fields, nested serializers) must be
+    resolved in bulk by a ``resolve_<field>(rows)`` method returning one
+    value per row. The parity tests in core/tests.py and library/tests.py
+    compare the output with the original serializer.
+    """
+    serializer_class = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.serializer_class is not None:
+            _registry.append(cls)
+
+    def __init__(self, context=None):
+        self.context = context or {}
+        self.model = self.serializer_class.Meta.model
+        self.pk_name = self.model._meta.pk.attname
+        self.request = self.context.get('request')
+        self.accessors = self.compile()
+
+    def compile(self):
+        # Instantiated with the context so sparse fieldsets apply here too.
+        serializer = self.serializer_class(context=self.context)
+        accessors = []
+        for field in serializer._readable_fields:
+            resolver = getattr(self, f'resolve_{field.field_name}', None)
+            if resolver is not None:
+                accessors.append((field.field_name, None, resolver, False))
+            else:
+                accessors.append((field.field_name, *self.compile_field(field)))
+        return accessors
+
+    def compile_field(self, field):
+        """
+        Returns:
+            tuple: (column, converter, skip_if_none)
+        """
+        attrs = field.source_attrs
+        if not attrs or any(not attr.isidentifier() for attr in attrs):
+            raise ImproperlyConfigured(
+                f"{type(self).__name__} cannot read '{field.field_name}' from .values(); "
+                f"define resolve_{field.field_name}(rows)."
+            )
+        model_fields = self.get_model_fields(attrs)
+        column = '__'.join(attrs)
+        # DRF skips a field whose path crosses a null foreign key, unless the
+        # field allows null.
+        skip_if_none = not field.allow_null and any(f.is_relation and f.null for f in model_fields[:-1])
+
+        if isinstance(field, PrimaryKeyRelatedField) and field.pk_field is None:
+            return column, self.identity, skip_if_none
+        if isinstance(field, (serializers.RelatedField, serializers.BaseSerializer)):
+            raise ImproperlyConfigured(
+                f"{type(self).__name__} cannot render relation '{field.field_name}'; "
+                f"define resolve_{field.field_name}(rows)."
+            )
+        if isinstance(field, serializers.FileField):
+            return column, self.file_url(model_fields[-1], field), skip_if_none
+        return column, field.to_representation, skip_if_none
+
+    def get_model_fields(self, attrs):
+        model = self.model
+        model_fields = []
+        for attr in attrs:
+            try:
+                model_field = model._meta.get_field(attr)
+            except FieldDoesNotExist:
+                raise ImproperlyConfigured(
+                    f"{type(self).__name__}: '{'.'.join(attrs)}' is not a model field path."
+                )
+            if model_field.many_to_many or model_field.one_to_many:
+                raise ImproperlyConfigured(
+                    f"{type(self).__name__}: '{'.'.join(attrs)}' crosses a to-many relation."
+                )
+            if model_field.is_relation:
+                model = model_field.related_model
+            model_fields.append(model_field)
+        return model_fields
+
+    @staticmethod
+    def identity(value):
+        return value
+
+    def file_url(self, model_field, field):
+        """Same result as DRF's FileField.to_representation, from the stored name."""
+        if not isinstance(model_field, models.FileField):
+            return field.to_representation
+        if not getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL):
+            return self.identity
+        storage = model_field.storage
+        request = self.request
+        base = request.build_absolute_uri('/')[:-1] if request is not None else None
+
+        def converter(name):
+            if not name:
+                return None
+            url = storage.url(name)
+            if request is None:
+                return url
+            if url.startswith('/') and not url.startswith('//'):
+                return iri_to_uri(base + url)
+            return request.build_absolute_uri(url)
+        return converter
+
+    def values(self, queryset, extra=()):
+        """``queryset.values()`` with every column the accessors read."""
+        columns = {self.pk_name}
+        columns.update(column for _, column, _, _ in self.accessors if column)
+        columns.update(extra)
+        return queryset.values(*columns)
+
+    def serialize(self, rows):
+        with phase('serialize'):
+            rows = list(rows)
+            resolved = {
+                key: convert(rows)
+                for key, column, convert, _ in self.accessors if column is None
+            }
+            return self.build(rows, resolved)
+
+    async def aserialize(self, rows):
+        """
+        serialize() for async views. Resolvers run as ``aresolve_<field>``
+        when defined (async ORM), otherwise in a thread.
+        """
+        with phase('serialize'):
+            resolved = {}
+            for key, column, convert, _ in self.accessors:
+                if column is None:
+                    async_resolver = getattr(self, f'aresolve_{key}', None)
+                    resolved[key] = await (async_resolver(rows) if async_resolver else sync_to_async(convert)(rows))
+            return self.build(rows, resolved)
+
+    def build(self, rows, resolved):
+        data = []
+        for index, row in enumerate(rows):
+            item = {}
+            for key, column, convert, skip_if_none in self.accessors:
+                if column is None:
+                    item[key] = resolved[key][index]
+                    continue
+                value = row[column]
+                if value is not None:
+                    item[key] = convert(value)
+                elif not skip_if_none:
+                    item[key] = None
+            data.append(item)
+        return data
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+from .metrics import observe_outbound
+
+
+class MetricsEmailBackend(BaseEmailBackend):
+    """
+    Sends through EMAIL_DELIVERY_BACKEND (SMTP by default) and records the
+    latency of each delivery in the outbound call metrics.
+    """
+
+    def __init__(self, fail_silently=False, **kwargs):
+        super().__init__(fail_silently=fail_silently)
+        self.backend = get_connection(settings.EMAIL_DELIVERY_BACKEND, fail_silently=fail_silently, **kwargs)
+
+    def open(self):
+        return self.backend.open()
+
+    def close(self):
+        return self.backend.close()
+
+    def send_messages(self, email_messages):
+        with observe_outbound('smtp') as call:
+            sent = self.backend.send_messages(email_messages)
+            # With fail_silently the backend swallows errors and sends fewer.
+            call.failed = bool(email_messages) and (sent or 0) < len(email_messages)
+        return sent
@@ -0,0 +1,84 @@
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.urls import Resolver404, resolve
+from rest_framework.renderers import JSONRenderer
+
+from core.middleware import BrotliCompressor, GzipCompressor, brotli
+from core.renderers import FastJSONRenderer, orjson
+
+DEFAULT_PATHS = [
+    '/api/blog/posts/?page_size=100',
+    '/api/library/books/?page_size=10000',
+    '/api/core/notices/?page_size=100',
+    '/api/health/camps/?page_size=100',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Render public API endpoints and compare the stdlib and fast JSON "
+        "renderers, and gzip/brotli payload size and CPU time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', action='append', dest='paths',
+            help='Endpoint to benchmark, with query string. Can be repeated. '
+                 'Defaults to the main public lists.',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Runs per measurement; the best run is reported (default: 5).',
+        )
+
+    def _best(self, func, repeat):
+        best, result = None, None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best * 1000, result
+
+    def _compress(self, compressor_class, body):
+        compressor = compressor_class()
+        return compressor.compress(body) + compressor.finish()
+
+    def handle(self, *args, **options):
+        repeat = max(1, options['repeat'])
+        host = next((h.lstrip('.') for h in settings.ALLOWED_HOSTS if h != '*'), 'localhost')
+        factory = RequestFactory(HTTP_HOST=host)
+
+        if orjson is None:
+            self.stdout.write(self.style.WARNING("orjson is not installed; the fast renderer falls back to stdlib json."))
+        if brotli is None:
+            self.stdout.write(self.style.WARNING("brotli is not installed; only gzip is measured."))
+
+        for path in options['paths'] or DEFAULT_PATHS:
+            try:
+                match = resolve(urlsplit(path).path)
+            except Resolver404:
+                raise CommandError(f"No view for {path}")
+            response = match.func(factory.get(path), *match.args, **match.kwargs)
+            if response.status_code != 200 or not hasattr(response, 'data'):
+                self.stdout.write(self.style.WARNING(f"{path}: HTTP {response.status_code}, skipped"))
+                continue
+
+            stdlib_ms, body = self._best(lambda: JSONRenderer().render(response.data), repeat)
+            fast_ms, fast_body = self._best(lambda: FastJSONRenderer().render(response.data), repeat)
+            if fast_body != body:
+                self.stdout.write(self.style.ERROR(f"{path}: fast renderer output differs from stdlib"))
+
+            self.stdout.write(f"{path}")
+            self.stdout.write(f"  json: {len(body):,} bytes, stdlib {stdlib_ms:.2f} ms, fast {fast_ms:.2f} ms")
+            compressors = [GzipCompressor] + ([BrotliCompressor] if brotli is not None else [])
+            for compressor_class in compressors:
+                ms, compressed = self._best(lambda: self._compress(compressor_class, body), repeat)
+                ratio = len(compressed) / len(body) if body else 0
+                self.stdout.write(
+                    f"  {compressor_class.encoding}: {len(compressed):,} bytes ({ratio:.0%}), {ms:.2f} ms"
+                )
@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.fastserializers import registered_fast_serializers
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare list serialization throughput of the DRF ModelSerializers and "
+        "their FastReadSerializer counterparts, query included."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, default=1000,
+            help='Rows serialized per run (default: 1000).',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Runs per serializer; the best run is reported (default: 5).',
+        )
+
+    def _best(self, func, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def handle(self, *args, **options):
+        repeat = max(1, options['repeat'])
+        # No request: media fields are rendered as relative URLs by both.
+        context = {}
+
+        for fast_class in registered_fast_serializers():
+            serializer_class = fast_class.serializer_class
+            queryset = serializer_class.Meta.model._default_manager.order_by('-pk')[:options['rows']]
+            rows = queryset.count()
+            if not rows:
+                self.stdout.write(f"{fast_class.__name__}: no rows, skipped")
+                continue
+
+            def drf():
+                return serializer_class(queryset.all(), many=True, context=context).data
+
+            def fast():
+                serializer = fast_class(context=context)
+                return serializer.serialize(serializer.values(queryset.all()))
+
+            drf_time = self._best(drf, repeat)
+            fast_time = self._best(fast, repeat)
+            self.stdout.write(
+                f"{fast_class.__name__} ({rows} rows): "
+                f"drf {rows / drf_time:,.0f} rows/s, "
+                f"fast {rows / fast_time:,.0f} rows/s, "
+                f"{drf_time / fast_time:.1f}x"
+            )
@@ -0,0 +1,141 @@
+import asyncio
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None
+
+DEFAULT_PATHS = [
+    '/api/core/notices/',
+    '/api/library/books/',
+    '/api/health/camps/',
+    '/api/blog/posts/',
+]
+
+
+def process_tree(pid):
+    """``pid`` and all its descendants (gunicorn master and workers)."""
+    pids, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        pids.append(current)
+        try:
+            for task in os.listdir(f'/proc/{current}/task'):
+                with open(f'/proc/{current}/task/{task}/children') as f:
+                    pending.extend(int(child) for child in f.read().split())
+        except OSError:
+            continue
+    return pids
+
+
+def rss_bytes(pid):
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test a running server and report throughput, latency and the "
+        "memory of its processes. Run it once against gunicorn sync workers "
+        "and once against an ASGI worker (gunicorn -k uvicorn.workers."
+        "UvicornWorker, with the /api/async/ paths) sized to the same RSS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000', help='Server to load.')
+        parser.add_argument(
+            '--path', action='append', dest='paths',
+            help='Endpoint to request, cycled through by every client. Can be '
+                 'repeated. Defaults to the main public lists.',
+        )
+        parser.add_argument(
+            '--prefix', default='',
+            help="Prepended to every path after /api, e.g. 'async' for /api/async/...",
+        )
+        parser.add_argument('--concurrency', type=int, default=50, help='Concurrent clients (default: 50).')
+        parser.add_argument('--duration', type=float, default=15, help='Seconds to run (default: 15).')
+        parser.add_argument(
+            '--pid', type=int, action='append', dest='pids', default=[],
+            help='Server master PID; its RSS and its workers\' is summed. Can be repeated.',
+        )
+
+    def handle(self, *args, **options):
+        if httpx is None:
+            raise CommandError("httpx is required: pip install httpx")
+
+        paths = options['paths'] or DEFAULT_PATHS
+        if options['prefix']:
+            prefix = options['prefix'].strip('/')
+            paths = [p.replace('/api/', f'/api/{prefix}/', 1) for p in paths]
+
+        latencies, statuses, peak_rss = asyncio.run(self.load(
+            options['base_url'], paths, max(1, options['concurrency']), options['duration'], options['pids'],
+        ))
+
+        total = len(latencies)
+        errors = sum(1 for code in statuses if code >= 400 or code == 0)
+        latencies.sort()
+        self.stdout.write(f"requests: {total:,} ({total / options['duration']:.1f}/s), errors: {errors:,}")
+        self.stdout.write(
+            "latency ms: p50 %.1f, p95 %.1f, p99 %.1f, max %.1f" % tuple(
+                1000 * value for value in (
+                    percentile(latencies, 0.50), percentile(latencies, 0.95),
+                    percentile(latencies, 0.99), latencies[-1] if latencies else 0,
+                )
+            )
+        )
+        if options['pids']:
+            self.stdout.write(f"peak server RSS: {peak_rss / 1024 / 1024:.1f} MiB")
+            if peak_rss:
+                self.stdout.write(f"requests/s per GiB: {total / options['duration'] / (peak_rss / 1024 ** 3):.1f}")
+
+    async def load(self, base_url, paths, concurrency, duration, pids):
+        latencies, statuses = [], []
+        peak_rss = 0
+        deadline = time.monotonic() + duration
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+            async def worker(offset):
+                i = offset
+                while time.monotonic() < deadline:
+                    started = time.perf_counter()
+                    try:
+                        response = await client.get(paths[i % len(paths)])
+                        await response.aread()
+                        code = response.status_code
+                    except httpx.HTTPError:
+                        code = 0
+                    latencies.append(time.perf_counter() - started)
+                    statuses.append(code)
+                    i += 1
+
+            async def sample_memory():
+                nonlocal peak_rss
+                while time.monotonic() < deadline:
+                    total = sum(rss_bytes(pid) for root in pids for pid in process_tree(root))
+                    peak_rss = max(peak_rss, total)
+                    await asyncio.sleep(0.5)
+
+            tasks = [worker(n) for n in range(concurrency)]
+            if pids:
+                tasks.append(sample_memory())
+            await asyncio.gather(*tasks)
+
+        return latencies, statuses, peak_rss
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.storage import S3_DELETE_BATCH_SIZE, drain_pending_deletions
+
+
+class Command(BaseCommand):
+    help = "Delete files queued in PendingDeletion using batched storage deletes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=S3_DELETE_BATCH_SIZE,
+            help=f'Files deleted per storage call (default: {S3_DELETE_BATCH_SIZE}).',
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep running as a worker, polling for new deletions.',
+        )
+        parser.add_argument(
+            '--interval', type=int, default=30,
+            help='Seconds to sleep when the queue is empty in --loop mode (default: 30).',
+        )
+
+    def handle(self, *args, **options):
+        total_deleted = total_failed = 0
+
+        while True:
+            deleted, failed = drain_pending_deletions(batch_size=options['batch_size'])
+            total_deleted += deleted
+            total_failed += failed
+
+            if deleted or failed:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {total_deleted} files ({total_failed} failed attempts)."
+        ))
@@ -0,0 +1,121 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from core.media import UnsortedListing, ensure_sorted, iter_storage_files, referenced_among, referenced_paths
+
+# Root-level file names looked up per query.
+ROOT_LOOKUP_CHUNK_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = (
+        "Find files in media storage that no FileField/ImageField references "
+        "and report (default) or delete them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--delete', action='store_true',
+            help='Delete orphaned files instead of only reporting them. With the '
+                 'deferred-delete storages the files are queued for '
+                 'drain_storage_deletions.',
+        )
+        parser.add_argument(
+            '--grace-hours', type=int, default=24,
+            help='Ignore files modified more recently than this (default: 24). '
+                 'Protects uploads whose transaction has not committed yet.',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Number of storage prefixes scanned in parallel (default: 4). '
+                 'With 1, prefixes are scanned one after another in this thread.',
+        )
+        parser.add_argument(
+            '--prefix', action='append', dest='prefixes',
+            help='Only scan this top-level prefix (e.g. "blog"). Can be repeated.',
+        )
+
+    def handle(self, *args, **options):
+        self.delete = options['delete']
+        self.verbosity = options['verbosity']
+        self.cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+        self.lock = threading.Lock()
+
+        directories, root_files = default_storage.listdir('')
+        prefixes = options['prefixes'] or directories
+
+        totals = {'scanned': 0, 'orphans': 0, 'bytes': 0}
+
+        if not options['prefixes']:
+            self._merge(totals, self._scan_root(root_files))
+
+        try:
+            if options['workers'] <= 1:
+                for prefix in prefixes:
+                    self._merge(totals, self._scan_prefix(prefix))
+            else:
+                with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+                    futures = [executor.submit(self._scan_prefix_in_thread, prefix) for prefix in prefixes]
+                    for future in as_completed(futures):
+                        self._merge(totals, future.result())
+        except UnsortedListing as e:
+            raise CommandError(f"Stopped before deleting referenced files: {e}")
+
+        action = 'Deleted' if self.delete else 'Found'
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {totals['scanned']} files: {action} {totals['orphans']} orphans "
+            f"({totals['bytes'] / (1024 * 1024):.1f} MB)."
+        ))
+
+    def _scan_prefix_in_thread(self, prefix):
+        try:
+            return self._scan_prefix(prefix)
+        finally:
+            connection.close()
+
+    def _scan_prefix(self, prefix):
+        # Both listings are sorted, so they are merged like two sorted
+        # files: only the current name of each is held in memory.
+        referenced = referenced_paths(prefix)
+        next_referenced = next(referenced, None)
+        stats = {'scanned': 0, 'orphans': 0, 'bytes': 0}
+        for name, size, modified in ensure_sorted(iter_storage_files(default_storage, prefix), 'storage names'):
+            stats['scanned'] += 1
+            while next_referenced is not None and next_referenced < name:
+                next_referenced = next(referenced, None)
+            if name == next_referenced or modified > self.cutoff:
+                continue
+            self._handle_orphan(name, size, stats)
+        return stats
+
+    def _scan_root(self, root_files):
+        stats = {'scanned': 0, 'orphans': 0, 'bytes': 0}
+        for start in range(0, len(root_files), ROOT_LOOKUP_CHUNK_SIZE):
+            chunk = root_files[start:start + ROOT_LOOKUP_CHUNK_SIZE]
+            referenced = referenced_among(chunk)
+            for name in chunk:
+                stats['scanned'] += 1
+                if name in referenced or default_storage.get_modified_time(name) > self.cutoff:
+                    continue
+                self._handle_orphan(name, default_storage.size(name), stats)
+        return stats
+
+    def _handle_orphan(self, name, size, stats):
+        stats['orphans'] += 1
+        stats['bytes'] += size or 0
+        if self.delete:
+            default_storage.delete(name)
+        if self.verbosity > 1 or not self.delete:
+            with self.lock:
+                self.stdout.write(f"{'deleted' if self.delete else 'orphan'}: {name}")
+
+    @staticmethod
+    def _merge(totals, stats):
+        for key, value in stats.items():
+            totals[key] += value
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.sync import prune_change_log
+
+
+class Command(BaseCommand):
+    help = "Delete /api/sync/ change log entries older than the retention period."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=None,
+            help='Keep this many days of history (default: SYNC_CHANGE_LOG_RETENTION_DAYS).',
+        )
+
+    def handle(self, *args, **options):
+        days = options['days'] if options['days'] is not None else settings.SYNC_CHANGE_LOG_RETENTION_DAYS
+        deleted = prune_change_log(days)
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} change log entries older than {days} days."))
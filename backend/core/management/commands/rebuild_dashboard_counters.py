@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from core.stats import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = "Recompute the DashboardCounter rows used by DASHBOARD_STATS_MODE='counters'."
+
+    def handle(self, *args, **options):
+        stats = rebuild_counters()
+        for key, value in stats.items():
+            self.stdout.write(f"{key}: {value}")
+        self.stdout.write(self.style.SUCCESS("Dashboard counters rebuilt."))
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.db_router import replica_lags
+
+
+class Command(BaseCommand):
+    help = "Show the replication lag of each read replica and whether it gets reads."
+
+    def handle(self, *args, **options):
+        lags = replica_lags(refresh=True)
+        if not lags:
+            self.stdout.write("No read replicas configured (DB_REPLICA_HOSTS / DB_REPLICA_SQLITE).")
+            return
+
+        for alias, lag in lags.items():
+            if lag is None:
+                self.stdout.write(self.style.ERROR(f"{alias}: unreachable, ejected"))
+            elif lag > settings.REPLICA_MAX_LAG:
+                self.stdout.write(self.style.WARNING(
+                    f"{alias}: {lag:.1f}s behind (max {settings.REPLICA_MAX_LAG:g}s), ejected"
+                ))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"{alias}: {lag:.1f}s behind, serving reads"))
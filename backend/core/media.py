@@ -0,0 +1,148 @@
+import heapq
+import os
+import posixpath
+from datetime import datetime, timezone as dt_timezone
+
+from django.apps import apps
+from django.db import connections, models
+from django.db.models.functions import Collate
+
+# Collations that compare strings by code point, matching the key order of
+# S3 listings and of iter_storage_files.
+BINARY_COLLATIONS = {
+    'postgresql': 'C',
+    'sqlite': 'BINARY',
+    'mysql': 'utf8mb4_bin',
+}
+
+
+class UnsortedListing(Exception):
+    """A listing that must be sorted for a merge was not."""
+
+
+def file_fields():
+    """
+    Yield (model, field_name) for every FileField/ImageField on an installed,
+    concrete model.
+    """
+    for model in apps.get_models():
+        if model._meta.proxy or not model._meta.managed:
+            continue
+        for field in model._meta.concrete_fields:
+            if isinstance(field, models.FileField):
+                yield model, field.name
+
+
+def referenced_paths(prefix=''):
+    """
+    Stream the storage names referenced by any file field under ``prefix``,
+    in sorted order and without duplicates.
+
+    Each field is read with ``values_list().iterator()`` ordered by a binary
+    collation, the order S3 lists keys in, and the streams are merged, so
+    memory does not grow with the number of files under the prefix. Raises
+    UnsortedListing if the database returns names out of order.
+    """
+    streams = []
+    for model, name in file_fields():
+        queryset = model._default_manager.exclude(**{name: ''}).exclude(**{f'{name}__isnull': True})
+        if prefix:
+            queryset = queryset.filter(**{f'{name}__startswith': prefix.rstrip('/') + '/'})
+        collation = BINARY_COLLATIONS.get(connections[queryset.db].vendor)
+        ordering = Collate(name, collation) if collation else name
+        streams.append(queryset.order_by(ordering).values_list(name, flat=True).iterator(chunk_size=2000))
+
+    previous = None
+    for path in ensure_sorted(heapq.merge(*streams), 'referenced names'):
+        if path != previous:
+            yield path
+        previous = path
+
+
+def referenced_among(names):
+    """Return the subset of ``names`` referenced by any file field, with one query per field."""
+    referenced = set()
+    for model, name in file_fields():
+        referenced.update(model._default_manager.filter(**{f'{name}__in': names}).values_list(name, flat=True))
+    return referenced
+
+
+def ensure_sorted(names, source):
+    """
+    Pass ``names`` through, raising UnsortedListing if one is smaller than
+    the name before it. Items may be tuples whose first element is the name.
+    """
+    previous = None
+    for item in names:
+        name = item[0] if isinstance(item, tuple) else item
+        if previous is not None and name < previous:
+            raise UnsortedListing(f"{source} are not sorted: {name!r} after {previous!r}")
+        previous = name
+        yield item
+
+
+def iter_storage_files(storage, prefix=''):
+    """
+    Stream the files stored under ``prefix``.
+
+    Yields (name, size, modified) tuples in name order, where ``name`` is
+    the storage name (as saved in a FileField) and ``modified`` is an aware
+    UTC datetime. S3 buckets are paged through the list API, which returns
+    keys sorted; local storage is walked with ``os.scandir``, sorting one
+    directory at a time. Neither builds the full listing in memory.
+    """
+    if hasattr(storage, 'bucket'):
+        yield from _iter_s3_files(storage, prefix)
+        return
+
+    try:
+        root = storage.path(prefix)
+    except NotImplementedError:
+        yield from _iter_listdir_files(storage, prefix)
+        return
+
+    if os.path.isdir(root):
+        yield from _iter_local_files(root, prefix)
+
+
+def _iter_s3_files(storage, prefix):
+    location = storage.location.strip('/')
+    key_prefix = posixpath.join(location, prefix) if location else prefix
+    if key_prefix and not key_prefix.endswith('/'):
+        key_prefix += '/'
+    strip = len(location) + 1 if location else 0
+
+    for obj in storage.bucket.objects.filter(Prefix=key_prefix):
+        if obj.key.endswith('/'):
+            continue
+        yield obj.key[strip:], obj.size, obj.last_modified
+
+
+def _iter_local_files(root, prefix):
+    with os.scandir(root) as entries:
+        entries = sorted(entries, key=_entry_sort_key)
+    for entry in entries:
+        name = posixpath.join(prefix, entry.name) if prefix else entry.name
+        if entry.is_dir(follow_symlinks=False):
+            yield from _iter_local_files(entry.path, name)
+        elif entry.is_file(follow_symlinks=False):
+            stat = entry.stat()
+            modified = datetime.fromtimestamp(stat.st_mtime, tz=dt_timezone.utc)
+            yield name, stat.st_size, modified
+
+
+def _entry_sort_key(entry):
+    # Every name inside directory "a" starts with "a/", so comparing "a/"
+    # keeps the walk in full-name order ("a-1.txt" < "a/x" < "a0.txt").
+    return entry.name + '/' if entry.is_dir(follow_symlinks=False) else entry.name
+
+
+def _iter_listdir_files(storage, prefix):
+    directories, files = storage.listdir(prefix)
+    entries = sorted([(filename, False) for filename in files] + [(directory + '/', True) for directory in directories])
+    for entry, is_dir in entries:
+        name = posixpath.join(prefix, entry.rstrip('/')) if prefix else entry.rstrip('/')
+        if is_dir:
+            yield from _iter_listdir_files(storage, name)
+        else:
+            yield name, storage.size(name), storage.get_modified_time(name)
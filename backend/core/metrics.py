@@ -0,0 +1,114 @@
+import hmac
+import os
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+try:
+    import prometheus_client
+    from prometheus_client import CollectorRegistry, Counter, Histogram, multiprocess
+except ImportError:  # pragma: no cover - optional dependency
+    prometheus_client = None
+
+# Latency buckets in seconds, from cached 304s to slow exports.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+OUTBOUND_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10)
+
+if prometheus_client is not None:
+    # With PROMETHEUS_MULTIPROC_DIR set, prometheus_client keeps the values in
+    # files in that directory, one per worker, and metrics_view sums them.
+    REQUEST_LATENCY = Histogram(
+        'http_request_duration_seconds', 'Request latency by URL name.',
+        ['route', 'method'], buckets=LATENCY_BUCKETS,
+    )
+    REQUESTS = Counter('http_requests', 'Responses by URL name and status.', ['route', 'method', 'status'])
+    RESPONSE_SIZE = Histogram(
+        'http_response_size_bytes', 'Response body size (as sent, after compression).',
+        ['route'], buckets=SIZE_BUCKETS,
+    )
+    THROTTLED = Counter('throttle_rejections', 'Requests rejected by a throttle.', ['scope'])
+    CACHE_REQUESTS = Counter('cache_requests', 'Cache lookups by cache and result.', ['cache', 'result'])
+    OUTBOUND_LATENCY = Histogram(
+        'outbound_request_duration_seconds', 'Latency of calls to external services.',
+        ['service', 'outcome'], buckets=OUTBOUND_BUCKETS,
+    )
+    DB_TIMEOUTS = Counter('db_timeouts', 'Statement and connection pool timeouts.', ['kind'])
+
+
+def route_name(request):
+    """The resolved URL name ('book-list', 'token_obtain_pair'), for labels."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unmatched>'
+    return match.url_name or match.route or '<unnamed>'
+
+
+def observe_request(request, response, duration):
+    if prometheus_client is None:
+        return
+    route = route_name(request)
+    REQUEST_LATENCY.labels(route, request.method).observe(duration)
+    REQUESTS.labels(route, request.method, str(response.status_code)).inc()
+    if not response.streaming:
+        RESPONSE_SIZE.labels(route).observe(len(response.content))
+
+
+def record_throttle(scope):
+    if prometheus_client is not None:
+        THROTTLED.labels(scope).inc()
+
+
+def record_cache(name, hit):
+    if prometheus_client is not None:
+        CACHE_REQUESTS.labels(name, 'hit' if hit else 'miss').inc()
+
+
+def record_db_timeout(kind):
+    if prometheus_client is not None:
+        DB_TIMEOUTS.labels(kind).inc()
+
+
+class OutboundCall:
+    """Yielded by observe_outbound; set ``failed`` for failures reported without an exception."""
+    failed = False
+
+
+@contextmanager
+def observe_outbound(service):
+    """Time a call to ``service`` ('recaptcha', 'smtp'); exceptions count as errors."""
+    started = time.perf_counter()
+    call = OutboundCall()
+    outcome = 'error'
+    try:
+        yield call
+        if not call.failed:
+            outcome = 'ok'
+    finally:
+        if prometheus_client is not None:
+            OUTBOUND_LATENCY.labels(service, outcome).observe(time.perf_counter() - started)
+
+
+def metrics_view(request):
+    """
+    Metrics in the Prometheus text format, summed over all workers in
+    multiprocess mode. Requires ``Authorization: Bearer <METRICS_TOKEN>``;
+    without a token it is only served in DEBUG.
+    """
+    if prometheus_client is None:
+        raise Http404
+    if settings.METRICS_TOKEN:
+        expected = f'Bearer {settings.METRICS_TOKEN}'
+        if not hmac.compare_digest(request.headers.get('Authorization', '').encode(), expected.encode()):
+            return HttpResponse('Unauthorized', status=401, content_type='text/plain')
+    elif not settings.DEBUG:
+        raise Http404
+
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return HttpResponse(prometheus_client.generate_latest(registry), content_type=prometheus_client.CONTENT_TYPE_LATEST)
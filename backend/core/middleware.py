@@ -0,0 +1,329 @@
+import random
+import time
+import zlib
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.regex_helper import _lazy_re_compile
+
+from .db_router import set_replica_reads
+from .metrics import observe_request
+from .profiling import (
+    finish_profile, is_staff_user, profiling_user, record_slow_request, requested_profile, start_profile,
+)
+from .timing import log_request_timing, start_request_timing, stop_request_timing
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+# API payloads and static assets only. HTML is left alone: the admin pages
+# carry CSRF tokens next to reflected input, which compression would expose
+# to BREACH, and unlike GZipMiddleware there is no length masking here.
+COMPRESSIBLE_TYPES = (
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+    'text/css',
+    'text/javascript',
+)
+
+# Never buffered: each event has to reach the client as soon as it is sent.
+UNCOMPRESSED_TYPES = ('text/event-stream',)
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Streaming responses are flushed to the client whenever this much
+# uncompressed data has gone into the compressor, and at the end.
+STREAM_FLUSH_BYTES = 64 * 1024
+
+re_accepts = _lazy_re_compile(r'^\s*([^\s;]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*$')
+
+
+def accepted_encodings(header):
+    """Encodings from an Accept-Encoding header, without the ones sent with q=0."""
+    accepted = set()
+    for part in header.split(','):
+        match = re_accepts.match(part)
+        if not match:
+            continue
+        try:
+            quality = float(match.group(2)) if match.group(2) else 1.0
+        except ValueError:
+            continue
+        if quality > 0:
+            accepted.add(match.group(1).lower())
+    return accepted
+
+
+class GzipCompressor:
+    encoding = 'gzip'
+
+    def __init__(self):
+        # wbits 16 + 15 writes a gzip header and trailer.
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliCompressor:
+    encoding = 'br'
+
+    def __init__(self):
+        self._compressor = brotli.Compressor(mode=brotli.MODE_TEXT, quality=BROTLI_QUALITY)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+def compress_stream(chunks, compressor):
+    pending = 0
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+        data = compressor.compress(chunk)
+        pending += len(chunk)
+        if pending >= STREAM_FLUSH_BYTES:
+            data += compressor.flush()
+            pending = 0
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def compress_async_stream(chunks, compressor):
+    pending = 0
+    async for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+        data = compressor.compress(chunk)
+        pending += len(chunk)
+        if pending >= STREAM_FLUSH_BYTES:
+            data += compressor.flush()
+            pending = 0
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Compresses API and asset responses (JSON, NDJSON, CSS, ...) with brotli
+    when the client accepts it and the ``brotli`` package is installed,
+    otherwise gzip. HTML is not compressed (see COMPRESSIBLE_TYPES).
+
+    Responses smaller than COMPRESSION_MIN_SIZE bytes are sent as they are.
+    Streaming responses (NDJSON exports) are compressed incrementally.
+    Replaces django.middleware.gzip.GZipMiddleware; do not use both.
+    """
+
+    def get_compressor(self, request):
+        accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if brotli is not None and 'br' in accepted:
+            return BrotliCompressor()
+        if 'gzip' in accepted:
+            return GzipCompressor()
+        return None
+
+    def is_compressible(self, response):
+        if response.has_header('Content-Encoding'):
+            return False
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type.startswith(UNCOMPRESSED_TYPES):
+            return False
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    def process_response(self, request, response):
+        if not self.is_compressible(response):
+            return response
+
+        # The response varies on Accept-Encoding even when this client
+        # gets it uncompressed.
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        compressor = self.get_compressor(request)
+        if compressor is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = compress_async_stream(response.streaming_content, compressor)
+            else:
+                response.streaming_content = compress_stream(response.streaming_content, compressor)
+            # The compressed length is not known in advance.
+            del response.headers['Content-Length']
+        else:
+            compressed = compressor.compress(response.content) + compressor.finish()
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # A strong ETag describes the uncompressed bytes; the compressed
+        # body is only semantically equivalent.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+
+        response.headers['Content-Encoding'] = compressor.encoding
+        return response
+
+
+class ReplicaRoutingMiddleware(MiddlewareMixin):
+    """
+    Lets safe-method API requests read from the replicas (core.db_router).
+
+    Read-your-writes: after a successful unsafe request the client reads
+    from the primary for READ_YOUR_WRITES_SECONDS. The deadline is sent as
+    the READ_PRIMARY_COOKIE cookie for browsers and in the
+    X-Read-Primary-Until header, which API clients send back on their next
+    requests (the frontend's axios instance does). Admin pages and other non-API paths always use the primary.
+    """
+    header = 'X-Read-Primary-Until'
+    paths = ('/api/',)
+
+    def pinned_until(self, request):
+        value = request.headers.get(self.header) or request.COOKIES.get(settings.READ_PRIMARY_COOKIE)
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return 0.0
+
+    def use_replica(self, request):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') or not request.path.startswith(self.paths):
+            return False
+        now = time.time()
+        until = self.pinned_until(request)
+        # A deadline further away than the window was not issued by us.
+        return not (now < until <= now + settings.READ_YOUR_WRITES_SECONDS)
+
+    def process_request(self, request):
+        set_replica_reads(self.use_replica(request))
+
+    def process_response(self, request, response):
+        set_replica_reads(False)
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 400:
+            window = settings.READ_YOUR_WRITES_SECONDS
+            until = '%.3f' % (time.time() + window)
+            response.headers[self.header] = until
+            response.set_cookie(
+                settings.READ_PRIMARY_COOKIE, until, max_age=window,
+                secure=request.is_secure(), httponly=True, samesite='Lax',
+            )
+        return response
+
+
+class RequestTimingMiddleware(MiddlewareMixin):
+    """
+    Measures query count, DB, serializer and render time per request
+    (core.timing).
+
+    Staff responses, and all responses in DEBUG, get a Server-Timing header
+    that the browser dev tools show. A REQUEST_TIMING_SAMPLE_RATE sample of
+    requests is logged as JSON on the core.timing logger. Requests that run
+    the same query shape N_PLUS_ONE_THRESHOLD or more times are logged as a
+    likely N+1 with the view name. The slowest requests of each route are
+    kept in core.SlowRequest.
+    """
+
+    def process_request(self, request):
+        timing = start_request_timing()
+        request._timing = timing
+        request._timing_queries = ExitStack()
+        request._timing_queries.enter_context(timing.instrument_queries())
+
+    def process_response(self, request, response):
+        timing = getattr(request, '_timing', None)
+        if timing is None:
+            return response
+        request._timing_queries.close()
+        stop_request_timing()
+
+        if settings.DEBUG or is_staff_user(getattr(request, 'user', None)):
+            response.headers['Server-Timing'] = timing.server_timing()
+
+        repeated = timing.repeated_queries()
+        if repeated or random.random() < settings.REQUEST_TIMING_SAMPLE_RATE:
+            log_request_timing(request, response, timing, repeated)
+        record_slow_request(request, response, timing)
+        return response
+
+
+class MetricsMiddleware(MiddlewareMixin):
+    """
+    Records latency, status and response size per resolved URL name for the
+    Prometheus endpoint (core.metrics). Sizes are measured as sent, so put
+    it before CompressionMiddleware.
+    """
+
+    def process_request(self, request):
+        request._metrics_started = time.perf_counter()
+
+    def process_response(self, request, response):
+        started = getattr(request, '_metrics_started', None)
+        if started is not None:
+            observe_request(request, response, time.perf_counter() - started)
+        return response
+
+
+class ProfilingMiddleware(MiddlewareMixin):
+    """
+    Runs staff requests that ask for it (``?profile=1`` or ``X-Profile: 1``)
+    under the sampling profiler in core.profiling and stores the profile,
+    with the SQL it executed, as a core.RequestProfile; its id is returned
+    in X-Profile-Id. ``?profile=folded`` returns the collapsed stacks
+    instead of the normal response.
+
+    Limited by the 'profile' throttle rate per user and to one profiled
+    request per process at a time; otherwise the request runs normally and
+    X-Profile says why. Requests from anyone else ignore the parameter.
+    """
+
+    def process_request(self, request):
+        mode = requested_profile(request)
+        if mode is None:
+            return
+        user = profiling_user(request)
+        if user is None:
+            return
+        request._profile, request._profile_status = start_profile(request, mode, user)
+
+    def process_response(self, request, response):
+        status = getattr(request, '_profile_status', None)
+        if status is None:
+            return response
+        if status != 'started':
+            response.headers['X-Profile'] = status
+            return response
+
+        profiled = request._profile
+        profile = finish_profile(request, response, profiled)
+        if profiled.mode == 'folded':
+            response = HttpResponse(profiled.profiler.folded(), content_type='text/plain; charset=utf-8')
+        response.headers['X-Profile'] = status
+        if profile is not None:
+            response.headers['X-Profile-Id'] = str(profile.pk)
+        return response
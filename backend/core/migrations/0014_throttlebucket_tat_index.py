@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_rollupdirtyday'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='throttlebucket',
+            name='tat',
+            field=models.FloatField(db_index=True, help_text='Theoretical arrival time (Unix timestamp)'),
+        ),
+    ]
@@ -0,0 +1,221 @@
+import hashlib
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from .database import statement_timeout
+from .renderers import NDJSONRenderer, dumps
+from .serializers import parse_fieldset
+from .versions import get_versions
+
+
+class NDJSONExportMixin:
+    """
+    Adds ``?format=ndjson`` to list views.
+
+    The filtered queryset is read with ``.iterator()`` and each row is
+    serialized and sent as soon as it is ready, so a full export runs in
+    constant memory and the client starts receiving data immediately.
+    Pagination is skipped in this mode.
+    """
+    export_chunk_size = 500
+
+    def get_renderers(self):
+        return super().get_renderers() + [NDJSONRenderer()]
+
+    def list(self, request, *args, **kwargs):
+        if getattr(request.accepted_renderer, 'format', None) != NDJSONRenderer.format:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        # Rows are read after the middleware has finished; pick the database
+        # (a replica, see core.db_router) while the request is still routed.
+        queryset = queryset.using(queryset.db)
+        serializer_class = self.get_serializer_class()
+        context = self.get_serializer_context()
+
+        def rows():
+            for instance in queryset.iterator(chunk_size=self.export_chunk_size):
+                yield dumps(serializer_class(instance, context=context).data) + b'\n'
+
+        response = StreamingHttpResponse(rows(), content_type=NDJSONRenderer.media_type)
+        response['X-Accel-Buffering'] = 'no'  # let nginx pass rows through
+        return response
+
+
+class SparseFieldsetMixin:
+    """
+    Defers the model columns a sparse fieldset request does not need.
+
+    The serializer (with SparseFieldsMixin) drops the unrequested fields from
+    the output; this drops the matching columns from the SELECT, so large
+    text columns such as ``content`` or ``description`` are not read when
+    only titles are shown. Columns still used by a kept field's ``source``,
+    by ``Meta.sparse_requires``, by the ordering or by select_related are
+    kept.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fields, omit = parse_fieldset(self.request)
+        if fields is None and not omit:
+            return queryset
+
+        serializer = self.get_serializer()
+        requires = getattr(serializer.Meta, 'sparse_requires', {})
+        needed = {field.name for field in queryset.model._meta.concrete_fields if field.primary_key}
+        for name, field in serializer.fields.items():
+            needed.add(field.source.split('.')[0])
+            needed.update(requires.get(name, ()))
+        needed.update(name.lstrip('-').split('__')[0] for name in queryset.query.order_by if isinstance(name, str))
+        select_related = queryset.query.select_related
+        if select_related is True:
+            needed.update(field.name for field in queryset.model._meta.concrete_fields if field.is_relation)
+        elif select_related:
+            needed.update(select_related)
+
+        deferred = [
+            field.name for field in queryset.model._meta.concrete_fields
+            if field.name not in needed and field.attname not in needed
+        ]
+        return queryset.defer(*deferred) if deferred else queryset
+
+
+class FastListMixin:
+    """
+    Serves list requests through ``fast_serializer_class`` (a
+    FastReadSerializer), reading ``.values()`` rows instead of model
+    instances. Pagination, filtering and sparse fieldsets work as before.
+    Set FAST_READ_SERIALIZERS=False to fall back to the regular serializer.
+    """
+    fast_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        if self.fast_serializer_class is None or not settings.FAST_READ_SERIALIZERS:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        fast = self.fast_serializer_class(context=self.get_serializer_context())
+        # Keyset pagination reads the ordering columns from the rows.
+        ordering = [name.lstrip('-') for name in queryset.query.order_by if isinstance(name, str)]
+        rows = fast.values(queryset, extra=ordering)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(fast.serialize(page))
+        return Response(fast.serialize(rows))
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified validators for list and detail responses, checked
+    before the page is queried and serialized; a match returns 304.
+
+    Lists are validated with the model's ContentVersion counter
+    (core.versions), which every save and delete bumps, so checking them
+    costs one small query instead of an aggregate over the filtered rows.
+    Details of models with ``conditional_timestamp_field`` use the row's
+    timestamp; models without one set the field to None and use the
+    counter for details too.
+
+    ``conditional_dependencies`` lists other versioned models that appear
+    in the output (nested loans, comments); their counters are mixed in.
+    """
+    conditional_timestamp_field = 'updated_at'
+    conditional_dependencies = ()
+
+    def get_validators(self, queryset, detail=False):
+        """
+        Returns:
+            tuple: (etag, last_modified timestamp or None); etag is None if
+            the object does not exist
+        """
+        field = self.conditional_timestamp_field if detail else None
+        labels = list(self.conditional_dependencies)
+        if field is None:
+            labels.insert(0, queryset.model._meta.label)
+
+        parts = []
+        last_modified = None
+        if field:
+            aggregate = queryset.order_by().aggregate(last=Max(field), count=Count('pk'))
+            if not aggregate['count']:
+                return None, None
+            parts += [aggregate['last'], aggregate['count']]
+            last_modified = aggregate['last']
+        elif detail and not queryset.exists():
+            return None, None
+
+        for label, (version, updated_at) in get_versions(labels).items():
+            parts += [label, version]
+            if updated_at:
+                last_modified = max(last_modified, updated_at) if last_modified else updated_at
+
+        # The same data renders differently per URL (page, fields, format)
+        # and may be filtered per user.
+        user = self.request.user
+        parts += [
+            self.request.get_full_path(),
+            self.request.accepted_renderer.format,
+            user.pk if user.is_authenticated else None,
+        ]
+        etag = quote_etag(hashlib.sha1(repr(parts).encode()).hexdigest())
+        return etag, int(last_modified.timestamp()) if last_modified else None
+
+    def conditional_response(self, request, etag, last_modified, render):
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = render()
+        if response.status_code in (200, 304):
+            response.headers['ETag'] = etag
+            if last_modified is not None:
+                response.headers['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(self.filter_queryset(self.get_queryset()))
+        render = lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs)
+        return self.conditional_response(request, etag, last_modified, render)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        render = lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs)
+        try:
+            queryset = self.filter_queryset(self.get_queryset()).filter(
+                **{self.lookup_field: kwargs[lookup_url_kwarg]}
+            )
+            etag, last_modified = self.get_validators(queryset, detail=True)
+        except (TypeError, ValueError, ValidationError):
+            # Malformed lookup value; get_object() turns it into a 404.
+            etag = None
+        if etag is None:
+            return render()
+        return self.conditional_response(request, etag, last_modified, render)
+
+
+class StatementTimeoutMixin:
+    """
+    Cancels the queries of a request that exceed the view's budget, so a
+    pathological ``?search=`` on a large table answers 503 (with
+    Retry-After, see core.database) instead of holding a worker and a
+    connection for minutes.
+
+    ``statement_timeout`` is the budget in milliseconds for every action;
+    ``statement_timeouts`` overrides it per action. NDJSON exports stream
+    after the request has been handled and are not limited.
+    """
+    statement_timeout = None
+    statement_timeouts = {}
+
+    def get_statement_timeout(self, request):
+        action = getattr(self, 'action_map', {}).get(request.method.lower())
+        return self.statement_timeouts.get(action, self.statement_timeout)
+
+    def dispatch(self, request, *args, **kwargs):
+        with statement_timeout(self.get_statement_timeout(request)):
+            return super().dispatch(request, *args, **kwargs)
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.db import models
 import uuid
 import os
@@ -51,7 +52,151 @@ class ContactMessage(models.Model):
     subject = models.CharField(max_length=255)
     message = models.TextField()
     is_read = models.BooleanField(default=False)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
     def __str__(self):
         return f"{self.subject} - {self.email}"
+
+class PendingDeletion(models.Model):
+    """
+    A storage file waiting to be deleted by the drain_storage_deletions worker.
+    Rows are written by core.storage.DeferredDeleteMixin after commit.
+    """
+    name = models.CharField(max_length=255)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+class DashboardCounter(models.Model):
+    """
+    One row per dashboard statistic, kept up to date by the signal handlers in
+    core.stats when DASHBOARD_STATS_MODE is 'counters'.
+    """
+    key = models.CharField(max_length=50, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key}: {self.value}"
+
+class DailyStat(models.Model):
+    """
+    Per-day bucket for a dashboard trend metric. Filled by the rollup_stats
+    command (or directly by event counters such as blog reads).
+    """
+    metric = models.CharField(max_length=50)
+    day = models.DateField()
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['metric', 'day'], name='unique_daily_stat_metric_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.metric} {self.day}: {self.value}"
+
+class RollupWatermark(models.Model):
+    """Last day rolled up for a metric; rollup_stats resumes from here."""
+    metric = models.CharField(max_length=50, unique=True)
+    last_day = models.DateField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.metric} @ {self.last_day}"
+
+class RollupDirtyDay(models.Model):
+    """
+    A day bucket whose source rows were added, edited or deleted since the
+    last rollup, written by the signal handlers in core.rollups. Catches
+    changes dated before the watermark, such as backdated loans.
+    """
+    metric = models.CharField(max_length=50)
+    day = models.DateField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['metric', 'day'], name='unique_rollup_dirty_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.metric} {self.day}"
+
+class ThrottleBucket(models.Model):
+    """GCRA state for one throttle key, used by core.throttling.DatabaseGCRAStore."""
+    key = models.CharField(max_length=255, unique=True)
+    tat = models.FloatField(db_index=True, help_text="Theoretical arrival time (Unix timestamp)")
+
+    def __str__(self):
+        return self.key
+
+class ContentVersion(models.Model):
+    """
+    Change counter for a model without an ``updated_at`` column, bumped by the
+    signal handlers in core.versions. Used as the HTTP validator by
+    core.mixins.ConditionalGetMixin.
+    """
+    label = models.CharField(max_length=100, unique=True)
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.label} v{self.version}"
+
+class ChangeLogEntry(models.Model):
+    """
+    Append-only record of a create, update or delete of a synced model,
+    written by core.sync after the transaction commits. The id is the sync
+    token handed to clients by /api/sync/.
+    """
+    ACTION_CHOICES = [
+        ('upsert', 'Created or updated'),
+        ('delete', 'Deleted'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    model = models.CharField(max_length=100)
+    object_id = models.CharField(max_length=64)
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"#{self.id} {self.action} {self.model}:{self.object_id}"
+
+class SlowRequest(models.Model):
+    """
+    One of the SLOW_REQUESTS_PER_ROUTE slowest requests of a route in the
+    last SLOW_REQUEST_WINDOW_HOURS, kept by core.profiling.record_slow_request.
+    """
+    route = models.CharField(max_length=200, db_index=True)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    status = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    db_ms = models.FloatField()
+    query_count = models.PositiveIntegerField()
+    serialize_ms = models.FloatField()
+    render_ms = models.FloatField()
+    repeated_queries = models.JSONField(default=list, blank=True, help_text="Query shapes run N_PLUS_ONE_THRESHOLD or more times")
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.method} {self.route} {self.duration_ms:.0f} ms"
+
+class RequestProfile(models.Model):
+    """Sampling profile of one staff request run with ?profile=1 (core.profiling)."""
+    route = models.CharField(max_length=200, db_index=True)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    status = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL)
+    samples = models.PositiveIntegerField()
+    folded = models.TextField(help_text="Collapsed stacks for flamegraph.pl or speedscope")
+    queries = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.method} {self.path} {self.duration_ms:.0f} ms"
@@ -1,6 +1,183 @@
-from rest_framework.pagination import PageNumberPagination
+from django.core.exceptions import ImproperlyConfigured
+from django.core.paginator import Paginator as DjangoPaginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+PAGINATION_MODES = ('count', 'nocount', 'estimate', 'keyset')
+
+# Below this many rows the planner estimate is not worth the inaccuracy.
+ESTIMATE_MIN_ROWS = 1000
+
+
+def estimated_count(queryset):
+    """
+    Row estimate from PostgreSQL planner statistics (pg_class.reltuples) for
+    an unfiltered queryset, or None if no usable estimate exists.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql' or queryset.query.has_filters():
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    # reltuples is -1 for tables that have never been analyzed
+    if row is None or row[0] < ESTIMATE_MIN_ROWS:
+        return None
+    return row[0]
+
+
+class EstimatedCountPaginator(DjangoPaginator):
+    is_estimate = False
+
+    @cached_property
+    def count(self):
+        estimate = estimated_count(self.object_list)
+        if estimate is None:
+            return super().count
+        self.is_estimate = True
+        return estimate
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor (keyset) pagination that follows the view queryset's ordering.
+
+    Pages are fetched with ``WHERE <order field> < last seen value`` instead
+    of OFFSET, and no COUNT(*) is run, so deep pages cost the same as the
+    first one.
+    """
+    page_size = 8
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        ordering = tuple(queryset.query.order_by) or ('-pk',)
+        if any(not isinstance(field, str) or '__' in field for field in ordering):
+            view_name = view.__class__.__name__ if view is not None else 'The view'
+            raise ImproperlyConfigured(
+                f"{view_name} orders by {ordering!r}; keyset pagination needs "
+                f"plain field names on the model, not relations or expressions."
+            )
+        return ordering
+
 
 class StandardPagination(PageNumberPagination):
+    """
+    Page-number pagination with selectable counting.
+
+    The mode comes from ``?pagination=`` or the view's ``pagination_mode``:
+
+    - ``count`` (default): exact COUNT(*), as before.
+    - ``nocount``: fetch page_size + 1 rows to decide ``next``; ``count`` is null.
+    - ``estimate``: planner estimate for unfiltered lists on PostgreSQL,
+      exact count otherwise; ``count_is_estimate`` tells which.
+    - ``keyset``: KeysetPagination (also selected by ``?cursor=``).
+
+    The page number, links and response body of the page-number modes are
+    built by the helpers below, which core.async_views shares.
+    """
     page_size = 8  # "Few" for the first page
     page_size_query_param = 'page_size'
     max_page_size = 10000
+
+    def get_pagination_mode(self, request, view):
+        if 'cursor' in request.query_params:
+            return 'keyset'
+        mode = request.query_params.get('pagination')
+        if mode in PAGINATION_MODES:
+            return mode
+        return getattr(view, 'pagination_mode', 'count')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.mode = self.get_pagination_mode(request, view)
+        self.delegate = None
+
+        if self.mode == 'keyset':
+            self.delegate = KeysetPagination()
+            return self.delegate.paginate_queryset(queryset, request, view)
+
+        if self.mode == 'nocount':
+            return self.paginate_without_count(queryset, request)
+
+        if self.mode == 'estimate':
+            self.django_paginator_class = EstimatedCountPaginator
+        return super().paginate_queryset(queryset, request, view)
+
+    def parse_page_number(self, request):
+        """The requested page; NotFound unless it is a positive integer."""
+        try:
+            page_number = int(request.query_params.get(self.page_query_param, 1))
+        except ValueError:
+            page_number = 0
+        if page_number < 1:
+            raise NotFound(self.invalid_page_message)
+        return page_number
+
+    def has_next_page(self, count, page_number, page_size):
+        """Whether a page follows ``page_number`` of ``count`` rows; NotFound past the last page."""
+        offset = (page_number - 1) * page_size
+        if offset >= count and page_number > 1:
+            raise NotFound(self.invalid_page_message)
+        return offset + page_size < count
+
+    def get_page_links(self, request, page_number, has_next):
+        """(next, previous) URLs of page ``page_number``."""
+        url = request.build_absolute_uri()
+        next_link = replace_query_param(url, self.page_query_param, page_number + 1) if has_next else None
+        if page_number <= 1:
+            previous_link = None
+        elif page_number == 2:
+            previous_link = remove_query_param(url, self.page_query_param)
+        else:
+            previous_link = replace_query_param(url, self.page_query_param, page_number - 1)
+        return next_link, previous_link
+
+    def get_page_data(self, count, links, results, is_estimate=False):
+        next_link, previous_link = links
+        data = {'count': count, 'next': next_link, 'previous': previous_link, 'results': results}
+        if self.mode == 'estimate':
+            data['count_is_estimate'] = is_estimate
+        return data
+
+    def paginate_without_count(self, queryset, request):
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        self.page_number = self.parse_page_number(request)
+        offset = (self.page_number - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+        self.has_next = len(rows) > page_size
+        self.request = request
+        return rows[:page_size]
+
+    def get_next_link(self):
+        if self.mode != 'nocount':
+            return super().get_next_link()
+        return self.get_page_links(self.request, self.page_number, self.has_next)[0]
+
+    def get_previous_link(self):
+        if self.mode != 'nocount':
+            return super().get_previous_link()
+        return self.get_page_links(self.request, self.page_number, self.has_next)[1]
+
+    def get_paginated_response(self, data):
+        if self.delegate:
+            return self.delegate.get_paginated_response(data)
+        if self.mode == 'nocount':
+            links = self.get_page_links(self.request, self.page_number, self.has_next)
+            return Response(self.get_page_data(None, links, data))
+        paginator = self.page.paginator
+        links = self.get_page_links(self.request, self.page.number, self.page.has_next())
+        return Response(self.get_page_data(paginator.count, links, data, getattr(paginator, 'is_estimate', False)))
+
+
+class DirectoryPagination(StandardPagination):
+    max_page_size = 100
@@ -0,0 +1,243 @@
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.utils import timezone
+from rest_framework.exceptions import APIException
+
+from .metrics import record_throttle, route_name
+from .throttling import SharedUserRateThrottle
+
+# Seconds between stack samples of the profiled thread.
+SAMPLE_INTERVAL = 0.005
+
+# Most SQL statements stored with one profile.
+MAX_PROFILE_QUERIES = 1000
+
+# Profiles kept; older ones are deleted when a new one is stored.
+PROFILE_RETENTION = 200
+
+_profile_lock = threading.Lock()
+_slow_thresholds = {}
+
+
+def is_staff_user(user):
+    return user is not None and user.is_authenticated and getattr(user, 'role', None) in ('ADMIN', 'STAFF')
+
+
+def frame_label(code):
+    path = code.co_filename
+    if 'site-packages/' in path:
+        path = path.rsplit('site-packages/', 1)[1]
+    elif path.startswith(str(settings.BASE_DIR)):
+        path = path[len(str(settings.BASE_DIR)) + 1:]
+    return f'{code.co_name} ({path})'.replace(';', ':')
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler for one thread. A background thread records the
+    profiled thread's stack every SAMPLE_INTERVAL seconds, so the overhead
+    does not grow with the number of calls. The result is in the collapsed
+    format ("outer;inner;leaf count") read by flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, thread_id):
+        self.thread_id = thread_id
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(SAMPLE_INTERVAL):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+                self.samples += 1
+
+    def folded(self):
+        return '\n'.join(f'{stack} {count}' for stack, count in self.stacks.most_common())
+
+
+class QueryRecorder:
+    """Execute wrapper keeping the SQL (without parameters) and duration of each query."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if len(self.queries) < MAX_PROFILE_QUERIES:
+                self.queries.append({
+                    'sql': sql,
+                    'ms': round((time.perf_counter() - started) * 1000, 2),
+                    'db': context['connection'].alias,
+                })
+
+
+class ProfiledRequest:
+    """Sampling profiler, SQL recorder and timer of one profiled request."""
+
+    def __init__(self, mode, user):
+        self.mode = mode
+        self.user = user
+        self.profiler = SamplingProfiler(threading.get_ident())
+        self.recorder = QueryRecorder()
+        self.duration = None
+        self._wrappers = ExitStack()
+
+    def start(self):
+        for alias in connections:
+            self._wrappers.enter_context(connections[alias].execute_wrapper(self.recorder))
+        self.started = time.perf_counter()
+        self.profiler.start()
+
+    def stop(self):
+        self.duration = time.perf_counter() - self.started
+        self.profiler.stop()
+        self._wrappers.close()
+
+
+class ProfileRateThrottle(SharedUserRateThrottle):
+    """Per-user limit on profiled requests (the 'profile' throttle rate)."""
+    scope = 'profile'
+
+
+def requested_profile(request):
+    """'store', 'folded' or None, from ``?profile=`` or the X-Profile header."""
+    value = request.GET.get('profile') or request.headers.get('X-Profile')
+    if not value:
+        return None
+    return 'folded' if value == 'folded' else 'store'
+
+
+def profiling_user(request):
+    """The staff user making ``request`` (session or JWT), or None."""
+    user = getattr(request, 'user', None)
+    if is_staff_user(user):
+        return user
+
+    from users.authentication import CachedJWTAuthentication
+    try:
+        result = CachedJWTAuthentication().authenticate(request)
+    except APIException:
+        return None
+    if result is None or not is_staff_user(result[0]):
+        return None
+    # The throttle keys on request.user; DRF authenticates again in the view.
+    request.user = result[0]
+    return result[0]
+
+
+def start_profile(request, mode, user):
+    """
+    Returns:
+        tuple: (ProfiledRequest or None, status) where status is 'started',
+        'rate-limited' or 'busy'; only one request per process is profiled
+        at a time.
+    """
+    if not ProfileRateThrottle().allow_request(request, None):
+        return None, 'rate-limited'
+    if not _profile_lock.acquire(blocking=False):
+        record_throttle('profile-busy')
+        return None, 'busy'
+    profiled = ProfiledRequest(mode, user)
+    profiled.start()
+    return profiled, 'started'
+
+
+def finish_profile(request, response, profiled):
+    """Stop profiling and store the RequestProfile (None if it could not be saved)."""
+    from .models import RequestProfile
+
+    try:
+        profiled.stop()
+    finally:
+        _profile_lock.release()
+
+    try:
+        profile = RequestProfile.objects.create(
+            route=route_name(request),
+            method=request.method,
+            path=request.get_full_path()[:500],
+            status=response.status_code,
+            duration_ms=profiled.duration * 1000,
+            user=profiled.user,
+            samples=profiled.profiler.samples,
+            folded=profiled.profiler.folded(),
+            queries=profiled.recorder.queries,
+        )
+        stale = RequestProfile.objects.order_by('-id').values_list('id', flat=True)[PROFILE_RETENTION:]
+        RequestProfile.objects.filter(id__in=list(stale)).delete()
+    except DatabaseError:
+        return None
+    return profile
+
+
+def record_slow_request(request, response, timing):
+    """
+    Keep the request in the SlowRequest table if it is among the
+    SLOW_REQUESTS_PER_ROUTE slowest of its route in the last
+    SLOW_REQUEST_WINDOW_HOURS and took at least SLOW_REQUEST_MIN_MS. Older
+    rows are deleted, so a few cold-start outliers do not hide later
+    regressions. Each worker remembers the current cut-off per route until
+    its oldest row leaves the window, so fast requests cost no query.
+    """
+    duration_ms = timing.elapsed() * 1000
+    route = route_name(request)
+    now = timezone.now()
+    threshold, valid_until = _slow_thresholds.get(route, (0, None))
+    if valid_until is None or now >= valid_until:
+        threshold = 0
+    if duration_ms < max(settings.SLOW_REQUEST_MIN_MS, threshold):
+        return
+
+    from .models import SlowRequest
+    from .timing import short_sql
+
+    window = timedelta(hours=settings.SLOW_REQUEST_WINDOW_HOURS)
+    try:
+        SlowRequest.objects.create(
+            route=route,
+            method=request.method,
+            path=request.get_full_path()[:500],
+            status=response.status_code,
+            duration_ms=duration_ms,
+            db_ms=timing.db * 1000,
+            query_count=timing.queries,
+            serialize_ms=timing.phases['serialize'] * 1000,
+            render_ms=timing.phases['render'] * 1000,
+            repeated_queries=[{'count': count, 'sql': short_sql(shape)} for shape, count in timing.repeated_queries()],
+        )
+        SlowRequest.objects.filter(created_at__lt=now - window).delete()
+        kept = list(
+            SlowRequest.objects.filter(route=route).order_by('-duration_ms')
+            .values_list('id', 'duration_ms', 'created_at')[:settings.SLOW_REQUESTS_PER_ROUTE]
+        )
+        SlowRequest.objects.filter(route=route).exclude(id__in=[pk for pk, _, _ in kept]).delete()
+    except DatabaseError:
+        return
+    if len(kept) >= settings.SLOW_REQUESTS_PER_ROUTE:
+        _slow_thresholds[route] = (kept[-1][1], min(created for _, _, created in kept) + window)
+    else:
+        _slow_thresholds.pop(route, None)
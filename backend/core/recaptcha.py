@@ -2,6 +2,15 @@ import requests
 import os
 from django.conf import settings
 
+from .metrics import observe_outbound
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None
+
+RECAPTCHA_VERIFY_URL = 'https://www.google.com/recaptcha/api/siteverify'
+
 
 def verify_recaptcha(token, action=None):
     """
@@ -24,34 +33,73 @@ def verify_recaptcha(token, action=None):
         return True, 1.0, None
     
     try:
-        response = requests.post(
-            'https://www.google.com/recaptcha/api/siteverify',
-            data={
-                'secret': secret_key,
-                'response': token,
-            },
-            timeout=10
-        )
-        result = response.json()
-        
-        success = result.get('success', False)
-        score = result.get('score', 0.0)
-        
-        if not success:
-            error_codes = result.get('error-codes', [])
-            return False, score, f"reCAPTCHA verification failed: {error_codes}"
-        
-        # Check action if provided
-        if action and result.get('action') != action:
-            return False, score, f"reCAPTCHA action mismatch: expected {action}, got {result.get('action')}"
-        
-        # Check score threshold (0.5 is a common threshold)
-        if score < 0.5:
-            return False, score, f"reCAPTCHA score too low: {score}"
-        
-        return True, score, None
+        with observe_outbound('recaptcha'):
+            response = requests.post(
+                RECAPTCHA_VERIFY_URL,
+                data={
+                    'secret': secret_key,
+                    'response': token,
+                },
+                timeout=10
+            )
+        return _check_result(response.json(), action)
         
     except requests.RequestException as e:
         return False, 0.0, f"reCAPTCHA verification request failed: {str(e)}"
     except Exception as e:
         return False, 0.0, f"reCAPTCHA verification error: {str(e)}"
+
+
+async def averify_recaptcha(token, action=None):
+    """
+    Async version of verify_recaptcha for async views. Uses httpx when it is
+    installed, so the event loop keeps serving other requests while Google
+    answers; otherwise runs verify_recaptcha in a thread.
+    """
+    if httpx is None:
+        from asgiref.sync import sync_to_async
+        return await sync_to_async(verify_recaptcha, thread_sensitive=False)(token, action)
+
+    if not token:
+        return False, 0.0, "No reCAPTCHA token provided"
+
+    secret_key = os.getenv('RECAPTCHA_SECRET_KEY', '')
+
+    if not secret_key:
+        return True, 1.0, None
+
+    try:
+        with observe_outbound('recaptcha'):
+            async with httpx.AsyncClient(timeout=10) as client:
+                response = await client.post(
+                    RECAPTCHA_VERIFY_URL,
+                    data={
+                        'secret': secret_key,
+                        'response': token,
+                    },
+                )
+        return _check_result(response.json(), action)
+
+    except httpx.HTTPError as e:
+        return False, 0.0, f"reCAPTCHA verification request failed: {str(e)}"
+    except Exception as e:
+        return False, 0.0, f"reCAPTCHA verification error: {str(e)}"
+
+
+def _check_result(result, action):
+    success = result.get('success', False)
+    score = result.get('score', 0.0)
+    
+    if not success:
+        error_codes = result.get('error-codes', [])
+        return False, score, f"reCAPTCHA verification failed: {error_codes}"
+    
+    # Check action if provided
+    if action and result.get('action') != action:
+        return False, score, f"reCAPTCHA action mismatch: expected {action}, got {result.get('action')}"
+    
+    # Check score threshold (0.5 is a common threshold)
+    if score < 0.5:
+        return False, score, f"reCAPTCHA score too low: {score}"
+    
+    return True, score, None
@@ -0,0 +1,71 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+from .timing import phase
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+_encoder = JSONEncoder()
+
+ORJSON_OPTIONS = (
+    # Datetimes, Decimals and lazy strings go through DRF's encoder so the
+    # output matches the stdlib renderer exactly.
+    orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+    if orjson else 0
+)
+
+
+def fast_json_available():
+    """True when the fast path is usable with the current REST_FRAMEWORK settings."""
+    return orjson is not None and api_settings.UNICODE_JSON and api_settings.COMPACT_JSON
+
+
+def dumps(data):
+    """
+    Encode ``data`` the way DRF's JSONRenderer does (compact, UTF-8,
+    U+2028/U+2029 escaped), with orjson when it is installed.
+
+    Returns:
+        bytes
+    """
+    if not fast_json_available():
+        return JSONRenderer().render(data)
+
+    ret = orjson.dumps(data, default=_encoder.default, option=ORJSON_OPTIONS)
+    if b'\xe2\x80' in ret:
+        ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return ret
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer backed by orjson when it is installed.
+
+    Requests that ask for indentation, and installs without orjson, use
+    the stdlib renderer, so the output is the same either way.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        with phase('render'):
+            if self.get_indent(accepted_media_type, renderer_context or {}) or not fast_json_available():
+                return super().render(data, accepted_media_type, renderer_context)
+            return dumps(data)
+
+
+class NDJSONRenderer(FastJSONRenderer):
+    """
+    Newline-delimited JSON. List exports are streamed row by row by
+    core.mixins.NDJSONExportMixin; this renderer handles everything else
+    (detail views, errors) as a single line.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(data, accepted_media_type, renderer_context) + b'\n'
@@ -0,0 +1,244 @@
+import re
+from collections import OrderedDict
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncDate
+from django.db.models.signals import post_init, post_save, pre_delete
+from django.utils import timezone
+
+# Days before the watermark that are recomputed on every run, so late rows
+# (a loan entered the next morning, a return marked after midnight) are
+# still picked up. Older days are recomputed when RollupDirtyDay marks them.
+ROLLUP_OVERLAP_DAYS = 2
+
+# Metrics that are written directly with record_event() instead of rolled up.
+EVENT_METRICS = {'blog_reads'}
+
+DEFAULT_INTERVALS = {
+    'registrations': 'day',
+    'loans': 'week',
+    'returns': 'week',
+    'messages': 'month',
+    'posts': 'month',
+    'blog_reads': 'day',
+}
+
+MAX_RANGE_DAYS = 5 * 366
+RANGE_UNITS = {'d': 1, 'w': 7, 'm': 31, 'y': 366}
+
+
+def rollup_sources():
+    """Rolled-up metrics: {metric: (model, date_field)}."""
+    from core.models import ContactMessage
+    from library.models import BorrowedBook
+    from blog.models import BlogPost
+
+    return {
+        'registrations': (get_user_model(), 'date_joined'),
+        'loans': (BorrowedBook, 'borrow_date'),
+        'returns': (BorrowedBook, 'returned_date'),
+        'messages': (ContactMessage, 'created_at'),
+        'posts': (BlogPost, 'created_at'),
+    }
+
+
+def metric_names():
+    return list(rollup_sources()) + sorted(EVENT_METRICS)
+
+
+def _day_range(field_name, day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return Q(**{f'{field_name}__gte': start, f'{field_name}__lt': start + timedelta(days=1)})
+
+
+def rollup_metric(metric, full=False):
+    """
+    Recompute the DailyStat buckets of ``metric`` from its source table.
+
+    Only rows dated on or after (watermark - ROLLUP_OVERLAP_DAYS), plus the
+    older days marked in RollupDirtyDay, are read, unless ``full`` is set or
+    the metric has never been rolled up.
+
+    Returns:
+        int: number of day buckets written
+    """
+    from .models import DailyStat, RollupDirtyDay, RollupWatermark
+
+    model, field_name = rollup_sources()[metric]
+    field = model._meta.get_field(field_name)
+    today = timezone.localdate()
+
+    watermark = RollupWatermark.objects.filter(metric=metric).first()
+    start = None
+    if watermark and not full:
+        start = watermark.last_day - timedelta(days=ROLLUP_OVERLAP_DAYS)
+
+    marks = list(RollupDirtyDay.objects.filter(metric=metric).values_list('id', 'day'))
+    dirty_days = sorted({day for _, day in marks if start and day < start})
+
+    queryset = model.objects.exclude(**{f'{field_name}__isnull': True})
+    if isinstance(field, models.DateTimeField):
+        day = TruncDate(field_name)
+        if start:
+            # Compare against datetimes so the column index can be used.
+            start_dt = timezone.make_aware(datetime.combine(start, time.min))
+            condition = Q(**{f'{field_name}__gte': start_dt})
+            for dirty_day in dirty_days:
+                condition |= _day_range(field_name, dirty_day)
+            queryset = queryset.filter(condition)
+    else:
+        day = F(field_name)
+        if start:
+            queryset = queryset.filter(Q(**{f'{field_name}__gte': start}) | Q(**{f'{field_name}__in': dirty_days}))
+
+    rows = queryset.annotate(day=day).values('day').annotate(value=Count('pk')).order_by()
+    buckets = [DailyStat(metric=metric, day=row['day'], value=row['value']) for row in rows]
+
+    with transaction.atomic():
+        stale = DailyStat.objects.filter(metric=metric)
+        if start:
+            stale = stale.filter(Q(day__gte=start) | Q(day__in=dirty_days))
+        stale.delete()
+        DailyStat.objects.bulk_create(buckets, batch_size=1000)
+        RollupWatermark.objects.update_or_create(metric=metric, defaults={'last_day': today})
+        # Only the marks read above; days marked since are handled next run.
+        RollupDirtyDay.objects.filter(id__in=[pk for pk, _ in marks]).delete()
+
+    return len(buckets)
+
+
+# Dirty day tracking
+
+def _local_day(value):
+    if isinstance(value, datetime):
+        return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+    return value
+
+
+def mark_dirty(metric, days):
+    """Queue the buckets of ``days`` for recomputation by the next rollup."""
+    from .models import RollupDirtyDay
+
+    marks = [RollupDirtyDay(metric=metric, day=day) for day in set(days) if day is not None]
+    if marks:
+        RollupDirtyDay.objects.bulk_create(marks, ignore_conflicts=True)
+
+
+def _make_rollup_handlers(fields):
+    """``fields`` is {metric: date_field} for one source model."""
+
+    def remember_days(sender, instance, **kwargs):
+        deferred = instance.get_deferred_fields()
+        instance._rollup_days = {
+            metric: _local_day(getattr(instance, field_name))
+            for metric, field_name in fields.items()
+            if field_name not in deferred
+        }
+
+    def mark_save(sender, instance, created, **kwargs):
+        old = {} if created else getattr(instance, '_rollup_days', {})
+        remember_days(sender, instance)
+        for metric, day in instance._rollup_days.items():
+            # A field deferred when the row was loaded was not saved either.
+            if created or (metric in old and old[metric] != day):
+                mark_dirty(metric, [old.get(metric), day])
+
+    def mark_delete(sender, instance, **kwargs):
+        # The row still exists, so deferred date fields can be read back.
+        deferred = set(fields.values()) & instance.get_deferred_fields()
+        if deferred:
+            instance.refresh_from_db(fields=deferred)
+        for metric, field_name in fields.items():
+            mark_dirty(metric, [getattr(instance, '_rollup_days', {}).get(metric), _local_day(getattr(instance, field_name))])
+
+    return remember_days, mark_save, mark_delete
+
+
+def connect_rollups():
+    """
+    Mark the day buckets touched by saves and deletes of the rolled-up
+    models, so rollup_stats also corrects days before its watermark.
+
+    QuerySet.update()/delete() bypass these signals; run
+    ``manage.py rollup_stats --full`` after bulk changes to old rows.
+    """
+    by_model = {}
+    for metric, (model, field_name) in rollup_sources().items():
+        by_model.setdefault(model, {})[metric] = field_name
+
+    for model, fields in by_model.items():
+        remember_days, mark_save, mark_delete = _make_rollup_handlers(fields)
+        uid = f'rollup_days_{model._meta.label_lower}'
+        post_init.connect(remember_days, sender=model, weak=False, dispatch_uid=uid)
+        post_save.connect(mark_save, sender=model, weak=False, dispatch_uid=uid)
+        pre_delete.connect(mark_delete, sender=model, weak=False, dispatch_uid=uid)
+
+
+def record_event(metric, day=None, count=1):
+    """Add ``count`` to today's bucket of an event metric such as blog_reads."""
+    from .models import DailyStat
+
+    day = day or timezone.localdate()
+    updated = DailyStat.objects.filter(metric=metric, day=day).update(value=F('value') + count)
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            DailyStat.objects.create(metric=metric, day=day, value=count)
+    except IntegrityError:
+        # Another request created the bucket first.
+        DailyStat.objects.filter(metric=metric, day=day).update(value=F('value') + count)
+
+
+def parse_range(value):
+    """
+    Parse a range such as '30d', '12w', '6m' or '1y' into a number of days.
+    Raises ValueError for anything else.
+    """
+    match = re.fullmatch(r'(\d+)([dwmy])', value or '')
+    if not match:
+        raise ValueError("Range must look like '30d', '12w', '6m' or '1y'.")
+    days = int(match.group(1)) * RANGE_UNITS[match.group(2)]
+    if not 0 < days <= MAX_RANGE_DAYS:
+        raise ValueError(f"Range must be between 1 and {MAX_RANGE_DAYS} days.")
+    return days
+
+
+def _bucket_start(day, interval):
+    if interval == 'week':
+        return day - timedelta(days=day.weekday())
+    if interval == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def get_trend(metric, days, interval):
+    """
+    Read ``days`` of DailyStat buckets for ``metric`` grouped by ``interval``
+    ('day', 'week' or 'month'). Empty buckets are filled with zeros, so the
+    result size depends only on the range, not on the data volume.
+    """
+    from .models import DailyStat
+
+    end = timezone.localdate()
+    start = _bucket_start(end - timedelta(days=days - 1), interval)
+
+    points = OrderedDict()
+    day = start
+    while day <= end:
+        points.setdefault(_bucket_start(day, interval), 0)
+        day += timedelta(days=1)
+
+    for day, value in DailyStat.objects.filter(metric=metric, day__gte=start, day__lte=end).values_list('day', 'value'):
+        points[_bucket_start(day, interval)] += value
+
+    return {
+        'metric': metric,
+        'interval': interval,
+        'start': start,
+        'end': end,
+        'points': [{'date': bucket, 'value': value} for bucket, value in points.items()],
+    }
@@ -1,24 +1,73 @@
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+from .fastserializers import FastReadSerializer
 from .models import Notice, Member, CarouselItem
+from .timing import phase
 
-class NoticeSerializer(serializers.ModelSerializer):
+
+def parse_fieldset(request):
+    """
+    Read ``?fields=a,b`` and ``?omit=c`` from a read request.
+
+    Returns:
+        tuple: (fields: set or None, omit: set); (None, empty set) when the
+        request does not ask for a sparse fieldset.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None, set()
+    params = request.query_params
+    fields = {name for name in params.get('fields', '').split(',') if name} or None
+    omit = {name for name in params.get('omit', '').split(',') if name}
+    return fields, omit
+
+
+class SparseFieldsMixin:
+    """
+    Lets read requests trim the output with ``?fields=`` and ``?omit=``.
+
+    Unknown names are ignored. Only the top-level serializer is trimmed;
+    nested serializers keep all their fields. ``Meta.sparse_requires`` maps
+    method fields to the model columns they read, so SparseFieldsetMixin on
+    the view does not defer them.
+
+    Serialization time is reported by core.timing.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields, omit = parse_fieldset(self.context.get('request'))
+        if fields is None and not omit:
+            return
+        for name in list(self.fields):
+            if (fields is not None and name not in fields) or name in omit:
+                self.fields.pop(name)
+
+    def to_representation(self, instance):
+        with phase('serialize'):
+            return super().to_representation(instance)
+
+
+class NoticeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Notice
         fields = '__all__'
 
-class MemberSerializer(serializers.ModelSerializer):
+class NoticeFastSerializer(FastReadSerializer):
+    serializer_class = NoticeSerializer
+
+class MemberSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Member
         fields = '__all__'
 
-class CarouselItemSerializer(serializers.ModelSerializer):
+class CarouselItemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = CarouselItem
         fields = '__all__'
 
 from .models import ContactMessage
 
-class ContactMessageSerializer(serializers.ModelSerializer):
+class ContactMessageSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = ContactMessage
         fields = '__all__'
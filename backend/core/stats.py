@@ -0,0 +1,188 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count, F, Q
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete
+
+from .metrics import record_cache
+
+DASHBOARD_STATS_CACHE_KEY = 'dashboard_stats'
+
+
+def stat_sources():
+    """
+    The dashboard statistics grouped by table.
+
+    Returns a list of (model, {stat_name: lookups}) where ``lookups`` is a dict
+    of exact-match field values ({} counts every row). The same lookups are
+    used as ``Count(filter=Q(...))`` in SQL and as predicates on instances for
+    the incremental counters.
+    """
+    from core.models import Member, Notice, ContactMessage
+    from library.models import Book, BorrowedBook
+    from health.models import HealthCamp
+    from blog.models import BlogPost
+
+    return [
+        (get_user_model(), {
+            'total_users': {},
+            'admin_users': {'role': 'ADMIN'},
+            'staff_users': {'role': 'STAFF'},
+            'regular_users': {'role': 'USER'},
+        }),
+        (Book, {'total_books': {}}),
+        (BorrowedBook, {
+            'total_borrowed': {'is_returned': False},
+            'total_returned': {'is_returned': True},
+        }),
+        (Member, {'total_members': {}}),
+        (Notice, {'total_notices': {}}),
+        (ContactMessage, {
+            'total_messages': {},
+            'unread_messages': {'is_read': False},
+        }),
+        (HealthCamp, {'total_health_camps': {}}),
+        (BlogPost, {'total_posts': {}}),
+    ]
+
+
+def stat_names():
+    return [name for _, counters in stat_sources() for name in counters]
+
+
+def _aggregate(model, counters):
+    return model.objects.aggregate(**{
+        name: Count('pk', filter=Q(**lookups) if lookups else None)
+        for name, lookups in counters.items()
+    })
+
+
+def compute_stats():
+    """Compute every statistic with one conditional-aggregation query per table."""
+    stats = {}
+    for model, counters in stat_sources():
+        stats.update(_aggregate(model, counters))
+    return stats
+
+
+def get_dashboard_stats(refresh=False):
+    """
+    Return the dashboard statistics.
+
+    In 'counters' mode this reads the DashboardCounter rows (seeding them on
+    first use); otherwise the aggregated result is cached for
+    DASHBOARD_STATS_CACHE_TTL seconds, or recomputed if ``refresh`` is set.
+    """
+    if settings.DASHBOARD_STATS_MODE == 'counters':
+        from .models import DashboardCounter
+        names = stat_names()
+        stats = dict(DashboardCounter.objects.values_list('key', 'value'))
+        if not all(name in stats for name in names):
+            stats = rebuild_counters()
+        return {name: stats[name] for name in names}
+
+    stats = None if refresh else cache.get(DASHBOARD_STATS_CACHE_KEY)
+    if not refresh:
+        record_cache('dashboard_stats', stats is not None)
+    if stats is None:
+        stats = compute_stats()
+        cache.set(DASHBOARD_STATS_CACHE_KEY, stats, settings.DASHBOARD_STATS_CACHE_TTL)
+    return stats
+
+
+def rebuild_counters():
+    """Recompute the DashboardCounter rows from the source tables."""
+    from .models import DashboardCounter
+    stats = compute_stats()
+    for key, value in stats.items():
+        DashboardCounter.objects.update_or_create(key=key, defaults={'value': value})
+    return stats
+
+
+def invalidate_stats(model):
+    """
+    Refresh the statistics of ``model`` after a bulk change that bypassed
+    model signals (QuerySet.update()/delete()).
+    """
+    from .versions import VERSIONED_MODELS, bump_version
+    if model._meta.label in VERSIONED_MODELS:
+        bump_version(model._meta.label)
+
+    if settings.DASHBOARD_STATS_MODE != 'counters':
+        cache.delete(DASHBOARD_STATS_CACHE_KEY)
+        return
+
+    from .models import DashboardCounter
+    for source, counters in stat_sources():
+        if source is model:
+            for key, value in _aggregate(model, counters).items():
+                DashboardCounter.objects.update_or_create(key=key, defaults={'value': value})
+
+
+# Incremental counters
+
+def _matching_stats(instance, counters):
+    """
+    Names of the statistics ``instance`` currently counts towards, or None if
+    a field needed to decide was deferred (reading it would cost a query).
+    """
+    deferred = instance.get_deferred_fields()
+    if any(field in deferred for lookups in counters.values() for field in lookups):
+        return None
+    return {
+        name for name, lookups in counters.items()
+        if all(getattr(instance, field) == value for field, value in lookups.items())
+    }
+
+
+def _bump(keys, delta):
+    from .models import DashboardCounter
+    if keys:
+        DashboardCounter.objects.filter(key__in=keys).update(value=F('value') + delta)
+
+
+def _make_handlers(counters):
+    def remember_state(sender, instance, **kwargs):
+        instance._dashboard_stats = _matching_stats(instance, counters) if instance.pk else set()
+
+    def count_save(sender, instance, created, raw, **kwargs):
+        if raw:
+            return
+        new = _matching_stats(instance, counters)
+        old = set() if created else getattr(instance, '_dashboard_stats', None)
+        if new is None or old is None:
+            return
+        _bump(new - old, 1)
+        _bump(old - new, -1)
+        instance._dashboard_stats = new
+
+    def load_state(sender, instance, **kwargs):
+        # The row still exists before the delete, so fields deferred by
+        # .only()/.defer() can be read back instead of skipping the decrement.
+        if getattr(instance, '_dashboard_stats', None) is None:
+            needed = {field for lookups in counters.values() for field in lookups}
+            deferred = needed & instance.get_deferred_fields()
+            if deferred:
+                instance.refresh_from_db(fields=deferred)
+            instance._dashboard_stats = _matching_stats(instance, counters)
+
+    def count_delete(sender, instance, **kwargs):
+        _bump(instance._dashboard_stats, -1)
+
+    return remember_state, count_save, load_state, count_delete
+
+
+def connect_counters():
+    """
+    Keep DashboardCounter rows in step with model saves and deletes.
+
+    QuerySet.update()/delete() bypass these signals; run
+    ``manage.py rebuild_dashboard_counters`` after bulk changes.
+    """
+    for model, counters in stat_sources():
+        remember_state, count_save, load_state, count_delete = _make_handlers(counters)
+        uid = f'dashboard_counters_{model._meta.label_lower}'
+        post_init.connect(remember_state, sender=model, weak=False, dispatch_uid=uid)
+        post_save.connect(count_save, sender=model, weak=False, dispatch_uid=uid)
+        pre_delete.connect(load_state, sender=model, weak=False, dispatch_uid=uid)
+        post_delete.connect(count_delete, sender=model, weak=False, dispatch_uid=uid)
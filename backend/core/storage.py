@@ -0,0 +1,125 @@
+import logging
+
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import transaction
+from django.db.models import F
+from storages.backends.s3 import S3Storage
+from storages.utils import clean_name
+
+logger = logging.getLogger(__name__)
+
+# S3 DeleteObjects accepts at most 1000 keys per call.
+S3_DELETE_BATCH_SIZE = 1000
+
+# Rows that keep failing are left in the table for inspection instead of
+# being retried forever at the head of the queue.
+MAX_DELETE_ATTEMPTS = 5
+
+
+def queue_deletions(names):
+    """Queue storage files for drain_storage_deletions with a single INSERT."""
+    from .models import PendingDeletion
+    PendingDeletion.objects.bulk_create([PendingDeletion(name=name) for name in names if name])
+
+
+class DeferredDeleteMixin:
+    """
+    Turns ``delete()`` into an insert into the PendingDeletion queue.
+
+    django_cleanup already calls ``delete()`` from ``transaction.on_commit``,
+    so files are only queued once the row change is committed. The actual
+    removal happens later in ``drain_pending_deletions`` via ``delete_many``.
+    """
+
+    def delete(self, name):
+        if not name:
+            raise ValueError("The name must be given to delete().")
+        queue_deletions([name])
+
+    def delete_now(self, name):
+        super().delete(name)
+
+    def delete_many(self, names):
+        """
+        Delete ``names`` immediately. Returns a dict of {name: error} for the
+        files that could not be deleted.
+        """
+        errors = {}
+        for name in names:
+            try:
+                self.delete_now(name)
+            except Exception as e:
+                errors[name] = str(e)
+        return errors
+
+
+class DeferredDeleteFileSystemStorage(DeferredDeleteMixin, FileSystemStorage):
+    pass
+
+
+class DeferredDeleteS3Storage(DeferredDeleteMixin, S3Storage):
+    def delete_many(self, names):
+        errors = {}
+        keys = {self._normalize_name(clean_name(name)): name for name in names}
+        key_list = list(keys)
+
+        for start in range(0, len(key_list), S3_DELETE_BATCH_SIZE):
+            chunk = key_list[start:start + S3_DELETE_BATCH_SIZE]
+            response = self.bucket.delete_objects(
+                Delete={'Objects': [{'Key': key} for key in chunk], 'Quiet': True}
+            )
+            # In quiet mode only failures are reported back.
+            for error in response.get('Errors', []):
+                errors[keys[error['Key']]] = f"{error.get('Code')}: {error.get('Message')}"
+        return errors
+
+
+def drain_pending_deletions(batch_size=S3_DELETE_BATCH_SIZE, storage=None):
+    """
+    Delete one batch of queued files from storage.
+
+    Rows are claimed with ``SELECT ... FOR UPDATE SKIP LOCKED`` so several
+    workers can drain the queue concurrently. Failed deletions stay queued
+    with their attempt count and last error until MAX_DELETE_ATTEMPTS.
+
+    Returns:
+        tuple: (deleted: int, failed: int)
+    """
+    from .models import PendingDeletion
+
+    storage = storage or default_storage
+
+    with transaction.atomic():
+        batch = list(
+            PendingDeletion.objects.select_for_update(skip_locked=True)
+            .filter(attempts__lt=MAX_DELETE_ATTEMPTS)
+            .order_by('id')
+            .values_list('id', 'name')[:batch_size]
+        )
+        if not batch:
+            return 0, 0
+
+        names = {name for _, name in batch}
+        if hasattr(storage, 'delete_many'):
+            errors = storage.delete_many(names)
+        else:
+            errors = {}
+            for name in names:
+                try:
+                    storage.delete(name)
+                except Exception as e:
+                    errors[name] = str(e)
+
+        done_ids = [pk for pk, name in batch if name not in errors]
+        PendingDeletion.objects.filter(id__in=done_ids).delete()
+
+        for pk, name in batch:
+            if name in errors:
+                logger.warning("Failed to delete %s from storage: %s", name, errors[name])
+                PendingDeletion.objects.filter(id=pk).update(
+                    attempts=F('attempts') + 1,
+                    last_error=errors[name][:1000],
+                )
+
+    return len(done_ids), len(batch) - len(done_ids)
+
@@ -0,0 +1,188 @@
+from datetime import timedelta
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Max, Min
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.utils import timezone
+
+from .fastserializers import FastReadSerializer
+
+# Most log entries returned by one /api/sync/ call. The client keeps
+# calling with the returned token while ``has_more`` is true.
+SYNC_BATCH_SIZE = 1000
+
+# Entries younger than this many seconds are not handed out yet. Ids are
+# allocated when the insert starts, so concurrent inserts can commit out of
+# id order; a token past an uncommitted id would skip that entry for good.
+SYNC_SETTLE_SECONDS = 5
+
+# Changes to these models are logged as an upsert of a synced parent,
+# because they are part of its serialized output: {model: (parent, fk attname)}.
+SYNC_PARENTS = {
+    'library.BorrowedBook': ('library.Book', 'book_id'),
+    'blog.Comment': ('blog.BlogPost', 'post_id'),
+}
+
+
+def sync_sources():
+    """Synced models: {label: (queryset, serializer class)}."""
+    from blog.models import BlogPost
+    from blog.serializers import BlogPostSerializer
+    from health.models import HealthCamp
+    from health.serializers import HealthCampSerializer
+    from library.models import Book
+    from library.serializers import BookFastSerializer
+    from .models import CarouselItem, Member, Notice
+    from .serializers import CarouselItemSerializer, MemberSerializer, NoticeFastSerializer
+
+    return {
+        'core.Notice': (Notice.objects.all(), NoticeFastSerializer),
+        'core.Member': (Member.objects.all(), MemberSerializer),
+        'core.CarouselItem': (CarouselItem.objects.all(), CarouselItemSerializer),
+        'library.Book': (Book.objects.all(), BookFastSerializer),
+        'health.HealthCamp': (HealthCamp.objects.all(), HealthCampSerializer),
+        'blog.BlogPost': (
+            BlogPost.objects.select_related('author').prefetch_related('comments__user'),
+            BlogPostSerializer,
+        ),
+    }
+
+
+def log_change(label, object_id, action):
+    """
+    Append a change log entry once the current transaction commits, so
+    rolled-back changes are not logged. Ids still need not become visible
+    in order (see SYNC_SETTLE_SECONDS).
+    """
+    from .models import ChangeLogEntry
+
+    transaction.on_commit(
+        lambda: ChangeLogEntry.objects.create(model=label, object_id=str(object_id), action=action)
+    )
+
+
+def _make_handlers(label):
+    def saved(sender, instance, raw=False, **kwargs):
+        if not raw:
+            log_change(label, instance.pk, 'upsert')
+
+    def deleted(sender, instance, **kwargs):
+        log_change(label, instance.pk, 'delete')
+
+    return saved, deleted
+
+
+def _make_parent_handler(parent_label, fk_attname):
+    def changed(sender, instance, raw=False, **kwargs):
+        parent_id = getattr(instance, fk_attname)
+        if not raw and parent_id is not None:
+            log_change(parent_label, parent_id, 'upsert')
+    return changed
+
+
+def connect_change_log():
+    for label in sync_sources():
+        saved, deleted = _make_handlers(label)
+        model = apps.get_model(label)
+        post_save.connect(saved, sender=model, weak=False, dispatch_uid=f'sync_save_{label}')
+        post_delete.connect(deleted, sender=model, weak=False, dispatch_uid=f'sync_delete_{label}')
+
+    for label, (parent_label, fk_attname) in SYNC_PARENTS.items():
+        handler = _make_parent_handler(parent_label, fk_attname)
+        model = apps.get_model(label)
+        post_save.connect(handler, sender=model, weak=False, dispatch_uid=f'sync_parent_save_{label}')
+        # Before the delete, while a deferred foreign key can still be loaded.
+        pre_delete.connect(handler, sender=model, weak=False, dispatch_uid=f'sync_parent_delete_{label}')
+
+
+class TokenExpired(Exception):
+    """The entries after the client's token have been pruned; a full reload is needed."""
+
+
+def settled_entries():
+    """Entries old enough that no lower id can still be committed."""
+    from .models import ChangeLogEntry
+    horizon = timezone.now() - timedelta(seconds=SYNC_SETTLE_SECONDS)
+    return ChangeLogEntry.objects.filter(created_at__lt=horizon)
+
+
+def current_token():
+    return settled_entries().aggregate(last=Max('id'))['last'] or 0
+
+
+def _serialize(queryset, serializer_class, ids, context):
+    queryset = queryset.filter(pk__in=ids)
+    if issubclass(serializer_class, FastReadSerializer):
+        fast = serializer_class(context=context)
+        return fast.serialize(fast.values(queryset))
+    return serializer_class(queryset, many=True, context=context).data
+
+
+def get_changes(since, context, batch_size=SYNC_BATCH_SIZE):
+    """
+    Changes logged after token ``since``, collapsed to the latest action per
+    object. Objects are serialized in one query per model. Only settled
+    entries are returned, so the new token never passes an entry that is
+    still being committed.
+
+    Returns:
+        dict: {'token', 'has_more', 'changes': {label: {'upserted': [...], 'deleted': [ids]}}}
+
+    Raises:
+        TokenExpired: entries newer than ``since`` were pruned
+    """
+    from .models import ChangeLogEntry
+
+    first = ChangeLogEntry.objects.aggregate(first=Min('id'))['first']
+    if first is not None and since < first - 1:
+        raise TokenExpired()
+
+    entries = list(
+        settled_entries().filter(id__gt=since).order_by('id')
+        .values_list('id', 'model', 'object_id', 'action')[:batch_size + 1]
+    )
+    has_more = len(entries) > batch_size
+    entries = entries[:batch_size]
+
+    latest = {}
+    for _, label, object_id, action in entries:
+        latest[(label, object_id)] = action
+
+    sources = sync_sources()
+    changes = {}
+    for label, (queryset, serializer_class) in sources.items():
+        upserted = [object_id for (model, object_id), action in latest.items() if model == label and action == 'upsert']
+        deleted = [object_id for (model, object_id), action in latest.items() if model == label and action == 'delete']
+        if not upserted and not deleted:
+            continue
+
+        pk = queryset.model._meta.pk
+        existing = set(queryset.filter(pk__in=upserted).values_list('pk', flat=True)) if upserted else set()
+        # Upserted rows that are gone by now were deleted after this batch.
+        deleted = [pk.to_python(object_id) for object_id in deleted]
+        deleted += [pk.to_python(object_id) for object_id in upserted if pk.to_python(object_id) not in existing]
+        data = _serialize(queryset, serializer_class, existing, context) if existing else []
+        changes[label] = {'upserted': data, 'deleted': deleted}
+
+    return {
+        'token': entries[-1][0] if entries else max(since, current_token()),
+        'has_more': has_more,
+        'changes': changes,
+    }
+
+
+def prune_change_log(days):
+    """
+    Delete entries older than ``days``. The newest entry is always kept, so
+    expired tokens can still be told apart from an empty log.
+
+    Returns:
+        int: entries deleted
+    """
+    from .models import ChangeLogEntry
+
+    last = current_token()
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = ChangeLogEntry.objects.filter(created_at__lt=cutoff, id__lt=last).delete()
+    return deleted
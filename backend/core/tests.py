@@ -1,3 +1,619 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import default_storage
+from django.core.mail import EmailMessage
+from django.core.mail.backends.locmem import EmailBackend as LocmemEmailBackend
+from django.core.management import call_command
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.request import Request
+from django.urls import resolve
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .db_router import ReplicaRouter, primary_reads, set_replica_reads
+from .mail import MetricsEmailBackend
+from .media import referenced_paths
+from .metrics import prometheus_client
+from .middleware import ReplicaRoutingMiddleware
+from blog.models import BlogPost, Comment
+from library.models import Book, BorrowedBook
+from users.models import CustomUser
+
+from .models import (
+    ChangeLogEntry, DailyStat, Member, Notice, PendingDeletion, RequestProfile, RollupDirtyDay, SlowRequest,
+    ThrottleBucket,
+)
+from .pagination import KeysetPagination
+from .profiling import ProfileRateThrottle, _profile_lock, _slow_thresholds, record_slow_request
+from .serializers import NoticeFastSerializer
+from .storage import MAX_DELETE_ATTEMPTS, DeferredDeleteFileSystemStorage
+from .sync import SYNC_BATCH_SIZE, SYNC_SETTLE_SECONDS
+from .timing import RequestTiming
+from .throttling import CacheSlidingWindowStore, DatabaseGCRAStore
+
+
+def serialize_both(fast_class, queryset, query=None):
+    """Output of the DRF serializer and of its FastReadSerializer, as ordered item lists."""
+    context = {'request': Request(APIRequestFactory().get('/api/core/notices/', query))}
+    expected = fast_class.serializer_class(queryset, many=True, context=context).data
+    fast = fast_class(context=context)
+    actual = fast.serialize(fast.values(queryset))
+    return [list(row.items()) for row in expected], [list(row.items()) for row in actual]
+
+
+class NoticeFastSerializerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Notice.objects.create(title='Annual meeting', content='Agenda attached.', attachment='core/notice/agenda.pdf')
+        Notice.objects.create(title='Holiday', content='', is_active=False)
+
+    def assertParity(self, query=None):
+        expected, actual = serialize_both(NoticeFastSerializer, Notice.objects.order_by('pk'), query)
+        self.assertEqual(actual, expected)
+        return actual
+
+    def test_matches_model_serializer(self):
+        rows = self.assertParity()
+        self.assertEqual(len(rows), 2)
+
+    def test_attachment_url(self):
+        rows = self.assertParity()
+        self.assertEqual(dict(rows[0])['attachment'], 'http://testserver/media/core/notice/agenda.pdf')
+        self.assertIsNone(dict(rows[1])['attachment'])
+
+    def test_sparse_fields(self):
+        rows = self.assertParity({'fields': 'id,title,attachment'})
+        self.assertEqual([key for key, _ in rows[0]], ['id', 'title', 'attachment'])
+
+    def test_omit(self):
+        rows = self.assertParity({'omit': 'content,attachment'})
+        self.assertNotIn('content', dict(rows[0]))
+
+    def test_without_request(self):
+        queryset = Notice.objects.order_by('pk')
+        expected = NoticeFastSerializer.serializer_class(queryset, many=True).data
+        fast = NoticeFastSerializer()
+        self.assertEqual(fast.serialize(fast.values(queryset)), expected)
+
+
+class MediaStorageTestCase(TestCase):
+    """Runs each test against an empty MEDIA_ROOT."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def write_file(self, name, age_hours=48):
+        path = default_storage.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(b'x' * 10)
+        modified = time.time() - age_hours * 3600
+        os.utime(path, (modified, modified))
+        return name
+
+
+class GcMediaTests(MediaStorageTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write_file('core/notice/kept.pdf')
+        self.write_file('core/notice/orphan.pdf')
+        self.write_file('core/notice/fresh.pdf', age_hours=1)
+        self.write_file('core/member/kept.jpg')
+        self.write_file('core/member-old.jpg')
+        self.write_file('root-orphan.txt')
+        self.write_file('root-kept.txt')
+        Notice.objects.create(title='Agenda', attachment='core/notice/kept.pdf')
+        Notice.objects.create(title='Minutes', attachment='root-kept.txt')
+        Member.objects.create(name='Rahim', designation='Secretary', image='core/member/kept.jpg')
+
+    def gc_media(self, *args):
+        out = StringIO()
+        call_command('gc_media', '--workers', '1', *args, stdout=out)
+        return out.getvalue()
+
+    def test_reports_orphans_outside_grace_period(self):
+        out = self.gc_media()
+        orphans = {line.split(': ', 1)[1] for line in out.splitlines() if line.startswith('orphan: ')}
+        self.assertEqual(orphans, {'core/notice/orphan.pdf', 'core/member-old.jpg', 'root-orphan.txt'})
+        self.assertIn('Scanned 7 files: Found 3 orphans', out)
+        self.assertFalse(PendingDeletion.objects.exists())
+
+    def test_grace_period(self):
+        out = self.gc_media('--grace-hours', '72')
+        self.assertIn('Found 0 orphans', out)
+
+    def test_delete_queues_orphans(self):
+        self.gc_media('--delete', '--prefix', 'core')
+        self.assertEqual(
+            set(PendingDeletion.objects.values_list('name', flat=True)),
+            {'core/notice/orphan.pdf', 'core/member-old.jpg'},
+        )
+
+    def test_referenced_paths_are_sorted_and_unique(self):
+        Notice.objects.create(title='Copy', attachment='core/notice/kept.pdf')
+        Notice.objects.create(title='Other', attachment='core/notice/a.pdf')
+        self.assertEqual(
+            list(referenced_paths('core')),
+            ['core/member/kept.jpg', 'core/notice/a.pdf', 'core/notice/kept.pdf'],
+        )
+
+
+class DeferredDeleteTests(MediaStorageTestCase):
+    def test_queues_file_on_commit(self):
+        notice = Notice.objects.create(title='Agenda', attachment=self.write_file('core/notice/agenda.pdf'))
+        with self.captureOnCommitCallbacks(execute=True):
+            notice.delete()
+            self.assertFalse(PendingDeletion.objects.exists())
+        self.assertEqual(list(PendingDeletion.objects.values_list('name', flat=True)), ['core/notice/agenda.pdf'])
+        self.assertTrue(default_storage.exists('core/notice/agenda.pdf'))
+
+    def test_nothing_queued_on_rollback(self):
+        notice = Notice.objects.create(title='Agenda', attachment=self.write_file('core/notice/agenda.pdf'))
+        with self.captureOnCommitCallbacks(execute=False):
+            notice.delete()
+        self.assertFalse(PendingDeletion.objects.exists())
+
+
+class DrainStorageDeletionsTests(MediaStorageTestCase):
+    def setUp(self):
+        super().setUp()
+        self.names = [self.write_file(f'core/notice/{i}.pdf') for i in range(5)]
+        PendingDeletion.objects.bulk_create([PendingDeletion(name=name) for name in self.names])
+
+    def drain(self, *args):
+        out = StringIO()
+        call_command('drain_storage_deletions', *args, stdout=out)
+        return out.getvalue()
+
+    def test_deletes_in_batches(self):
+        delete_many = DeferredDeleteFileSystemStorage.delete_many
+        batches = []
+
+        def record(storage, names):
+            batches.append(sorted(names))
+            return delete_many(storage, names)
+
+        with mock.patch.object(DeferredDeleteFileSystemStorage, 'delete_many', record):
+            out = self.drain('--batch-size', '2')
+
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+        self.assertEqual(sorted(sum(batches, [])), sorted(self.names))
+        self.assertIn('Deleted 5 files (0 failed attempts)', out)
+        self.assertFalse(PendingDeletion.objects.exists())
+        self.assertFalse(any(default_storage.exists(name) for name in self.names))
+
+    def test_failed_deletions_stay_queued(self):
+        def fail_first(storage, names):
+            return {name: 'AccessDenied' for name in names if name == self.names[0]}
+
+        with mock.patch.object(DeferredDeleteFileSystemStorage, 'delete_many', fail_first), \
+                self.assertLogs('core.storage', 'WARNING'):
+            out = self.drain()
+
+        failed = PendingDeletion.objects.get()
+        self.assertEqual(failed.name, self.names[0])
+        self.assertEqual(failed.attempts, MAX_DELETE_ATTEMPTS)
+        self.assertEqual(failed.last_error, 'AccessDenied')
+        self.assertIn(f'Deleted 4 files ({MAX_DELETE_ATTEMPTS} failed attempts)', out)
+
+
+class RollupStatsTests(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.old_day = self.today - timedelta(days=30)
+        self.book = Book.objects.create(title='Gitanjali', author='Rabindranath Tagore', serial_number='KSF-001')
+        self.lend(self.today)
+        self.rollup()
+
+    def lend(self, day):
+        return BorrowedBook.objects.create(book=self.book, borrower_name='Rahim', borrow_date=day, return_date=day)
+
+    def rollup(self):
+        call_command('rollup_stats', '--metric', 'loans', stdout=StringIO())
+
+    def buckets(self):
+        return dict(DailyStat.objects.filter(metric='loans').values_list('day', 'value'))
+
+    def test_backdated_row(self):
+        self.lend(self.old_day)
+        self.rollup()
+        self.assertEqual(self.buckets(), {self.today: 1, self.old_day: 1})
+        self.assertFalse(RollupDirtyDay.objects.exists())
+
+    def test_edited_row(self):
+        loan = self.lend(self.old_day)
+        self.rollup()
+        moved_to = self.old_day - timedelta(days=7)
+        loan.borrow_date = moved_to
+        loan.save()
+        self.rollup()
+        self.assertEqual(self.buckets(), {self.today: 1, moved_to: 1})
+
+    def test_deleted_row(self):
+        self.lend(self.old_day)
+        self.rollup()
+        BorrowedBook.objects.only('pk').get(borrow_date=self.old_day).delete()
+        self.rollup()
+        self.assertEqual(self.buckets(), {self.today: 1})
+
+
+class ThrottleStoreTestCase(TestCase):
+    def hit_at(self, now, key='login:1.2.3.4', limit=3, duration=60):
+        with mock.patch('core.throttling.time.time', return_value=now):
+            return self.store.hit(key, limit, duration)
+
+
+class CacheSlidingWindowStoreTests(ThrottleStoreTestCase):
+    store = CacheSlidingWindowStore()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_limit(self):
+        self.assertEqual([self.hit_at(6000)[0] for _ in range(3)], [True, True, True])
+        self.assertEqual(self.hit_at(6010), (False, 50))
+
+    def test_previous_window_is_weighted(self):
+        for _ in range(3):
+            self.hit_at(6000)
+        # Start of the next window: the full previous window still counts.
+        self.assertFalse(self.hit_at(6060)[0])
+        # Halfway through: 3 * 0.5 + 1 <= 3.
+        self.assertTrue(self.hit_at(6090)[0])
+
+    def test_rejected_requests_are_not_counted(self):
+        for _ in range(10):
+            self.hit_at(6000)
+        self.assertTrue(self.hit_at(6120)[0])
+
+    def test_resets(self):
+        for _ in range(3):
+            self.hit_at(6000)
+        self.assertTrue(self.hit_at(6180)[0])
+        self.assertTrue(self.hit_at(6000, key='login:5.6.7.8')[0])
+
+
+class DatabaseGCRAStoreTests(ThrottleStoreTestCase):
+    store = DatabaseGCRAStore()
+
+    def test_accept_and_reject(self):
+        # limit 2 per 60 s: emission interval 30 s, burst tolerance 60 s.
+        self.assertEqual(self.hit_at(1000, limit=2), (True, None))
+        with self.assertNumQueries(1):
+            self.assertEqual(self.hit_at(1000, limit=2), (True, None))
+        self.assertEqual(ThrottleBucket.objects.get().tat, 1060)
+
+        with self.assertNumQueries(2):
+            self.assertEqual(self.hit_at(1000, limit=2), (False, 30))
+        self.assertEqual(ThrottleBucket.objects.get().tat, 1060)
+        self.assertEqual(self.hit_at(1030, limit=2), (True, None))
+
+    def test_sweeps_expired_buckets(self):
+        ThrottleBucket.objects.create(key='login:expired', tat=900)
+        ThrottleBucket.objects.create(key='login:live', tat=1100)
+        with mock.patch('core.throttling.random.random', return_value=0):
+            self.hit_at(1000)
+        self.assertEqual(
+            set(ThrottleBucket.objects.values_list('key', flat=True)),
+            {'login:live', 'login:1.2.3.4'},
+        )
+
+
+class KeysetPaginationTests(TestCase):
+    def paginate(self, queryset):
+        request = Request(APIRequestFactory().get('/api/library/loans/', {'cursor': ''}))
+        return KeysetPagination().paginate_queryset(queryset, request)
+
+    def test_follows_queryset_ordering(self):
+        for title in ('A', 'B', 'C'):
+            Notice.objects.create(title=title)
+        self.assertEqual([notice.title for notice in self.paginate(Notice.objects.order_by('title'))], ['A', 'B', 'C'])
+
+    def test_rejects_ordering_across_relations(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, "orders by ('book__title',)"):
+            self.paginate(BorrowedBook.objects.order_by('book__title'))
+
+
+class SyncTests(TestCase):
+    url = '/api/sync/'
+
+    def settle(self):
+        # Age every entry past SYNC_SETTLE_SECONDS so it can be handed out.
+        ChangeLogEntry.objects.update(created_at=timezone.now() - timedelta(seconds=SYNC_SETTLE_SECONDS + 1))
+
+    def sync(self, since=None):
+        return self.client.get(self.url, {} if since is None else {'since': since})
+
+    def change(self, func):
+        with self.captureOnCommitCallbacks(execute=True):
+            result = func()
+        self.settle()
+        return result
+
+    def test_token_round_trip(self):
+        token = self.sync().json()['token']
+        notice = self.change(lambda: Notice.objects.create(title='Agenda'))
+        data = self.sync(token).json()
+        self.assertEqual([row['title'] for row in data['changes']['core.Notice']['upserted']], ['Agenda'])
+        self.assertFalse(data['has_more'])
+
+        self.assertEqual(self.sync(data['token']).json()['changes'], {})
+        self.assertEqual(self.sync().json()['token'], data['token'])
+        self.assertEqual(ChangeLogEntry.objects.get().object_id, str(notice.pk))
+
+    def test_unsettled_entries_wait(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Notice.objects.create(title='Agenda')
+        data = self.sync(0).json()
+        self.assertEqual((data['token'], data['changes']), (0, {}))
+
+    def test_latest_action_per_object(self):
+        notice = self.change(lambda: Notice.objects.create(title='Draft'))
+        notice.title = 'Agenda'
+        self.change(notice.save)
+        self.assertEqual(ChangeLogEntry.objects.count(), 2)
+        changes = self.sync(0).json()['changes']['core.Notice']
+        self.assertEqual([row['title'] for row in changes['upserted']], ['Agenda'])
+        self.assertEqual(changes['deleted'], [])
+
+    def test_delete_tombstone(self):
+        notice = self.change(lambda: Notice.objects.create(title='Agenda'))
+        token = self.sync().json()['token']
+        pk = notice.pk
+        self.change(notice.delete)
+        self.assertEqual(self.sync(token).json()['changes']['core.Notice'], {'upserted': [], 'deleted': [pk]})
+        # Created and deleted since the token: only the tombstone is sent.
+        self.assertEqual(self.sync(0).json()['changes']['core.Notice'], {'upserted': [], 'deleted': [pk]})
+
+    def test_child_changes_upsert_parent(self):
+        book = self.change(lambda: Book.objects.create(title='Gitanjali', author='Tagore', serial_number='KSF-001'))
+        author = CustomUser.objects.create_user(email='author@example.com', password=None)
+        post = self.change(lambda: BlogPost.objects.create(title='News', content='...', author=author))
+        token = self.sync().json()['token']
+
+        today = timezone.localdate()
+        loan = self.change(lambda: BorrowedBook.objects.create(book=book, borrower_name='Rahim', borrow_date=today, return_date=today))
+        self.change(lambda: Comment.objects.create(post=post, user=author, text='Congratulations'))
+        changes = self.sync(token).json()['changes']
+        self.assertEqual(changes['library.Book']['upserted'][0]['active_loan']['id'], loan.pk)
+        self.assertEqual(len(changes['blog.BlogPost']['upserted'][0]['comments']), 1)
+
+        token = self.sync().json()['token']
+        self.change(BorrowedBook.objects.only('pk').get().delete)
+        changes = self.sync(token).json()['changes']
+        self.assertIsNone(changes['library.Book']['upserted'][0]['active_loan'])
+
+    def test_has_more(self):
+        ChangeLogEntry.objects.bulk_create([
+            ChangeLogEntry(model='core.Notice', object_id=str(pk), action='delete')
+            for pk in range(1, SYNC_BATCH_SIZE + 2)
+        ])
+        self.settle()
+        first = self.sync(0).json()
+        self.assertTrue(first['has_more'])
+        self.assertEqual(len(first['changes']['core.Notice']['deleted']), SYNC_BATCH_SIZE)
+        second = self.sync(first['token']).json()
+        self.assertFalse(second['has_more'])
+        self.assertEqual(second['changes']['core.Notice']['deleted'], [SYNC_BATCH_SIZE + 1])
+
+    def test_expired_token(self):
+        for title in ('A', 'B', 'C'):
+            self.change(lambda: Notice.objects.create(title=title))
+        token = ChangeLogEntry.objects.order_by('id').first().id
+        call_command('prune_change_log', '--days', '0', stdout=StringIO())
+
+        response = self.sync(token)
+        self.assertEqual(response.status_code, 410)
+        self.assertEqual(response.json()['token'], ChangeLogEntry.objects.get().id)
+        self.assertEqual(self.sync(response.json()['token']).status_code, 200)
+
+    def test_invalid_token(self):
+        self.assertEqual(self.sync('abc').status_code, 400)
+
+
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        self.middleware = ReplicaRoutingMiddleware(lambda request: HttpResponse())
+        self.factory = RequestFactory()
+        for patcher in (
+            mock.patch('core.db_router.healthy_replicas', return_value=['replica1']),
+            mock.patch.object(connections['default'], 'in_atomic_block', False),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(set_replica_reads, False)
+
+    def route(self, request, model=Notice):
+        self.middleware.process_request(request)
+        return ReplicaRouter().db_for_read(model)
+
+    def test_safe_api_reads_use_replica(self):
+        self.assertEqual(self.route(self.factory.get('/api/core/notices/')), 'replica1')
+        self.assertEqual(self.route(self.factory.get('/api/core/notices/'), model=ThrottleBucket), 'default')
+
+    def test_unsafe_requests_use_primary(self):
+        self.assertEqual(self.route(self.factory.post('/api/core/notices/')), 'default')
+
+    def test_non_api_paths_use_primary(self):
+        self.assertEqual(self.route(self.factory.get('/ksf_super_admin/core/notice/')), 'default')
+
+    def test_transactions_use_primary(self):
+        request = self.factory.get('/api/core/notices/')
+        with mock.patch.object(connections['default'], 'in_atomic_block', True):
+            self.assertEqual(self.route(request), 'default')
+
+    def test_primary_reads_block(self):
+        self.middleware.process_request(self.factory.get('/api/core/notices/'))
+        with primary_reads():
+            self.assertEqual(ReplicaRouter().db_for_read(Notice), 'default')
+        self.assertEqual(ReplicaRouter().db_for_read(Notice), 'replica1')
+
+    def test_unsafe_response_sets_deadline(self):
+        request = self.factory.post('/api/core/notices/')
+        response = self.middleware.process_response(request, HttpResponse(status=201))
+        until = float(response['X-Read-Primary-Until'])
+        self.assertAlmostEqual(until, time.time() + settings.READ_YOUR_WRITES_SECONDS, delta=1)
+        self.assertEqual(response.cookies[settings.READ_PRIMARY_COOKIE].value, response['X-Read-Primary-Until'])
+
+        failed = self.middleware.process_response(request, HttpResponse(status=400))
+        self.assertNotIn('X-Read-Primary-Until', failed)
+
+    def test_deadline_pins_reads_to_primary(self):
+        until = time.time() + settings.READ_YOUR_WRITES_SECONDS - 1
+        request = self.factory.get('/api/core/notices/', HTTP_X_READ_PRIMARY_UNTIL=str(until))
+        self.assertEqual(self.route(request), 'default')
+
+        self.factory.cookies[settings.READ_PRIMARY_COOKIE] = str(until)
+        self.assertEqual(self.route(self.factory.get('/api/core/notices/')), 'default')
+
+    def test_expired_or_forged_deadline_is_ignored(self):
+        for until in (time.time() - 1, time.time() + settings.READ_YOUR_WRITES_SECONDS + 60, 'soon'):
+            request = self.factory.get('/api/core/notices/', HTTP_X_READ_PRIMARY_UNTIL=str(until))
+            self.assertEqual(self.route(request), 'replica1')
+
+
+@skipUnless(prometheus_client, 'prometheus_client is not installed')
+@override_settings(REQUEST_TIMING_SAMPLE_RATE=0)
+class MetricsTests(TestCase):
+    url = '/metrics'
+
+    @override_settings(METRICS_TOKEN='s3cret', DEBUG=False)
+    def test_requires_token(self):
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+        self.assertEqual(self.client.get(self.url, HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+        self.assertEqual(self.client.get(self.url, HTTP_AUTHORIZATION='s3cret').status_code, 401)
+        response = self.client.get(self.url, HTTP_AUTHORIZATION='Bearer s3cret')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'http_request_duration_seconds', response.content)
+
+    @override_settings(METRICS_TOKEN='', DEBUG=False)
+    def test_hidden_without_token_outside_debug(self):
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_not_found_without_prometheus_client(self):
+        with mock.patch('core.metrics.prometheus_client', None):
+            response = self.client.get(self.url, HTTP_AUTHORIZATION='Bearer s3cret')
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(EMAIL_DELIVERY_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+    def test_silent_mail_failures_are_counted(self):
+        def outcomes():
+            return {
+                outcome: prometheus_client.REGISTRY.get_sample_value(
+                    'outbound_request_duration_seconds_count', {'service': 'smtp', 'outcome': outcome},
+                ) or 0
+                for outcome in ('ok', 'error')
+            }
+
+        message = EmailMessage('Subject', 'Body', 'from@example.com', ['to@example.com'])
+        before = outcomes()
+        self.assertEqual(MetricsEmailBackend(fail_silently=True).send_messages([message]), 1)
+        with mock.patch.object(LocmemEmailBackend, 'send_messages', return_value=0):
+            self.assertEqual(MetricsEmailBackend(fail_silently=True).send_messages([message]), 0)
+        after = outcomes()
+        self.assertEqual(after['ok'] - before['ok'], 1)
+        self.assertEqual(after['error'] - before['error'], 1)
+
+
+@override_settings(REQUEST_TIMING_SAMPLE_RATE=0)
+class ProfilingTests(TestCase):
+    url = '/api/core/notices/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = CustomUser.objects.create_user(email='staff@example.com', password=None, role='STAFF')
+        cls.member = CustomUser.objects.create_user(email='member@example.com', password=None)
+
+    def get(self, user=None, **extra):
+        if user is not None:
+            extra['HTTP_AUTHORIZATION'] = f'Bearer {AccessToken.for_user(user)}'
+        return self.client.get(self.url, {'profile': '1', 'search': 'Private-Notice-42'}, **extra)
+
+    def test_ignored_for_anonymous_and_non_staff(self):
+        for user in (None, self.member):
+            response = self.get(user)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('X-Profile', response)
+        response = self.client.get(self.url, HTTP_X_PROFILE='1')
+        self.assertNotIn('X-Profile', response)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_stores_profile_without_query_parameters(self):
+        response = self.get(self.staff)
+        self.assertEqual(response['X-Profile'], 'started')
+        profile = RequestProfile.objects.get(pk=response['X-Profile-Id'])
+        self.assertEqual((profile.route, profile.user), ('notice-list', self.staff))
+        notice_queries = [query['sql'] for query in profile.queries if 'core_notice' in query['sql']]
+        self.assertTrue(notice_queries)
+        self.assertFalse(any('Private-Notice-42' in sql for sql in notice_queries))
+        self.assertTrue(any('%s' in sql for sql in notice_queries))
+
+    def test_rate_limited(self):
+        with mock.patch.object(ProfileRateThrottle, 'allow_request', return_value=False):
+            response = self.get(self.staff)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Profile'], 'rate-limited')
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_busy(self):
+        _profile_lock.acquire()
+        try:
+            response = self.get(self.staff)
+        finally:
+            _profile_lock.release()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Profile'], 'busy')
+        self.assertFalse(RequestProfile.objects.exists())
+
+
+@override_settings(SLOW_REQUESTS_PER_ROUTE=3, SLOW_REQUEST_MIN_MS=100)
+class SlowRequestTests(TestCase):
+    def setUp(self):
+        _slow_thresholds.clear()
+        self.addCleanup(_slow_thresholds.clear)
+
+    def record(self, duration_ms, path='/api/core/notices/'):
+        request = RequestFactory().get(path)
+        request.resolver_match = resolve(path)
+        timing = RequestTiming()
+        timing.started -= duration_ms / 1000
+        record_slow_request(request, HttpResponse(), timing)
+
+    def kept(self):
+        return sorted(round(ms, -1) for ms in SlowRequest.objects.values_list('duration_ms', flat=True))
+
+    def test_keeps_slowest_per_route(self):
+        for duration_ms in (50, 300, 200, 600, 400, 100):
+            self.record(duration_ms)
+        self.assertEqual(self.kept(), [300, 400, 600])
+        self.record(700, path='/api/core/members/')
+        self.assertEqual(SlowRequest.objects.filter(route='notice-list').count(), 3)
+        self.assertEqual(SlowRequest.objects.filter(route='member-list').count(), 1)
+
+    def test_rows_leave_the_window(self):
+        for duration_ms in (300, 400, 500):
+            self.record(duration_ms)
+        self.record(200)
+        self.assertEqual(self.kept(), [300, 400, 500])
+
+        later = timezone.now() + timedelta(hours=settings.SLOW_REQUEST_WINDOW_HOURS + 1)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            self.record(200)
+        self.assertEqual(self.kept(), [200])
@@ -0,0 +1,132 @@
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Greatest
+from rest_framework.throttling import AnonRateThrottle, ScopedRateThrottle, SimpleRateThrottle, UserRateThrottle
+
+from .metrics import record_throttle
+
+# Fraction of new-bucket inserts that also sweep expired buckets.
+PRUNE_PROBABILITY = 0.01
+
+
+class CacheSlidingWindowStore:
+    """
+    Sliding-window counter on the shared cache (Redis in production).
+
+    Each key keeps two integers, the current and previous fixed window, and
+    the previous one is weighted by how much of it still overlaps the
+    sliding window. ``cache.incr`` is atomic on Redis and memcached.
+    """
+
+    def hit(self, key, limit, duration):
+        now = time.time()
+        window = int(now // duration)
+        current_key = f'{key}:{window}'
+        previous_key = f'{key}:{window - 1}'
+
+        cache.add(current_key, 0, duration * 2)
+        try:
+            current = cache.incr(current_key)
+        except ValueError:
+            # Expired between add() and incr().
+            cache.set(current_key, 1, duration * 2)
+            current = 1
+        previous = cache.get(previous_key, 0)
+
+        elapsed = now - window * duration
+        estimated = previous * (1 - elapsed / duration) + current
+        if estimated <= limit:
+            return True, None
+
+        # Rejected requests do not consume the allowance.
+        cache.decr(current_key)
+        return False, duration - elapsed
+
+
+class DatabaseGCRAStore:
+    """
+    Generic cell rate algorithm with one ThrottleBucket row per key.
+
+    The row holds the theoretical arrival time (TAT). A request is allowed
+    when max(TAT, now) + T - now <= tau, where T = duration / limit and
+    tau = duration. The check and the increment are a single conditional
+    UPDATE, so concurrent workers cannot over-admit.
+    """
+
+    def hit(self, key, limit, duration):
+        from .models import ThrottleBucket
+
+        now = time.time()
+        interval = duration / limit
+        tolerance = duration
+
+        # max(tat, now) + T <= now + tau  <=>  tat <= now + tau - T  (T <= tau)
+        allowed = ThrottleBucket.objects.filter(key=key, tat__lte=now + tolerance - interval).update(
+            tat=Greatest(F('tat'), Value(now, output_field=FloatField())) + interval
+        )
+        if allowed:
+            return True, None
+
+        tat = ThrottleBucket.objects.filter(key=key).values_list('tat', flat=True).first()
+        if tat is None:
+            try:
+                with transaction.atomic():
+                    ThrottleBucket.objects.create(key=key, tat=now + interval)
+            except IntegrityError:
+                # Another worker created the bucket first; take the normal path.
+                return self.hit(key, limit, duration)
+            if random.random() < PRUNE_PROBABILITY:
+                # A bucket whose TAT has passed is equivalent to no bucket.
+                ThrottleBucket.objects.filter(tat__lt=now).delete()
+            return True, None
+
+        return False, max(0.0, tat + interval - tolerance - now)
+
+
+def get_rate_store():
+    if settings.THROTTLE_STORE == 'cache':
+        return CacheSlidingWindowStore()
+    return DatabaseGCRAStore()
+
+
+class SharedRateThrottle(SimpleRateThrottle):
+    """
+    SimpleRateThrottle backed by a store shared by all workers.
+
+    DRF's default keeps a timestamp list per key in the (per-process)
+    default cache, so N gunicorn workers allow N times the configured rate.
+    This uses THROTTLE_STORE instead, with O(1) state per key.
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        allowed, self._wait = get_rate_store().hit(self.key, self.num_requests, self.duration)
+        if not allowed:
+            record_throttle(self.scope)
+        return allowed
+
+    def wait(self):
+        return getattr(self, '_wait', None)
+
+
+class SharedAnonRateThrottle(AnonRateThrottle, SharedRateThrottle):
+    pass
+
+
+class SharedUserRateThrottle(UserRateThrottle, SharedRateThrottle):
+    pass
+
+
+class SharedScopedRateThrottle(ScopedRateThrottle, SharedRateThrottle):
+    pass
@@ -0,0 +1,152 @@
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.utils.regex_helper import _lazy_re_compile
+
+# Literals that vary between otherwise identical queries.
+re_in_list = _lazy_re_compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+re_string = _lazy_re_compile(r"'(?:[^']|'')*'")
+re_number = _lazy_re_compile(r'\b\d+(?:\.\d+)?\b')
+re_select_list = _lazy_re_compile(r'^SELECT .*? FROM ', re.DOTALL)
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('request_timing', default=None)
+
+
+def query_shape(sql):
+    """``sql`` with IN lists, strings and numbers replaced, for grouping."""
+    sql = re_in_list.sub('(...)', sql)
+    sql = re_string.sub('?', sql)
+    return re_number.sub('?', sql)
+
+
+def short_sql(sql, limit=300):
+    """``sql`` without its column list, for logs."""
+    return re_select_list.sub('SELECT ... FROM ', sql)[:limit]
+
+
+class RequestTiming:
+    """
+    Query count, DB time, serializer time and render time of one request.
+
+    Phase times exclude the queries run inside them (lazy loads during
+    serialization count as DB time), so the parts do not overlap.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db = 0.0
+        self.phases = {'serialize': 0.0, 'render': 0.0}
+        self.shapes = Counter()
+        self._depth = Counter()
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started
+            self.queries += 1
+            self.shapes[query_shape(sql)] += 1
+
+    @contextmanager
+    def instrument_queries(self):
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(self.record_query))
+            yield
+
+    @contextmanager
+    def phase(self, name):
+        # Nested serializers run inside their parent; only the outermost counts.
+        if self._depth[name]:
+            yield
+            return
+        self._depth[name] += 1
+        started, db_before = time.perf_counter(), self.db
+        try:
+            yield
+        finally:
+            self._depth[name] -= 1
+            self.phases[name] += (time.perf_counter() - started) - (self.db - db_before)
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def repeated_queries(self):
+        """[(shape, count)] of the query shapes run N_PLUS_ONE_THRESHOLD or more times."""
+        return [
+            (shape, count) for shape, count in self.shapes.most_common()
+            if count >= settings.N_PLUS_ONE_THRESHOLD
+        ]
+
+    def server_timing(self):
+        """Value of the Server-Timing header (durations in milliseconds)."""
+        return ', '.join([
+            f'db;dur={self.db * 1000:.1f};desc="{self.queries} queries"',
+            f'serialize;dur={self.phases["serialize"] * 1000:.1f}',
+            f'render;dur={self.phases["render"] * 1000:.1f}',
+            f'total;dur={self.elapsed() * 1000:.1f}',
+        ])
+
+
+def start_request_timing():
+    timing = RequestTiming()
+    _current.set(timing)
+    return timing
+
+
+def stop_request_timing():
+    _current.set(None)
+
+
+@contextmanager
+def phase(name):
+    """Attribute the time spent in the block to ``name`` ('serialize' or 'render')."""
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    with timing.phase(name):
+        yield
+
+
+def view_name(request):
+    """'BookViewSet.list' for DRF views, the dotted view path otherwise."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+    cls = getattr(match.func, 'cls', None) or getattr(match.func, 'view_class', None)
+    if cls is None:
+        return match._func_path
+    action = (getattr(match.func, 'actions', None) or {}).get(request.method.lower())
+    return f'{cls.__name__}.{action}' if action else cls.__name__
+
+
+def log_request_timing(request, response, timing, repeated=()):
+    view = view_name(request)
+    sample = {
+        'view': view,
+        'route': getattr(request.resolver_match, 'route', None),
+        'method': request.method,
+        'status': response.status_code,
+        'total_ms': round(timing.elapsed() * 1000, 1),
+        'db_ms': round(timing.db * 1000, 1),
+        'queries': timing.queries,
+        'serialize_ms': round(timing.phases['serialize'] * 1000, 1),
+        'render_ms': round(timing.phases['render'] * 1000, 1),
+    }
+    if repeated:
+        sample['repeated_queries'] = [{'count': count, 'sql': short_sql(shape)} for shape, count in repeated]
+        for shape, count in repeated:
+            logger.warning("Possible N+1 in %s: %d x %s", view, count, short_sql(shape))
+    logger.info(json.dumps(sample))
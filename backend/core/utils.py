@@ -1,6 +1,16 @@
 import os
 import uuid
 
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def cache_is_shared(alias='default'):
+    """Whether the cache is shared by all workers (not per-process LocMem or dummy)."""
+    return not isinstance(caches[alias], (LocMemCache, DummyCache))
+
+
 def get_file_path(instance, filename):
     """
     Generates a unique file path using UUID.
@@ -0,0 +1,94 @@
+from django.apps import apps
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+# Models whose changes are tracked in ContentVersion rows. They serve as HTTP
+# validators for models without ``updated_at`` (core.mixins) and as the cheap
+# change check of the dashboard event stream (core.events).
+VERSIONED_MODELS = [
+    'users.CustomUser',
+    'core.Notice',
+    'core.Member',
+    'core.CarouselItem',
+    'core.ContactMessage',
+    'library.Book',
+    'library.BorrowedBook',
+    'health.HealthCamp',
+    'blog.BlogPost',
+    'blog.Comment',
+]
+
+# Saves limited (update_fields) to these columns do not count as a change:
+# they appear in no versioned output and happen on every login.
+UNVERSIONED_FIELDS = {
+    'users.CustomUser': {'last_login', 'password'},
+}
+
+
+def is_versioned_save(label, update_fields):
+    """False for a save of ``label`` that only wrote UNVERSIONED_FIELDS."""
+    return not update_fields or not set(update_fields) <= UNVERSIONED_FIELDS.get(label, set())
+
+
+def bump_version(label):
+    """Increment the ContentVersion of ``label`` (e.g. 'core.Member')."""
+    from .models import ContentVersion
+
+    updated = ContentVersion.objects.filter(label=label).update(version=F('version') + 1, updated_at=timezone.now())
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            ContentVersion.objects.create(label=label, version=1)
+    except IntegrityError:
+        # Another request created the row first.
+        ContentVersion.objects.filter(label=label).update(version=F('version') + 1, updated_at=timezone.now())
+
+
+def version_total(labels):
+    """
+    Sum of the ContentVersion counters of ``labels``. Counters only grow, so
+    the total changes whenever any of the models changed.
+    """
+    from .models import ContentVersion
+    return ContentVersion.objects.filter(label__in=labels).aggregate(total=Sum('version'))['total'] or 0
+
+
+def get_versions(labels):
+    """
+    Current ContentVersion of each label, in one query.
+
+    Returns:
+        dict: {label: (version, updated_at)}; (0, None) if never changed
+    """
+    from .models import ContentVersion
+
+    unknown = set(labels) - set(VERSIONED_MODELS)
+    if unknown:
+        raise ImproperlyConfigured(
+            f"{', '.join(sorted(unknown))} must be listed in core.versions.VERSIONED_MODELS."
+        )
+    rows = {
+        label: (version, updated_at)
+        for label, version, updated_at in ContentVersion.objects.filter(label__in=labels).values_list('label', 'version', 'updated_at')
+    }
+    return {label: rows.get(label, (0, None)) for label in labels}
+
+
+def _make_handler(label):
+    def handler(sender, **kwargs):
+        if kwargs.get('raw') or not is_versioned_save(label, kwargs.get('update_fields')):
+            return
+        bump_version(label)
+    return handler
+
+
+def connect_versions():
+    for label in VERSIONED_MODELS:
+        model = apps.get_model(label)
+        handler = _make_handler(label)
+        post_save.connect(handler, sender=model, weak=False, dispatch_uid=f'version_save_{label}')
+        post_delete.connect(handler, sender=model, weak=False, dispatch_uid=f'version_delete_{label}')
@@ -1,18 +1,41 @@
-from rest_framework import viewsets, permissions, filters
+from rest_framework import viewsets, permissions, filters, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from .models import Notice, Member, CarouselItem, ContactMessage
-from .serializers import NoticeSerializer, MemberSerializer, CarouselItemSerializer, ContactMessageSerializer
+from .serializers import NoticeSerializer, NoticeFastSerializer, MemberSerializer, CarouselItemSerializer, ContactMessageSerializer
 from users.permissions import IsAdminOrStaffOrReadOnly, IsAdminOrStaff
 from django.core.mail import send_mail
 from django.conf import settings
 from .pagination import StandardPagination
+from .mixins import ConditionalGetMixin, FastListMixin, NDJSONExportMixin, SparseFieldsetMixin, StatementTimeoutMixin
+from .sync import TokenExpired, current_token, get_changes
 
-class NoticeViewSet(viewsets.ModelViewSet):
+def contact_notification(instance):
+    """Subject and body of the email sent to admins and staff for a new contact message."""
+    subject = f"New Contact Message: {instance.subject}"
+    message = f"""You received a new contact message from your website.
+
+From: {instance.name}
+Email: {instance.email}
+Subject: {instance.subject}
+
+Message:
+{instance.message}
+
+---
+This is an automated notification from the KS Foundation website.
+"""
+    return subject, message
+
+class NoticeViewSet(StatementTimeoutMixin, ConditionalGetMixin, SparseFieldsetMixin, NDJSONExportMixin, FastListMixin, viewsets.ModelViewSet):
     queryset = Notice.objects.all().order_by('-created_at')
     serializer_class = NoticeSerializer
+    fast_serializer_class = NoticeFastSerializer
     permission_classes = [IsAdminOrStaffOrReadOnly]
     pagination_class = StandardPagination
     filter_backends = [filters.SearchFilter]
     search_fields = ['title', 'content']
+    statement_timeouts = {'list': 2000}
 
     def get_queryset(self):
         queryset = Notice.objects.all().order_by('-created_at')
@@ -25,33 +48,45 @@ class NoticeViewSet(viewsets.ModelViewSet):
         
         return queryset
 
-class MemberViewSet(viewsets.ModelViewSet):
+class MemberViewSet(StatementTimeoutMixin, ConditionalGetMixin, SparseFieldsetMixin, NDJSONExportMixin, viewsets.ModelViewSet):
     queryset = Member.objects.all().order_by('order')
     serializer_class = MemberSerializer
+    conditional_timestamp_field = None
     permission_classes = [IsAdminOrStaffOrReadOnly]
     pagination_class = StandardPagination
     filter_backends = [filters.SearchFilter]
     search_fields = ['name', 'email', 'contact_number']
+    statement_timeouts = {'list': 2000}
 
-class CarouselItemViewSet(viewsets.ModelViewSet):
+class CarouselItemViewSet(ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = CarouselItem.objects.all().order_by('order')
     serializer_class = CarouselItemSerializer
+    conditional_timestamp_field = None
     permission_classes = [IsAdminOrStaffOrReadOnly]
 
 from .pagination import StandardPagination
 from rest_framework import filters
 
-class ContactMessageViewSet(viewsets.ModelViewSet):
+class ContactMessageViewSet(StatementTimeoutMixin, ConditionalGetMixin, SparseFieldsetMixin, NDJSONExportMixin, viewsets.ModelViewSet):
     queryset = ContactMessage.objects.all().order_by('-created_at')
     serializer_class = ContactMessageSerializer
+    conditional_timestamp_field = None
     pagination_class = StandardPagination
+    pagination_mode = 'nocount'
     filter_backends = [filters.SearchFilter]
     search_fields = ['name', 'email', 'subject']
+    statement_timeouts = {'list': 5000}
     
     def get_permissions(self):
         if self.action == 'create':
             return [permissions.AllowAny()]
         return [IsAdminOrStaff()] # Only admins/staff can view/delete
+
+    def get_throttles(self):
+        # Only public submissions are rate limited by the 'contact' scope
+        if self.action == 'create':
+            self.throttle_scope = 'contact'
+        return super().get_throttles()
     
     def create(self, request, *args, **kwargs):
         # Verify reCAPTCHA
@@ -84,19 +119,7 @@ class ContactMessageViewSet(viewsets.ModelViewSet):
             )
             
             if admin_staff_emails:
-                subject = f"New Contact Message: {instance.subject}"
-                message = f"""You received a new contact message from your website.
-
-From: {instance.name}
-Email: {instance.email}
-Subject: {instance.subject}
-
-Message:
-{instance.message}
-
----
-This is an automated notification from the KS Foundation website.
-"""
+                subject, message = contact_notification(instance)
                 send_mail(
                     subject,
                     message,
@@ -107,3 +130,37 @@ This is an automated notification from the KS Foundation website.
         except Exception as e:
             print(f"Failed to send email notification: {e}")
 
+
+class SyncView(APIView):
+    """
+    Delta sync for offline-capable clients.
+
+    GET /api/sync/ returns the current token. GET /api/sync/?since=<token>
+    returns the objects created, updated or deleted since then and a new
+    token; keep calling while ``has_more`` is true. Changes are listed a
+    few seconds after they commit (core.sync.SYNC_SETTLE_SECONDS). 410 means
+    the token is older than the retained change log and the lists must be
+    reloaded.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        since = request.query_params.get('since')
+        if since is None:
+            return Response({'token': current_token(), 'has_more': False, 'changes': {}})
+
+        try:
+            since = int(since)
+        except ValueError:
+            return Response({"error": "since must be a token returned by this endpoint"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            return Response(get_changes(since, self.get_serializer_context()))
+        except TokenExpired:
+            return Response(
+                {"error": "Sync token expired, reload all data", "token": current_token()},
+                status=status.HTTP_410_GONE,
+            )
+
+    def get_serializer_context(self):
+        return {'request': self.request, 'view': self}
@@ -1,7 +1,8 @@
 from rest_framework import serializers
+from core.serializers import SparseFieldsMixin
 from .models import HealthCamp
 
-class HealthCampSerializer(serializers.ModelSerializer):
+class HealthCampSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = HealthCamp
         fields = '__all__'
@@ -3,15 +3,17 @@ from .models import HealthCamp
 from .serializers import HealthCampSerializer
 from users.permissions import IsAdminOrStaffOrReadOnly
 from core.pagination import StandardPagination
+from core.mixins import ConditionalGetMixin, NDJSONExportMixin, SparseFieldsetMixin, StatementTimeoutMixin
 from django.utils import timezone
 
-class HealthCampViewSet(viewsets.ModelViewSet):
+class HealthCampViewSet(StatementTimeoutMixin, ConditionalGetMixin, SparseFieldsetMixin, NDJSONExportMixin, viewsets.ModelViewSet):
     queryset = HealthCamp.objects.all().order_by('-date_time')
     serializer_class = HealthCampSerializer
     permission_classes = [IsAdminOrStaffOrReadOnly]
     pagination_class = StandardPagination
     filter_backends = [filters.SearchFilter]
     search_fields = ['title', 'location', 'doctor_name']
+    statement_timeouts = {'list': 2000}
 
     def get_queryset(self):
         queryset = HealthCamp.objects.all().order_by('-date_time')
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 from pathlib import Path
 import os
 from datetime import timedelta
+from corsheaders.defaults import default_headers
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -160,6 +161,7 @@ JAZZMIN_SETTINGS = {
         "core.Member": "fas fa-user-tie",
         "core.CarouselItem": "fas fa-images",
         "core.ContactMessage": "fas fa-envelope",
+        "core.PendingDeletion": "fas fa-trash-alt",
 
         "library.Book": "fas fa-book",
         "library.BorrowedBook": "fas fa-book-reader",
@@ -197,6 +199,10 @@ JAZZMIN_SETTINGS = {
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.RequestTimingMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -204,6 +210,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'ks_foundation_project.urls'
@@ -247,9 +254,61 @@ else:
             'PASSWORD': os.getenv('DB_PASSWORD', ''),
             'HOST': os.getenv('DB_HOST', 'localhost'),
             'PORT': os.getenv('DB_PORT', '5432'),
+            # Every query is cancelled after DB_STATEMENT_TIMEOUT ms; views
+            # set tighter budgets with core.mixins.StatementTimeoutMixin.
+            'OPTIONS': {
+                'options': '-c statement_timeout=%d' % int(os.getenv('DB_STATEMENT_TIMEOUT', 30000)),
+            },
         }
     }
 
+    # Connections. With DB_POOL each worker keeps a psycopg pool of
+    # DB_POOL_MIN_SIZE..DB_POOL_MAX_SIZE connections and a request waits at
+    # most DB_POOL_TIMEOUT seconds for one (then 503). Without it connections
+    # are kept for DB_CONN_MAX_AGE seconds and health-checked before reuse.
+    if os.getenv('DB_POOL', 'False').lower() in ('true', '1', 'yes'):
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', 5)),
+        }
+    else:
+        DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('DB_CONN_MAX_AGE', 60))
+        DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
+# Read replicas (core.db_router). Safe-method API requests read from a
+# replica; writes, transactions and clients that wrote in the last
+# READ_YOUR_WRITES_SECONDS use the primary. DB_REPLICA_HOSTS is a
+# comma-separated list of PostgreSQL standbys with the primary's database and
+# credentials. For local testing, DB_REPLICA_SQLITE names a copy of the SQLite
+# database (cp db.sqlite3 db-replica.sqlite3) in DEBUG.
+if DEBUG:
+    _replicas = [
+        {**DATABASES['default'], 'NAME': name}
+        for name in os.getenv('DB_REPLICA_SQLITE', '').split(',') if name
+    ]
+else:
+    _replicas = [
+        {**DATABASES['default'], 'HOST': host, 'OPTIONS': {**DATABASES['default']['OPTIONS'], 'connect_timeout': 2}}
+        for host in os.getenv('DB_REPLICA_HOSTS', '').split(',') if host
+    ]
+for _number, _replica in enumerate(_replicas, 1):
+    # Tests run against the primary only.
+    DATABASES[f'replica{_number}'] = {**_replica, 'TEST': {'MIRROR': 'default'}}
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+
+# Replicas more than REPLICA_MAX_LAG seconds behind (or unreachable) get no
+# reads until they catch up; each worker checks every REPLICA_LAG_CHECK_INTERVAL.
+REPLICA_MAX_LAG = float(os.getenv('REPLICA_MAX_LAG', 10))
+REPLICA_LAG_CHECK_INTERVAL = float(os.getenv('REPLICA_LAG_CHECK_INTERVAL', 5))
+READ_YOUR_WRITES_SECONDS = int(os.getenv('READ_YOUR_WRITES_SECONDS', 15))
+READ_PRIMARY_COOKIE = 'read_primary_until'
+
+# Retry-After (seconds) of the 503 sent when a query hits its statement
+# timeout or the connection pool is exhausted (core.database).
+DB_BUSY_RETRY_AFTER = int(os.getenv('DB_BUSY_RETRY_AFTER', 5))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -270,6 +329,28 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing runs on a bounded per-process pool (users.hashers) so a
+# burst of logins cannot starve other requests; excess requests get a 503
+# with Retry-After once they have waited PASSWORD_HASH_QUEUE_TIMEOUT seconds.
+# With sync gunicorn workers (one request per process) only the cross-worker
+# limit PASSWORD_HASH_MAX_IN_FLIGHT has any effect, and it needs a shared
+# cache (REDIS_URL); keep it below the worker count.
+PASSWORD_HASHERS = [
+    'users.hashers.IsolatedPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+PASSWORD_HASH_QUEUE_SIZE = int(os.getenv('PASSWORD_HASH_QUEUE_SIZE', 8))
+PASSWORD_HASH_QUEUE_TIMEOUT = float(os.getenv('PASSWORD_HASH_QUEUE_TIMEOUT', 2))
+PASSWORD_HASH_RETRY_AFTER = int(os.getenv('PASSWORD_HASH_RETRY_AFTER', 5))
+PASSWORD_HASH_MAX_IN_FLIGHT = int(os.getenv('PASSWORD_HASH_MAX_IN_FLIGHT', 4))
+PASSWORD_HASH_SLOT_TTL = int(os.getenv('PASSWORD_HASH_SLOT_TTL', 30))
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/6.0/topics/i18n/
 
@@ -308,7 +389,8 @@ if USE_SPACES:
     
     STORAGES = {
         "default": {
-            "BACKEND": "storages.backends.s3.S3Storage",
+            # S3Storage that queues deletes for drain_storage_deletions
+            "BACKEND": "core.storage.DeferredDeleteS3Storage",
             "OPTIONS": {
                 "access_key": AWS_ACCESS_KEY_ID,
                 "secret_key": AWS_SECRET_ACCESS_KEY,
@@ -330,28 +412,136 @@ else:
     MEDIA_URL = '/media/'
     MEDIA_ROOT = BASE_DIR / 'media'
 
+    STORAGES = {
+        "default": {
+            "BACKEND": "core.storage.DeferredDeleteFileSystemStorage",
+        },
+        "staticfiles": {
+            "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+        },
+    }
+
 
 # Custom User Model
 AUTH_USER_MODEL = 'users.CustomUser'
 
 # REST Framework Configuration
 REST_FRAMEWORK = {
+    'EXCEPTION_HANDLER': 'core.database.database_exception_handler',
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.ClaimsJWTAuthentication'
+        if os.getenv('JWT_USER_LOOKUP') == 'claims'
+        else 'users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
+    # orjson-backed when installed, stdlib json otherwise; same output either way
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle'
+        'core.throttling.SharedAnonRateThrottle',
+        'core.throttling.SharedUserRateThrottle',
+        'core.throttling.SharedScopedRateThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '60/minute',
-        'user': '1000/day'
+        'user': '1000/day',
+        # Scoped rates, applied to views with a matching `throttle_scope`
+        'login': '10/minute',
+        'register': '5/hour',
+        'password-reset': '5/hour',
+        'contact': '5/hour',
+        'profile': '20/hour',
+    }
+}
+
+# Cache
+# Set REDIS_URL to share the cache (throttles, dashboard stats, JWT users)
+# between gunicorn workers (requires the `redis` package). Without it each
+# worker has its own LocMem cache.
+REDIS_URL = os.getenv('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
     }
+
+# Where throttle counters live: 'cache' (sliding window, needs a shared cache
+# such as Redis) or 'database' (GCRA rows in core.ThrottleBucket).
+THROTTLE_STORE = os.getenv('THROTTLE_STORE', 'cache' if REDIS_URL else 'database')
+
+# Responses smaller than this many bytes are not compressed by
+# core.middleware.CompressionMiddleware (brotli if installed, else gzip).
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+
+# Days of change log kept for /api/sync/ (prune with `manage.py prune_change_log`).
+# Clients with an older token get 410 and reload everything.
+SYNC_CHANGE_LOG_RETENTION_DAYS = int(os.getenv('SYNC_CHANGE_LOG_RETENTION_DAYS', 30))
+
+# Request instrumentation (core.middleware.RequestTimingMiddleware). Staff
+# responses, and all responses in DEBUG, carry a Server-Timing header with the
+# query count and DB, serializer and render time. REQUEST_TIMING_SAMPLE_RATE of
+# requests are logged as JSON on the core.timing logger, plus every request
+# that runs one query shape N_PLUS_ONE_THRESHOLD or more times (likely N+1).
+REQUEST_TIMING_SAMPLE_RATE = float(os.getenv('REQUEST_TIMING_SAMPLE_RATE', 0.01))
+N_PLUS_ONE_THRESHOLD = int(os.getenv('N_PLUS_ONE_THRESHOLD', 5))
+
+# Prometheus metrics at /metrics (core.metrics), scraped with
+# `Authorization: Bearer <METRICS_TOKEN>`; without a token only in DEBUG. With
+# several gunicorn workers, point PROMETHEUS_MULTIPROC_DIR at an empty
+# directory (cleared on every deploy) so all workers are aggregated.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Staff request profiling (core.middleware.ProfilingMiddleware): ?profile=1
+# stores a sampled profile with its SQL in the admin, ?profile=folded returns
+# it. Limited by the 'profile' throttle rate. The SLOW_REQUESTS_PER_ROUTE
+# slowest requests of each route in the last SLOW_REQUEST_WINDOW_HOURS taking
+# SLOW_REQUEST_MIN_MS or more are kept for the admin too.
+SLOW_REQUESTS_PER_ROUTE = int(os.getenv('SLOW_REQUESTS_PER_ROUTE', 10))
+SLOW_REQUEST_MIN_MS = float(os.getenv('SLOW_REQUEST_MIN_MS', 500))
+SLOW_REQUEST_WINDOW_HOURS = float(os.getenv('SLOW_REQUEST_WINDOW_HOURS', 24))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.timing': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
 }
 
+# Build public list responses (books, notices) from .values() rows with the
+# compiled serializers in core.fastserializers instead of DRF model serializers.
+# Parity with the DRF serializers is covered by the core and library tests.
+FAST_READ_SERIALIZERS = os.getenv('FAST_READ_SERIALIZERS', 'True').lower() in ('true', '1', 'yes')
+
+# Dashboard Stats
+# 'aggregate' runs one conditional-aggregation query per table and caches the
+# result for DASHBOARD_STATS_CACHE_TTL seconds. 'counters' reads signal-maintained
+# DashboardCounter rows (rebuild with `manage.py rebuild_dashboard_counters`).
+DASHBOARD_STATS_MODE = os.getenv('DASHBOARD_STATS_MODE', 'aggregate')
+DASHBOARD_STATS_CACHE_TTL = int(os.getenv('DASHBOARD_STATS_CACHE_TTL', 30))
+
+# Dashboard event stream (/api/auth/dashboard/events/, served by the ASGI app,
+# e.g. `gunicorn -k uvicorn.workers.UvicornWorker ks_foundation_project.asgi`).
+# Each worker checks the change counters this often for changes made by other
+# workers; changes in the same worker are pushed immediately.
+DASHBOARD_EVENTS_POLL_INTERVAL = float(os.getenv('DASHBOARD_EVENTS_POLL_INTERVAL', 3))
+DASHBOARD_EVENTS_KEEPALIVE = 15
+
 # CORS Configuration
 # CORS Configuration
 # Allow all origins only in DEBUG mode
@@ -360,6 +550,11 @@ CORS_ALLOW_ALL_ORIGINS = DEBUG
 if not DEBUG:
     CORS_ALLOWED_ORIGINS = os.getenv('CORS_ALLOWED_ORIGINS', 'http://localhost:5173').split(',')
 
+# Read-your-writes deadline (core.middleware.ReplicaRoutingMiddleware) and
+# staff profiling (core.middleware.ProfilingMiddleware).
+CORS_ALLOW_HEADERS = (*default_headers, 'x-read-primary-until', 'x-profile')
+CORS_EXPOSE_HEADERS = ['X-Read-Primary-Until', 'X-Profile', 'X-Profile-Id']
+
 CSRF_TRUSTED_ORIGINS = os.getenv('CSRF_TRUSTED_ORIGINS', 'http://localhost:5173').split(',')
 # CORS_ALLOWED_ORIGINS = [
 #     "http://localhost:5173",
@@ -373,11 +568,21 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Seconds a user loaded by CachedJWTAuthentication is served from the cache.
+# Saves and deletes invalidate it. Only used with a shared cache (REDIS_URL),
+# since invalidations of a per-process cache never reach the other workers.
+AUTH_USER_CACHE_TTL = int(os.getenv('AUTH_USER_CACHE_TTL', 60 if REDIS_URL else 0))
+
 # Email Configuration
-EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+# Deliveries go through EMAIL_DELIVERY_BACKEND; the wrapper times them for /metrics.
+EMAIL_BACKEND = 'core.mail.MetricsEmailBackend'
+EMAIL_DELIVERY_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
 EMAIL_HOST = os.getenv('EMAIL_HOST', 'smtp-relay.brevo.com')
 EMAIL_PORT = int(os.getenv('EMAIL_PORT', 587))
 EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'True').lower() in ('true', '1', 'yes')
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'no-reply@ksfoundation.console.bd')
+
+# Seconds an email verification link stays valid (default: 3 days)
+EMAIL_VERIFICATION_TOKEN_MAX_AGE = int(os.getenv('EMAIL_VERIFICATION_TOKEN_MAX_AGE', 3 * 24 * 60 * 60))
@@ -2,6 +2,8 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from core.metrics import metrics_view
+from core.views import SyncView
 
 urlpatterns = [
     path('ksf_super_admin/', admin.site.urls),
@@ -10,4 +12,7 @@ urlpatterns = [
     path('api/health/', include('health.urls')),
     path('api/core/', include('core.urls')),
     path('api/blog/', include('blog.urls')),
+    path('api/sync/', SyncView.as_view(), name='sync'),
+    path('api/async/', include('core.async_urls')),
+    path('metrics', metrics_view, name='metrics'),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
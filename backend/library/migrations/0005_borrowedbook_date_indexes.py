@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-19 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0004_alter_book_cover_image'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='borrowedbook',
+            name='borrow_date',
+            field=models.DateField(db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='borrowedbook',
+            name='returned_date',
+            field=models.DateField(blank=True, db_index=True, null=True),
+        ),
+    ]
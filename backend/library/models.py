@@ -45,10 +45,10 @@ class Book(models.Model):
 class BorrowedBook(models.Model):
     book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='borrowed_records')
     borrower_name = models.CharField(max_length=255)
-    borrow_date = models.DateField()
+    borrow_date = models.DateField(db_index=True)
     return_date = models.DateField()
     is_returned = models.BooleanField(default=False)
-    returned_date = models.DateField(blank=True, null=True)
+    returned_date = models.DateField(blank=True, null=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -1,3 +1,70 @@
+import datetime
+
 from django.test import TestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from .models import Book, BorrowedBook
+from .serializers import BookFastSerializer
+
+
+class BookFastSerializerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        today = datetime.date(2026, 1, 15)
+        cls.loaned = Book.objects.create(
+            title='Gitanjali', bengali_title='গীতাঞ্জলি', author='Rabindranath Tagore',
+            category='Literature', serial_number='KSF-001', cover_image='library/book/gitanjali.jpg', quantity=2,
+        )
+        cls.returned = Book.objects.create(title='Padma Nadir Majhi', author='Manik Bandopadhyay', serial_number='KSF-002')
+        cls.unloaned = Book.objects.create(title='Pather Panchali', author='Bibhutibhushan Bandyopadhyay', serial_number='KSF-003')
+
+        BorrowedBook.objects.create(book=cls.loaned, borrower_name='Rahim', borrow_date=today, return_date=today)
+        BorrowedBook.objects.create(book=cls.loaned, borrower_name='Karim', borrow_date=today, return_date=today)
+        BorrowedBook.objects.create(
+            book=cls.returned, borrower_name='Salma', borrow_date=today, return_date=today,
+            is_returned=True, returned_date=today,
+        )
+
+    def serialize_both(self, query=None):
+        queryset = Book.objects.order_by('pk')
+        context = {'request': Request(APIRequestFactory().get('/api/library/books/', query))}
+        expected = BookFastSerializer.serializer_class(queryset, many=True, context=context).data
+        fast = BookFastSerializer(context=context)
+        actual = fast.serialize(fast.values(queryset))
+        return [list(row.items()) for row in expected], [list(row.items()) for row in actual]
+
+    def test_matches_model_serializer(self):
+        expected, actual = self.serialize_both()
+        self.assertEqual(actual, expected)
+        self.assertEqual(len(actual), 3)
+
+    def test_active_loan(self):
+        _, actual = self.serialize_both()
+        loaned, returned, unloaned = (dict(row) for row in actual)
+        # The oldest unreturned loan, as in BookSerializer.get_active_loan.
+        self.assertEqual(loaned['active_loan']['borrower_name'], 'Rahim')
+        self.assertEqual(loaned['active_loan']['book_title'], 'Gitanjali')
+        self.assertIsNone(returned['active_loan'])
+        self.assertIsNone(unloaned['active_loan'])
+
+    def test_cover_image(self):
+        _, actual = self.serialize_both()
+        self.assertEqual(dict(actual[0])['cover_image'], 'http://testserver/media/library/book/gitanjali.jpg')
+        self.assertIsNone(dict(actual[1])['cover_image'])
+
+    def test_sparse_fields(self):
+        expected, actual = self.serialize_both({'fields': 'id,title,active_loan'})
+        self.assertEqual(actual, expected)
+        self.assertEqual({key for key, _ in actual[0]}, {'id', 'title', 'active_loan'})
+
+    def test_omit(self):
+        expected, actual = self.serialize_both({'omit': 'description,active_loan'})
+        self.assertEqual(actual, expected)
+        self.assertNotIn('active_loan', dict(actual[0]))
 
-# Create your tests here.
+    def test_list_endpoint(self):
+        with self.settings(FAST_READ_SERIALIZERS=False):
+            expected = self.client.get('/api/library/books/').json()
+        actual = self.client.get('/api/library/books/').json()
+        self.assertEqual(actual, expected)
@@ -2,18 +2,24 @@ from rest_framework import viewsets, filters, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from .models import Book, BorrowedBook
-from .serializers import BookSerializer, BorrowedBookSerializer
+from .serializers import BookSerializer, BookFastSerializer, BorrowedBookSerializer
 from users.permissions import IsAdminOrStaffOrReadOnly
 from django.utils import timezone
 from core.pagination import StandardPagination
+from core.mixins import ConditionalGetMixin, FastListMixin, NDJSONExportMixin, SparseFieldsetMixin, StatementTimeoutMixin
 
-class BookViewSet(viewsets.ModelViewSet):
+class BookViewSet(StatementTimeoutMixin, ConditionalGetMixin, SparseFieldsetMixin, NDJSONExportMixin, FastListMixin, viewsets.ModelViewSet):
     queryset = Book.objects.all().order_by('-created_at')
     serializer_class = BookSerializer
+    fast_serializer_class = BookFastSerializer
+    conditional_dependencies = ('library.BorrowedBook',)
     permission_classes = [IsAdminOrStaffOrReadOnly]
     pagination_class = StandardPagination
+    # The catalogue total is informational; large unfiltered lists use the planner estimate.
+    pagination_mode = 'estimate'
     filter_backends = [filters.SearchFilter]
     search_fields = ['title', 'author', 'bengali_title', 'serial_number', 'category']
+    statement_timeouts = {'list': 2000}
 
     def get_queryset(self):
         queryset = Book.objects.all().order_by('-created_at')
@@ -30,13 +36,17 @@ class BookViewSet(viewsets.ModelViewSet):
             
         return queryset
 
-class BorrowedBookViewSet(viewsets.ModelViewSet):
+class BorrowedBookViewSet(StatementTimeoutMixin, ConditionalGetMixin, SparseFieldsetMixin, NDJSONExportMixin, viewsets.ModelViewSet):
     queryset = BorrowedBook.objects.all().order_by('-borrow_date')
     serializer_class = BorrowedBookSerializer
+    conditional_timestamp_field = None
+    conditional_dependencies = ('library.Book',)
     permission_classes = [IsAdminOrStaffOrReadOnly]
     pagination_class = StandardPagination
+    pagination_mode = 'nocount'
     filter_backends = [filters.SearchFilter]
     search_fields = ['borrower_name', 'book__title', 'book__serial_number']
+    statement_timeouts = {'list': 5000}
 
     def get_queryset(self):
         queryset = BorrowedBook.objects.all().order_by('-borrow_date')
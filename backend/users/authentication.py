@@ -0,0 +1,144 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject, empty
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from core.db_router import primary_reads
+from core.metrics import record_cache
+from core.utils import cache_is_shared
+
+
+def _version_key(user_id):
+    return f'auth_user_version:{user_id}'
+
+
+def _user_key(user_id, version):
+    return f'auth_user:{user_id}:{version}'
+
+
+def invalidate_cached_user(user_id):
+    """
+    Drop the cached copy of a user by bumping its version, so the next
+    request with any token for this user reloads the row.
+    """
+    key = _version_key(user_id)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr().
+        cache.set(key, 1, None)
+
+
+def user_cache_enabled():
+    """
+    Whether users are cached: AUTH_USER_CACHE_TTL is set and the default
+    cache is shared by all workers. With a per-process cache the version
+    bump of a save would not reach the other workers.
+    """
+    return settings.AUTH_USER_CACHE_TTL > 0 and cache_is_shared()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that serves request.user from the cache.
+
+    Users are cached for AUTH_USER_CACHE_TTL seconds under their id and
+    version; users.signals bumps the version whenever a user is saved or
+    deleted. Without a shared cache (see user_cache_enabled) every request
+    loads the user from the database.
+
+    The cached instance is for permission checks and reads only; views that
+    save a user must load the row again.
+    """
+
+    def get_user(self, validated_token):
+        if not user_cache_enabled():
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        version = cache.get(_version_key(user_id), 0)
+        key = _user_key(user_id, version)
+        user = cache.get(key)
+        record_cache('auth_user', user is not None)
+
+        if user is None:
+            # A lagging replica's row would be served for the whole TTL.
+            with primary_reads():
+                user = super().get_user(validated_token)
+            cache.set(key, user, settings.AUTH_USER_CACHE_TTL)
+            return user
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed("The user's password has been changed.", code="password_changed")
+
+        return user
+
+
+class ClaimsUser(SimpleLazyObject):
+    """
+    request.user built from the access token claims.
+
+    ``id``, ``pk``, ``email`` and ``role`` come straight from the token, which
+    is all the permission classes need. Touching any other attribute loads
+    the real user (through the cache), so views that edit request.user or
+    assign it to a foreign key keep working.
+    """
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, load_user, token):
+        super().__init__(load_user)
+        self.__dict__['_token'] = token
+
+    def _user_attr(self, name):
+        if self._wrapped is empty:
+            self._setup()
+        return getattr(self._wrapped, name)
+
+    @property
+    def id(self):
+        return self._token[api_settings.USER_ID_CLAIM]
+
+    @property
+    def pk(self):
+        return self.id
+
+    @property
+    def email(self):
+        if 'email' in self._token:
+            return self._token['email']
+        return self._user_attr('email')
+
+    @property
+    def role(self):
+        if 'role' in self._token:
+            return self._token['role']
+        return self._user_attr('role')
+
+
+class ClaimsJWTAuthentication(CachedJWTAuthentication):
+    """
+    Trusts the ``role`` claim written by CustomTokenObtainPairSerializer.
+
+    No user lookup happens for requests that only need the role. The trade-off
+    is that role changes only apply once the user logs in again.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken("Token contained no recognizable user identification")
+        parent = super()
+        return ClaimsUser(lambda: parent.get_user(validated_token), validated_token)
@@ -1,12 +1,30 @@
-import secrets
+import hashlib
 import os
+from django.core import signing
 from django.core.mail import send_mail
 from django.conf import settings
+from django.utils.crypto import constant_time_compare
 
+TOKEN_SALT = 'users.email_verification'
 
-def generate_verification_token():
-    """Generate a random 64-character verification token."""
-    return secrets.token_urlsafe(48)
+
+def _state_hash(user):
+    """
+    Fingerprint of the fields a verification link is bound to. Changing the
+    email or verifying the account changes it, which invalidates old links.
+    """
+    value = f"{user.pk}:{user.email}:{user.is_verified}"
+    return hashlib.sha256(value.encode()).hexdigest()[:16]
+
+
+def generate_verification_token(user):
+    """
+    Generate a signed, timestamped verification token for ``user``.
+
+    The token carries the user id and a state hash, so nothing has to be
+    stored on the user row and verification is a primary-key lookup.
+    """
+    return signing.dumps({'u': user.pk, 's': _state_hash(user)}, salt=TOKEN_SALT)
 
 
 def send_verification_email(user, request=None):
@@ -17,10 +35,7 @@ def send_verification_email(user, request=None):
         user: The user instance to send the email to
         request: Optional HTTP request to build absolute URL
     """
-    # Generate and save token
-    token = generate_verification_token()
-    user.email_verification_token = token
-    user.save(update_fields=['email_verification_token'])
+    token = generate_verification_token(user)
     
     # Build verification URL
     # In production, use a proper frontend URL
@@ -61,6 +76,11 @@ def verify_email_token(token):
     """
     Verify an email token and mark the user as verified.
     
+    Signed tokens are checked without any lookup by token. Tokens issued
+    before signing was introduced (stored in ``email_verification_token``)
+    are still accepted through the indexed column until they are used or
+    their accounts are purged.
+    
     Args:
         token: The verification token
         
@@ -72,6 +92,38 @@ def verify_email_token(token):
     if not token:
         return False, "No verification token provided.", None
     
+    # Legacy tokens come from secrets.token_urlsafe and never contain ':'.
+    if ':' not in token:
+        return _verify_legacy_token(token)
+    
+    try:
+        payload = signing.loads(token, salt=TOKEN_SALT, max_age=settings.EMAIL_VERIFICATION_TOKEN_MAX_AGE)
+    except signing.SignatureExpired:
+        return False, "Verification link has expired. Please request a new one.", None
+    except signing.BadSignature:
+        return False, "Invalid verification token.", None
+    
+    try:
+        user = CustomUser.objects.get(pk=payload.get('u'))
+    except CustomUser.DoesNotExist:
+        return False, "Invalid verification token.", None
+    
+    if user.is_verified:
+        return False, "Email is already verified.", user
+    
+    if not constant_time_compare(payload.get('s', ''), _state_hash(user)):
+        return False, "Invalid verification token.", None
+    
+    user.is_verified = True
+    user.email_verification_token = None
+    user.save(update_fields=['is_verified', 'email_verification_token'])
+    
+    return True, "Email verified successfully!", user
+
+
+def _verify_legacy_token(token):
+    from .models import CustomUser
+    
     try:
         user = CustomUser.objects.get(email_verification_token=token)
         
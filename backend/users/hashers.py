@@ -0,0 +1,208 @@
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from core.utils import cache_is_shared
+
+# Seconds between attempts to take a cross-worker hashing slot.
+SLOT_POLL_INTERVAL = 0.05
+
+_endpoint = ContextVar('password_hash_endpoint', default='other')
+
+_lock = threading.Lock()
+_executor = None
+_slots = None
+_stats = {}
+
+
+class HashingOverloaded(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'The server is busy processing logins. Please try again shortly.'
+    default_code = 'password_hashing_overloaded'
+
+    def __init__(self, detail=None, code=None):
+        super().__init__(detail, code)
+        # DRF's exception handler turns ``wait`` into a Retry-After header.
+        self.wait = settings.PASSWORD_HASH_RETRY_AFTER
+
+
+@contextmanager
+def hashing_endpoint(name):
+    """Attribute password hashing done inside the block to ``name`` in the stats."""
+    token = _endpoint.set(name)
+    try:
+        yield
+    finally:
+        _endpoint.reset(token)
+
+
+def _get_pool():
+    global _executor, _slots
+    # Created lazily so each gunicorn worker builds its own after fork.
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                workers = settings.PASSWORD_HASH_WORKERS
+                _slots = threading.BoundedSemaphore(workers + settings.PASSWORD_HASH_QUEUE_SIZE)
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+    return _executor, _slots
+
+
+def _endpoint_stats(name):
+    if name not in _stats:
+        _stats[name] = {
+            'queued': 0, 'running': 0, 'calls': 0, 'rejected': 0,
+            'wait_ms_total': 0.0, 'wait_ms_max': 0.0,
+            'hash_ms_total': 0.0, 'hash_ms_max': 0.0,
+        }
+    return _stats[name]
+
+
+def _acquire_shared_slot(deadline):
+    """
+    Take one of the PASSWORD_HASH_MAX_IN_FLIGHT slots shared by all workers,
+    waiting until ``deadline`` (time.monotonic()). Each slot is a cache key
+    taken with the atomic cache.add() and leased for PASSWORD_HASH_SLOT_TTL
+    seconds, so a crashed worker cannot leak it.
+
+    Returns:
+        tuple: (key, token) of the slot, or None if none became free
+    """
+    token = uuid.uuid4().hex
+    keys = [f'password_hash_slot:{i}' for i in range(settings.PASSWORD_HASH_MAX_IN_FLIGHT)]
+    while True:
+        random.shuffle(keys)
+        for key in keys:
+            if cache.add(key, token, settings.PASSWORD_HASH_SLOT_TTL):
+                return key, token
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(SLOT_POLL_INTERVAL)
+
+
+def _release_shared_slot(slot):
+    key, token = slot
+    # Do not free a slot whose lease expired and was taken by another request.
+    if cache.get(key) == token:
+        cache.delete(key)
+
+
+def _reject(name):
+    with _lock:
+        _endpoint_stats(name)['rejected'] += 1
+    return HashingOverloaded()
+
+
+def run_bounded(func, *args):
+    """
+    Run a CPU-heavy hashing call on the bounded hashing pool.
+
+    With a shared cache, at most PASSWORD_HASH_MAX_IN_FLIGHT hashes run or
+    wait across all workers, so the rest of the workers stay free for other
+    requests even with one-request-per-process sync workers. Within a
+    process at most PASSWORD_HASH_WORKERS hashes run at once and at most
+    PASSWORD_HASH_QUEUE_SIZE more may wait.
+
+    A caller whose hash has not started within PASSWORD_HASH_QUEUE_TIMEOUT
+    seconds (slot and pool queue together) gets HashingOverloaded (503)
+    instead of piling more CPU work onto the server.
+    """
+    executor, slots = _get_pool()
+    name = _endpoint.get()
+    deadline = time.monotonic() + settings.PASSWORD_HASH_QUEUE_TIMEOUT
+
+    if not slots.acquire(timeout=settings.PASSWORD_HASH_QUEUE_TIMEOUT):
+        raise _reject(name)
+
+    try:
+        shared_slot = None
+        if cache_is_shared():
+            shared_slot = _acquire_shared_slot(deadline)
+            if shared_slot is None:
+                raise _reject(name)
+        try:
+            return _run(executor, name, deadline, func, *args)
+        finally:
+            if shared_slot is not None:
+                _release_shared_slot(shared_slot)
+    finally:
+        slots.release()
+
+
+def _run(executor, name, deadline, func, *args):
+    submitted = time.monotonic()
+    with _lock:
+        _endpoint_stats(name)['queued'] += 1
+
+    def timed():
+        started = time.monotonic()
+        with _lock:
+            stats = _endpoint_stats(name)
+            stats['queued'] -= 1
+            stats['running'] += 1
+        try:
+            return func(*args)
+        finally:
+            finished = time.monotonic()
+            wait_ms = (started - submitted) * 1000
+            hash_ms = (finished - started) * 1000
+            with _lock:
+                stats['running'] -= 1
+                stats['calls'] += 1
+                stats['wait_ms_total'] += wait_ms
+                stats['wait_ms_max'] = max(stats['wait_ms_max'], wait_ms)
+                stats['hash_ms_total'] += hash_ms
+                stats['hash_ms_max'] = max(stats['hash_ms_max'], hash_ms)
+
+    future = executor.submit(timed)
+    try:
+        return future.result(timeout=max(deadline - time.monotonic(), 0))
+    except FutureTimeout:
+        if future.cancel():
+            with _lock:
+                _endpoint_stats(name)['queued'] -= 1
+            raise _reject(name)
+        # Already hashing; let it finish.
+        return future.result()
+
+
+def hashing_stats():
+    """Snapshot of the per-endpoint hashing metrics for this process."""
+    with _lock:
+        snapshot = {}
+        for name, stats in _stats.items():
+            calls = stats['calls'] or 1
+            snapshot[name] = {
+                'queue_depth': stats['queued'],
+                'running': stats['running'],
+                'calls': stats['calls'],
+                'rejected': stats['rejected'],
+                'avg_wait_ms': round(stats['wait_ms_total'] / calls, 2),
+                'max_wait_ms': round(stats['wait_ms_max'], 2),
+                'avg_hash_ms': round(stats['hash_ms_total'] / calls, 2),
+                'max_hash_ms': round(stats['hash_ms_max'], 2),
+            }
+        return snapshot
+
+
+class IsolatedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    Django's default PBKDF2 hasher, with the key derivation run on the bounded
+    hashing pool. verify() and harden_runtime() go through encode(), so
+    logins, password changes and registrations are all covered.
+
+    The algorithm name is unchanged, so existing hashes keep working.
+    """
+
+    def encode(self, password, salt, iterations=None):
+        return run_bounded(super().encode, password, salt, iterations)
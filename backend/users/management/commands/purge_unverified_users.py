@@ -0,0 +1,82 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from core.storage import queue_deletions
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete accounts that never verified their email, in small batches "
+        "with one short transaction each."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=30,
+            help='Only purge accounts registered more than this many days ago (default: 30).',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Accounts deleted per transaction (default: 500).',
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=0.0,
+            help='Seconds to pause between batches to limit load (default: 0).',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only report what would be deleted.',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        stale = User.objects.filter(
+            is_verified=False, is_staff=False, is_superuser=False, date_joined__lt=cutoff,
+        )
+
+        if options['dry_run']:
+            report = stale.aggregate(
+                total=Count('pk'),
+                staff_applicants=Count('pk', filter=Q(is_staff_applicant=True)),
+                with_picture=Count('pk', filter=~Q(profile_picture='') & Q(profile_picture__isnull=False)),
+                oldest=Min('date_joined'),
+            )
+            self.stdout.write(
+                f"Would delete {report['total']} unverified accounts registered before "
+                f"{cutoff:%Y-%m-%d} ({report['staff_applicants']} staff applicants, "
+                f"{report['with_picture']} profile pictures, oldest {report['oldest'] or '-'})."
+            )
+            return
+
+        deleted = 0
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    stale.select_for_update(skip_locked=True).order_by('pk')
+                    .values_list('pk', 'profile_picture')[:options['batch_size']]
+                )
+                if not batch:
+                    break
+
+                pks = [pk for pk, _ in batch]
+                queue_deletions([picture for _, picture in batch])
+                # Clear the pictures first so django_cleanup does not queue
+                # them a second time when the rows are deleted.
+                User.objects.filter(pk__in=pks).update(profile_picture='')
+                User.objects.filter(pk__in=pks).delete()
+
+            deleted += len(batch)
+            if options['verbosity'] > 1:
+                self.stdout.write(f"Deleted {deleted} accounts so far")
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} unverified accounts."))
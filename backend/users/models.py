@@ -55,12 +55,29 @@ class CustomUser(AbstractUser):
     is_verified = models.BooleanField(default=False)
     is_approved_staff = models.BooleanField(default=False)
     is_staff_applicant = models.BooleanField(default=False)
-    email_verification_token = models.CharField(max_length=64, blank=True, null=True)
+    # Only set for links sent before verification tokens were signed
+    email_verification_token = models.CharField(max_length=64, blank=True, null=True, db_index=True)
 
     objects = CustomUserManager()
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['first_name', 'last_name']
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # UserListView: verified users filtered by role, newest first
+            models.Index(fields=['is_verified', 'role', '-date_joined'], name='user_verified_role_joined_idx'),
+            # UserListView ?is_staff_applicant=true (pending applicants only)
+            models.Index(
+                fields=['-date_joined'],
+                condition=models.Q(is_staff_applicant=True, is_verified=True),
+                name='user_pending_applicant_idx',
+            ),
+            # Registration trends (core.rollups) scan date_joined ranges
+            models.Index(fields=['date_joined'], name='user_date_joined_idx'),
+        ]
+        # PostgreSQL trigram indexes for the directory search are created in
+        # migration 0009 (they cannot be expressed portably here).
+
     def __str__(self):
         return self.email
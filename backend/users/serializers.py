@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from core.serializers import SparseFieldsMixin
 from .models import CustomUser
 
 from django.contrib.auth.password_validation import validate_password
@@ -99,3 +100,16 @@ class UserSerializer(serializers.ModelSerializer):
                     raise ValidationError({"role": "Only Superusers can promote users to Administrator."})
         
         return attrs
+
+class UserListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Read-only columns shown in the admin user directory (UserListView)."""
+    class Meta:
+        model = CustomUser
+        fields = ('id', 'email', 'first_name', 'last_name', 'role', 'is_verified', 'is_approved_staff', 'is_staff_applicant')
+        read_only_fields = fields
+
+class BulkUserActionSerializer(serializers.Serializer):
+    OPERATION_CHOICES = ('approve_staff', 'demote', 'deactivate', 'verify')
+
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=1000)
+    operation = serializers.ChoiceField(choices=OPERATION_CHOICES)
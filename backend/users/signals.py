@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_cached_user
+from .models import CustomUser
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_auth_cache(sender, instance, **kwargs):
+    # Role changes, password changes and deletions must not be served from
+    # the JWT user cache.
+    invalidate_cached_user(instance.pk)
@@ -1,3 +1,286 @@
-from django.test import TestCase
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.test.client import AsyncClient
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.models import PendingDeletion
+from core.stats import get_dashboard_stats
+
+from .email_verification import generate_verification_token, verify_email_token
+
+User = get_user_model()
+
+
+def make_user(email, **fields):
+    # No password: hashing one would make every test take seconds.
+    fields.setdefault('is_verified', True)
+    return User.objects.create_user(email=email, password=None, **fields)
+
+
+def client_for(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+    return client
+
+
+class EmailVerificationTokenTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='rahim@example.com', password='x')
+
+    def test_verifies_user(self):
+        success, _, user = verify_email_token(generate_verification_token(self.user))
+        self.assertTrue(success)
+        self.assertEqual(user, self.user)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_verified)
+
+    def test_expires(self):
+        token = generate_verification_token(self.user)
+        later = time.time() + settings.EMAIL_VERIFICATION_TOKEN_MAX_AGE + 1
+        with mock.patch('django.core.signing.time.time', return_value=later):
+            success, message, _ = verify_email_token(token)
+        self.assertFalse(success)
+        self.assertIn('expired', message)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_verified)
+
+    def test_email_change_invalidates_link(self):
+        token = generate_verification_token(self.user)
+        self.user.email = 'karim@example.com'
+        self.user.save()
+        success, message, _ = verify_email_token(token)
+        self.assertFalse(success)
+        self.assertEqual(message, "Invalid verification token.")
+
+    def test_link_is_single_use(self):
+        token = generate_verification_token(self.user)
+        self.assertTrue(verify_email_token(token)[0])
+        success, message, _ = verify_email_token(token)
+        self.assertFalse(success)
+        self.assertEqual(message, "Email is already verified.")
+
+    def test_link_from_before_verification_is_invalid(self):
+        # Same user and email, but issued while the account was verified
+        # (e.g. a resend raced with an admin verify); the state differs.
+        self.user.is_verified = True
+        token = generate_verification_token(self.user)
+        self.user.is_verified = False
+        success, message, _ = verify_email_token(token)
+        self.assertFalse(success)
+        self.assertEqual(message, "Invalid verification token.")
+
+    def test_tampered_signature(self):
+        token = generate_verification_token(self.user)
+        tampered = token[:-1] + ('A' if token[-1] != 'A' else 'B')
+        success, message, _ = verify_email_token(tampered)
+        self.assertFalse(success)
+        self.assertEqual(message, "Invalid verification token.")
+
+    def test_legacy_token(self):
+        self.user.email_verification_token = 'LegacyToken_123-abc'
+        self.user.save()
+        self.assertTrue(User._meta.get_field('email_verification_token').db_index)
+        success, _, _ = verify_email_token('LegacyToken_123-abc')
+        self.assertTrue(success)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_verified)
+        self.assertIsNone(self.user.email_verification_token)
+
+    def test_unknown_legacy_token(self):
+        success, message, _ = verify_email_token('NotAToken')
+        self.assertFalse(success)
+        self.assertEqual(message, "Invalid verification token.")
+
+    def test_endpoint(self):
+        response = self.client.post('/api/auth/verify-email/', {'token': generate_verification_token(self.user)})
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post('/api/auth/verify-email/', {'token': 'x:y:z'})
+        self.assertEqual(response.status_code, 400)
+
+
+class BulkUserActionTests(TestCase):
+    url = '/api/auth/manage/bulk/'
+
+    def setUp(self):
+        cache.clear()
+        self.admin = make_user('admin@example.com', role='ADMIN')
+        self.other_admin = make_user('other-admin@example.com', role='ADMIN')
+        self.staff = make_user('staff@example.com', role='STAFF', is_staff=True, is_approved_staff=True)
+        self.member = make_user('member@example.com')
+
+    def post(self, operation, ids, user=None):
+        return client_for(user or self.admin).post(self.url, {'operation': operation, 'ids': ids}, format='json')
+
+    def results(self, response):
+        return {result['id']: result['status'] for result in response.json()['results']}
+
+    def test_results_per_id(self):
+        response = self.post('demote', [self.staff.pk, self.member.pk, self.admin.pk, self.other_admin.pk, 9999])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.results(response), {
+            self.staff.pk: 'updated',
+            self.member.pk: 'unchanged',
+            self.admin.pk: 'forbidden',
+            self.other_admin.pk: 'forbidden',
+            9999: 'not_found',
+        })
+        self.assertEqual(response.json()['updated'], 1)
+        self.staff.refresh_from_db()
+        self.assertEqual((self.staff.role, self.staff.is_staff, self.staff.is_approved_staff), ('USER', False, False))
+        self.other_admin.refresh_from_db()
+        self.assertEqual(self.other_admin.role, 'ADMIN')
+
+    def test_superuser_can_change_admins(self):
+        superuser = make_user('root@example.com', role='ADMIN', is_superuser=True)
+        response = self.post('deactivate', [self.other_admin.pk], user=superuser)
+        self.assertEqual(self.results(response), {self.other_admin.pk: 'updated'})
+
+    def test_verify_clears_leftover_token(self):
+        self.member.email_verification_token = 'LegacyToken'
+        self.member.save()
+        response = self.post('verify', [self.member.pk])
+        self.assertEqual(self.results(response), {self.member.pk: 'updated'})
+        self.member.refresh_from_db()
+        self.assertIsNone(self.member.email_verification_token)
+
+    @override_settings(AUTH_USER_CACHE_TTL=60)
+    def test_deactivated_user_is_not_served_from_cache(self):
+        client = client_for(self.member)
+        with mock.patch('users.authentication.cache_is_shared', return_value=True):
+            self.assertEqual(client.get('/api/auth/me/').status_code, 200)
+            self.post('deactivate', [self.member.pk])
+            self.assertEqual(client.get('/api/auth/me/').status_code, 401)
+
+    @override_settings(DASHBOARD_STATS_MODE='counters')
+    def test_refreshes_dashboard_counters(self):
+        self.assertEqual(get_dashboard_stats()['staff_users'], 1)
+        self.post('demote', [self.staff.pk])
+        self.assertEqual(get_dashboard_stats()['staff_users'], 0)
+
+    def test_admin_only(self):
+        response = self.post('demote', [self.member.pk], user=self.staff)
+        self.assertEqual(response.status_code, 403)
+        self.staff.refresh_from_db()
+        self.assertEqual(self.staff.role, 'STAFF')
+
+    def test_id_limit(self):
+        self.assertEqual(self.post('deactivate', list(range(1, 1001))).status_code, 200)
+        response = self.post('deactivate', list(range(1, 1002)))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('ids', response.json())
+
+
+class PurgeUnverifiedUsersTests(TestCase):
+    def setUp(self):
+        old = timezone.now() - timedelta(days=40)
+        self.stale = [
+            make_user(f'stale{i}@example.com', is_verified=False, date_joined=old,
+                      profile_picture=f'users/customuser/{i}.jpg' if i < 2 else '')
+            for i in range(5)
+        ]
+        self.kept = [
+            make_user('verified@example.com', date_joined=old),
+            make_user('staff@example.com', is_verified=False, is_staff=True, date_joined=old),
+            make_user('recent@example.com', is_verified=False),
+        ]
+
+    def purge(self, *args):
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('purge_unverified_users', *args, stdout=out)
+        return out.getvalue()
+
+    def test_purges_stale_unverified_accounts(self):
+        out = self.purge()
+        self.assertIn('Deleted 5 unverified accounts.', out)
+        self.assertEqual(set(User.objects.all()), set(self.kept))
+
+    def test_dry_run(self):
+        out = self.purge('--dry-run')
+        self.assertIn('Would delete 5 unverified accounts', out)
+        self.assertIn('2 profile pictures', out)
+        self.assertEqual(User.objects.count(), 8)
+        self.assertFalse(PendingDeletion.objects.exists())
+
+    def test_batches(self):
+        out = self.purge('--batch-size', '2', '--verbosity', '2')
+        self.assertEqual(
+            [line for line in out.splitlines() if line.endswith('so far')],
+            ['Deleted 2 accounts so far', 'Deleted 4 accounts so far', 'Deleted 5 accounts so far'],
+        )
+
+    def test_pictures_are_queued_once(self):
+        self.purge()
+        self.assertEqual(
+            sorted(PendingDeletion.objects.values_list('name', flat=True)),
+            ['users/customuser/0.jpg', 'users/customuser/1.jpg'],
+        )
+
+
+class DashboardEventsTests(TestCase):
+    ticket_url = '/api/auth/dashboard/events/ticket/'
+    events_url = '/api/auth/dashboard/events/'
+
+    def setUp(self):
+        cache.clear()
+        self.admin = make_user('admin@example.com', role='ADMIN')
+
+    def get_ticket(self, user):
+        return client_for(user).post(self.ticket_url)
+
+    async def open_stream(self, ticket):
+        response = await AsyncClient().get(self.events_url, {'ticket': ticket})
+        if response.status_code == 200:
+            chunks = aiter(response.streaming_content)
+            response.first_events = [await anext(chunks), await anext(chunks)]
+            await response.streaming_content.aclose()
+        return response
+
+    async def test_stream_starts_with_snapshot(self):
+        ticket = (await sync_to_async(self.get_ticket)(self.admin)).json()['ticket']
+        response = await self.open_stream(ticket)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        retry, snapshot = response.first_events
+        self.assertEqual(retry, b'retry: 5000\n\n')
+        self.assertTrue(snapshot.startswith(b'event: snapshot\ndata: {'))
+        self.assertIn(b'"admin_users":1', snapshot)
+
+    async def test_ticket_is_single_use(self):
+        ticket = (await sync_to_async(self.get_ticket)(self.admin)).json()['ticket']
+        self.assertEqual((await self.open_stream(ticket)).status_code, 200)
+        self.assertEqual((await self.open_stream(ticket)).status_code, 401)
+
+    async def test_ticket_expires(self):
+        ticket = (await sync_to_async(self.get_ticket)(self.admin)).json()['ticket']
+        later = time.time() + 31
+        with mock.patch('django.core.signing.time.time', return_value=later):
+            self.assertEqual((await self.open_stream(ticket)).status_code, 401)
+
+    async def test_requires_credentials(self):
+        self.assertEqual((await self.open_stream('')).status_code, 401)
+        self.assertEqual((await self.open_stream('forged:ticket')).status_code, 401)
+
+    def test_staff_only(self):
+        member = make_user('member@example.com')
+        applicant = make_user('applicant@example.com', role='STAFF', is_approved_staff=False)
+        staff = make_user('staff@example.com', role='STAFF', is_approved_staff=True)
+        self.assertEqual(self.get_ticket(member).status_code, 403)
+        self.assertEqual(self.get_ticket(applicant).status_code, 403)
+        self.assertEqual(self.get_ticket(staff).status_code, 200)
+
+    def test_bearer_header_checks_role(self):
+        applicant = make_user('applicant@example.com', role='STAFF', is_approved_staff=False)
+        response = self.client.get(self.events_url, HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(applicant)}')
+        self.assertEqual(response.status_code, 403)
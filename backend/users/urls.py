@@ -6,8 +6,14 @@ from .views import (
     RegisterStaffView, 
     UserDetailView,
     DashboardStatsView,
+    DashboardTrendsView,
+    DashboardEventsView,
+    DashboardEventsTicketView,
+    PasswordHashingStatsView,
+    DatabaseStatsView,
     UserListView,
     ToggleStaffRoleView,
+    BulkUserActionView,
     UserAdminDetailView,
     VerifyEmailView,
     ResendVerificationView,
@@ -29,7 +35,13 @@ urlpatterns = [
     path('password-reset-confirm/', PasswordResetConfirmView.as_view(), name='password-reset-confirm'),
     
     path('dashboard/stats/', DashboardStatsView.as_view(), name='dashboard-stats'),
+    path('dashboard/trends/', DashboardTrendsView.as_view(), name='dashboard-trends'),
+    path('dashboard/events/', DashboardEventsView.as_view(), name='dashboard-events'),
+    path('dashboard/events/ticket/', DashboardEventsTicketView.as_view(), name='dashboard-events-ticket'),
+    path('dashboard/password-hashing/', PasswordHashingStatsView.as_view(), name='password-hashing-stats'),
+    path('dashboard/database/', DatabaseStatsView.as_view(), name='database-stats'),
     path('manage/', UserListView.as_view(), name='user-list'),
+    path('manage/bulk/', BulkUserActionView.as_view(), name='user-bulk-action'),
     path('manage/<int:pk>/', UserAdminDetailView.as_view(), name='user-admin-detail'),
     path('manage/<int:pk>/toggle-staff/', ToggleStaffRoleView.as_view(), name='toggle-staff-role'),
 ]
@@ -1,5 +1,15 @@
+import secrets
+
+from asgiref.sync import sync_to_async
+from django.core import signing
+from django.core.cache import cache
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
 from rest_framework import generics, status, permissions, filters
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from .models import CustomUser
@@ -7,31 +17,42 @@ from .serializers import (
     UserRegistrationSerializer, 
     StaffRegistrationSerializer, 
     UserSerializer,
+    UserListSerializer,
+    BulkUserActionSerializer,
     ChangePasswordSerializer,
     RequestPasswordResetSerializer,
     SetNewPasswordSerializer
 )
 from django.contrib.auth import get_user_model
-from core.pagination import StandardPagination
+from django.db import transaction
+from core.events import event_stream, get_hub
+from core.pagination import DirectoryPagination
+from core.stats import invalidate_stats
+from core.mixins import NDJSONExportMixin, SparseFieldsetMixin, StatementTimeoutMixin
+from .authentication import invalidate_cached_user
+from .hashers import HashingOverloaded, hashing_endpoint
 
 User = get_user_model()
 
 # ... (rest of imports/classes)
 
-class UserListView(generics.ListAPIView):
+class UserListView(StatementTimeoutMixin, SparseFieldsetMixin, NDJSONExportMixin, generics.ListAPIView):
     queryset = User.objects.all()
-    serializer_class = UserSerializer
+    serializer_class = UserListSerializer
     permission_classes = [permissions.IsAuthenticated]
-    pagination_class = StandardPagination
+    pagination_class = DirectoryPagination
+    # The user manager only follows `next`; skip the COUNT(*) over the directory.
+    pagination_mode = 'nocount'
     filter_backends = [filters.SearchFilter]
     search_fields = ['first_name', 'last_name', 'email', 'mobile_number']
+    statement_timeout = 5000
 
     def get_queryset(self):
         # Only admin sees all users to manage them
         if self.request.user.role != 'ADMIN':
             return User.objects.none()
         
-        queryset = User.objects.filter(is_verified=True).order_by('-date_joined')
+        queryset = User.objects.filter(is_verified=True).only(*UserListSerializer.Meta.fields).order_by('-date_joined')
         
         role = self.request.query_params.get('role')
         if role:
@@ -47,13 +68,20 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
-        token['role'] = user.role
+        # Unapproved staff get USER privileges; the claim must say so because
+        # ClaimsJWTAuthentication trusts it.
+        if user.role == 'STAFF' and not user.is_approved_staff:
+            token['role'] = 'USER'
+        else:
+            token['role'] = user.role
         token['email'] = user.email
         return token
 
     def validate(self, attrs):
         try:
             data = super().validate(attrs) # This sets self.user
+        except HashingOverloaded:
+            raise
         except Exception:
             from rest_framework.exceptions import AuthenticationFailed
             raise AuthenticationFailed("Invalid email or password.")
@@ -77,6 +105,7 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
+    throttle_scope = 'login'
     
     def post(self, request, *args, **kwargs):
         # Verify reCAPTCHA
@@ -91,12 +120,18 @@ class CustomTokenObtainPairView(TokenObtainPairView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        return super().post(request, *args, **kwargs)
+        with hashing_endpoint('login'):
+            return super().post(request, *args, **kwargs)
 
 class RegisterUserView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = UserRegistrationSerializer
     permission_classes = (permissions.AllowAny,)
+    throttle_scope = 'register'
+
+    def create(self, request, *args, **kwargs):
+        with hashing_endpoint('register'):
+            return super().create(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         user = serializer.save()
@@ -108,6 +143,11 @@ class RegisterStaffView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = StaffRegistrationSerializer
     permission_classes = (permissions.AllowAny,)
+    throttle_scope = 'register'
+
+    def create(self, request, *args, **kwargs):
+        with hashing_endpoint('register'):
+            return super().create(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         user = serializer.save()
@@ -120,13 +160,13 @@ class UserDetailView(generics.RetrieveUpdateAPIView):
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_object(self):
-        return self.request.user
+        if self.request.method in permissions.SAFE_METHODS:
+            return self.request.user
+        # request.user may be a cached copy; save from the current row so a
+        # concurrent role or is_active change is not written back.
+        return User.objects.get(pk=self.request.user.pk)
 
 # ... (imports)
-from django.db.models import Count
-from rest_framework.views import APIView
-from rest_framework.response import Response
-from rest_framework import status
 
 class DashboardStatsView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -138,67 +178,140 @@ class DashboardStatsView(APIView):
         if request.user.role not in ['ADMIN', 'STAFF']:
              return Response({"error": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
 
-        stats = {
-            "total_users": User.objects.count(),
-            "admin_users": User.objects.filter(role='ADMIN').count(),
-            "staff_users": User.objects.filter(role='STAFF').count(),
-            "regular_users": User.objects.filter(role='USER').count(),
-        }
+        from core.stats import get_dashboard_stats
+        return Response(get_dashboard_stats())
 
-        # Lazy imports to avoid circular dependency and errors if apps change
-        try:
-            from library.models import Book
-            stats["total_books"] = Book.objects.count()
-        except ImportError:
-            stats["total_books"] = 0
+class DashboardTrendsView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
 
-        try:
-            from library.models import BorrowedBook
-            stats["total_borrowed"] = BorrowedBook.objects.filter(is_returned=False).count()
-            stats["total_returned"] = BorrowedBook.objects.filter(is_returned=True).count()
-        except ImportError:
-            stats["total_borrowed"] = 0
-            stats["total_returned"] = 0
+    def get(self, request):
+        if request.user.role not in ['ADMIN', 'STAFF']:
+             return Response({"error": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
 
-        try:
-            from core.models import Member
-            stats["total_members"] = Member.objects.count()
-        except ImportError:
-            stats["total_members"] = 0
+        from core.rollups import DEFAULT_INTERVALS, get_trend, metric_names, parse_range
 
-        try:
-            from core.models import Notice
-            stats["total_notices"] = Notice.objects.count()
-        except ImportError:
-            stats["total_notices"] = 0
+        metric = request.query_params.get('metric')
+        if metric not in metric_names():
+            return Response({"error": f"metric must be one of: {', '.join(metric_names())}"}, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            from core.models import ContactMessage
-            stats["total_messages"] = ContactMessage.objects.count()
-            stats["unread_messages"] = ContactMessage.objects.filter(is_read=False).count()
-        except ImportError:
-            stats["total_messages"] = 0
-            stats["unread_messages"] = 0
+        interval = request.query_params.get('interval', DEFAULT_INTERVALS[metric])
+        if interval not in ('day', 'week', 'month'):
+            return Response({"error": "interval must be day, week or month"}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            from health.models import HealthCamp
-            stats["total_health_camps"] = HealthCamp.objects.count()
-        except ImportError:
-            stats["total_health_camps"] = 0
-            
-        try:
-            from blog.models import Post
-            stats["total_posts"] = Post.objects.count()
-        except ImportError:
-             # Try BlogPost alternate name
+            days = parse_range(request.query_params.get('range', '30d'))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(get_trend(metric, days, interval))
+
+
+EVENTS_TICKET_SALT = 'users.dashboard_events'
+# Seconds a stream ticket can be used to open the event stream.
+EVENTS_TICKET_MAX_AGE = 30
+
+
+def dashboard_role(user):
+    """The user's role for dashboard access; unapproved staff count as USER, as in their token."""
+    if user.role == 'STAFF' and not user.is_approved_staff:
+        return 'USER'
+    return user.role
+
+
+async def claim_events_ticket(ticket):
+    """
+    Return the role of a valid, unused stream ticket, or None. Each ticket
+    opens one stream: its nonce is recorded in the cache until it expires,
+    across workers when the cache is shared.
+    """
+    try:
+        payload = signing.loads(ticket, salt=EVENTS_TICKET_SALT, max_age=EVENTS_TICKET_MAX_AGE)
+        nonce, role = payload['n'], payload['r']
+    except (signing.BadSignature, KeyError, TypeError):
+        return None
+    if not await cache.aadd(f'dashboard_events_ticket:{nonce}', True, EVENTS_TICKET_MAX_AGE):
+        return None
+    return role
+
+
+class DashboardEventsTicketView(APIView):
+    """
+    Issues a short-lived ticket for DashboardEventsView. EventSource cannot
+    send headers, so the browser puts the ticket in the stream URL instead
+    of the access token, which would end up in proxy and access logs.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        role = dashboard_role(request.user)
+        if role not in ['ADMIN', 'STAFF']:
+            return Response({"error": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
+
+        ticket = signing.dumps(
+            {'u': request.user.pk, 'r': role, 'n': secrets.token_urlsafe(12)},
+            salt=EVENTS_TICKET_SALT,
+        )
+        return Response({'ticket': ticket, 'expires_in': EVENTS_TICKET_MAX_AGE})
+
+
+class DashboardEventsView(View):
+    """
+    Server-sent events for the admin dashboard: a stats snapshot, then
+    counter changes and new contact messages as they happen.
+
+    Needs the ASGI app (ks_foundation_project.asgi). Authenticates with the
+    Authorization header or, for EventSource, a single-use ``?ticket=`` from
+    DashboardEventsTicketView.
+    """
+
+    async def get(self, request):
+        header = request.headers.get('Authorization', '')
+        ticket = request.GET.get('ticket')
+        if header.startswith('Bearer '):
+            authenticator = api_settings.DEFAULT_AUTHENTICATION_CLASSES[0]()
             try:
-                from blog.models import BlogPost
-                stats["total_posts"] = BlogPost.objects.count()
-            except ImportError:
-                stats["total_posts"] = 0
+                token = authenticator.get_validated_token(header[7:].encode())
+                user = await sync_to_async(authenticator.get_user)(token)
+                role = await sync_to_async(dashboard_role)(user)
+            except (AuthenticationFailed, InvalidToken, TokenError):
+                return JsonResponse({"error": "Invalid or expired token"}, status=status.HTTP_401_UNAUTHORIZED)
+        elif ticket:
+            role = await claim_events_ticket(ticket)
+            if role is None:
+                return JsonResponse({"error": "Invalid, used or expired ticket"}, status=status.HTTP_401_UNAUTHORIZED)
+        else:
+            return JsonResponse({"error": "Authentication credentials were not provided."}, status=status.HTTP_401_UNAUTHORIZED)
 
-        return Response(stats)
+        if role not in ['ADMIN', 'STAFF']:
+            return JsonResponse({"error": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
 
+        hub = get_hub()
+        response = StreamingHttpResponse(event_stream(hub, hub.subscribe()), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+class PasswordHashingStatsView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        if request.user.role != 'ADMIN':
+            return Response({"error": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
+
+        from .hashers import hashing_stats
+        return Response(hashing_stats())
+
+
+class DatabaseStatsView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        if request.user.role != 'ADMIN':
+            return Response({"error": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
+
+        from core.database import database_stats
+        return Response(database_stats())
 
 
 class UserAdminDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -258,7 +371,72 @@ class ToggleStaffRoleView(APIView):
              return Response({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
 
 
-from rest_framework.views import APIView
+
+class BulkUserActionView(APIView):
+    """
+    Apply one operation to many users with a single UPDATE.
+
+    Uses the same rules as ToggleStaffRoleView and UserSerializer.validate:
+    admins cannot change their own account, and only superusers may change
+    an Administrator. Each id gets its own result.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    OPERATIONS = {
+        'approve_staff': {'role': 'STAFF', 'is_staff': True, 'is_approved_staff': True, 'is_staff_applicant': False},
+        'demote': {'role': 'USER', 'is_staff': False, 'is_approved_staff': False},
+        'deactivate': {'is_active': False},
+        'verify': {'is_verified': True, 'email_verification_token': None},
+    }
+
+    def post(self, request):
+        if request.user.role != 'ADMIN':
+            return Response({"error": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
+
+        serializer = BulkUserActionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        operation = serializer.validated_data['operation']
+        ids = list(dict.fromkeys(serializer.validated_data['ids']))
+        changes = self.OPERATIONS[operation]
+
+        results = {}
+        with transaction.atomic():
+            # Every field of the operation is read, so 'unchanged' means unchanged.
+            fields = {'pk', 'role', *changes}
+            rows = {row['pk']: row for row in User.objects.select_for_update().filter(pk__in=ids).values(*fields)}
+
+            eligible = []
+            for pk in ids:
+                row = rows.get(pk)
+                if row is None:
+                    results[pk] = ('not_found', "User not found")
+                elif pk == request.user.pk:
+                    results[pk] = ('forbidden', "Cannot change your own account")
+                elif row['role'] == 'ADMIN' and not request.user.is_superuser:
+                    results[pk] = ('forbidden', "Cannot change an Administrator")
+                elif all(row[field] == value for field, value in changes.items()):
+                    results[pk] = ('unchanged', None)
+                else:
+                    eligible.append(pk)
+                    results[pk] = ('updated', None)
+
+            if eligible:
+                User.objects.filter(pk__in=eligible).update(**changes)
+
+        # QuerySet.update() skips post_save, so refresh what the signals would have
+        for pk in eligible:
+            invalidate_cached_user(pk)
+        if eligible:
+            invalidate_stats(User)
+
+        return Response({
+            'operation': operation,
+            'updated': len(eligible),
+            'results': [
+                {'id': pk, 'status': result, 'detail': detail}
+                for pk, (result, detail) in results.items()
+            ],
+        })
 
 class VerifyEmailView(APIView):
     permission_classes = [permissions.AllowAny]
@@ -307,14 +485,16 @@ class ChangePasswordView(generics.UpdateAPIView):
     def update(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        user = request.user
-        
-        # Check old password
-        if not user.check_password(serializer.data.get("old_password")):
-            return Response({"old_password": ["Wrong password."]}, status=status.HTTP_400_BAD_REQUEST)
+        # Not request.user, which may be a cached copy with an old hash.
+        user = User.objects.get(pk=request.user.pk)
         
-        # set_password also hashes the password that the user will get
-        user.set_password(serializer.data.get("new_password"))
+        with hashing_endpoint('change-password'):
+            # Check old password
+            if not user.check_password(serializer.data.get("old_password")):
+                return Response({"old_password": ["Wrong password."]}, status=status.HTTP_400_BAD_REQUEST)
+            
+            # set_password also hashes the password that the user will get
+            user.set_password(serializer.data.get("new_password"))
         user.save()
         
         return Response({"message": "Password updated successfully."}, status=status.HTTP_200_OK)
@@ -322,6 +502,7 @@ class ChangePasswordView(generics.UpdateAPIView):
 class RequestPasswordResetView(generics.GenericAPIView):
     serializer_class = RequestPasswordResetSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'password-reset'
 
     def post(self, request):
         serializer = self.serializer_class(data=request.data)
@@ -367,6 +548,7 @@ class RequestPasswordResetView(generics.GenericAPIView):
 class PasswordResetConfirmView(generics.GenericAPIView):
     serializer_class = SetNewPasswordSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'password-reset'
 
     def patch(self, request):
         serializer = self.serializer_class(data=request.data)
@@ -387,7 +569,8 @@ class PasswordResetConfirmView(generics.GenericAPIView):
             if not PasswordResetTokenGenerator().check_token(user, token):
                  return Response({'error': 'Token is invalid or expired'}, status=status.HTTP_401_UNAUTHORIZED)
             
-            user.set_password(password)
+            with hashing_endpoint('password-reset-confirm'):
+                user.set_password(password)
             user.save()
             return Response({'message': 'Password reset success'}, status=status.HTTP_200_OK)
             
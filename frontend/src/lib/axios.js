@@ -17,16 +17,32 @@ const api = axios.create({
     baseURL: getBaseUrl(),
 });
 
+// Read-your-writes: after a write the API returns X-Read-Primary-Until (a Unix
+// timestamp). Sending it back until then makes reads come from the primary
+// database instead of a replica that may not have the change yet.
+const READ_PRIMARY_HEADER = 'X-Read-Primary-Until';
+const READ_PRIMARY_KEY = 'read_primary_until';
+
 api.interceptors.request.use((config) => {
     const token = localStorage.getItem('access_token');
     if (token) {
         config.headers.Authorization = `Bearer ${token}`;
     }
+    const readPrimaryUntil = localStorage.getItem(READ_PRIMARY_KEY);
+    if (readPrimaryUntil && Number(readPrimaryUntil) > Date.now() / 1000) {
+        config.headers[READ_PRIMARY_HEADER] = readPrimaryUntil;
+    }
     return config;
 });
 
 api.interceptors.response.use(
-    (response) => response,
+    (response) => {
+        const readPrimaryUntil = response.headers[READ_PRIMARY_HEADER.toLowerCase()];
+        if (readPrimaryUntil) {
+            localStorage.setItem(READ_PRIMARY_KEY, readPrimaryUntil);
+        }
+        return response;
+    },
     async (error) => {
         const originalRequest = error.config;
 